@@ -0,0 +1,129 @@
+"""
+Description: Statistics over a game-record log, gathered one record at a time so logs of any
+size can be analyzed, and a log that is still growing can be followed.
+
+    python -m chopsticks.analysis games.log [offset]
+"""
+
+from __future__ import annotations
+import sys
+import time
+from collections import Counter
+from typing import Iterator
+
+from chopsticks.logic import Logic
+from chopsticks.records import GameRecord, read_records
+
+
+class LogAnalysis:
+    """
+    Running totals over every game added so far
+
+    Memory depends on the variants and players in the log, never on how many games it holds.
+    offset is how far into the log the analysis has read, to carry on from later.
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.games = 0
+        self.stalemates = 0
+        self.total_rounds_played = 0
+        # games won by each seat, and by each seat when a given seat started, by (starting seat, winning seat)
+        self.wins_by_seat: Counter[int] = Counter()
+        self.games_by_starting_seat: Counter[int] = Counter()
+        self.wins_by_starting_seat: Counter[tuple[int, int]] = Counter()
+        self.game_lengths: Counter[int] = Counter()
+        # positions with the player to move, by State.canonical_key(), with how they print
+        self.positions: Counter[int] = Counter()
+        self.position_names: dict[int, str] = {}
+        # moves made by each player type, by (player type, move code)
+        self.moves: Counter[tuple[str, str]] = Counter()
+
+    def add(self, record: GameRecord):
+        self.games += 1
+        self.total_rounds_played += record.rounds_played
+        self.game_lengths[record.rounds_played] += 1
+        self.games_by_starting_seat[record.starting_player_id] += 1
+        if record.winning_player_id:
+            self.wins_by_seat[record.winning_player_id] += 1
+            self.wins_by_starting_seat[(record.starting_player_id, record.winning_player_id)] += 1
+        else:
+            self.stalemates += 1
+
+        state = record.starting_state()
+        for player_id, move in record.moves:
+            state.set_current_player(player_id)
+            key = state.canonical_key()
+            self.positions[key] += 1
+            if key not in self.position_names:
+                hands = [sorted(state.hands(hands_player_id)) for hands_player_id in state.player_ids()]
+                self.position_names[key] = f"{hands} player {player_id} to move"
+            self.moves[(record.player_types[player_id - 1], move.code)] += 1
+            Logic.do_move(state, move, player_id)
+
+    def game_length_histogram(self, bucket_size: int = 5) -> list[tuple[int, int]]:
+        """ (first length in bucket, games) for every bucket of game lengths with any games """
+        buckets: Counter[int] = Counter()
+        for length, games in self.game_lengths.items():
+            buckets[length // bucket_size * bucket_size] += games
+        return sorted(buckets.items())
+
+    def summary(self, top_positions: int = 10) -> list[str]:
+        if not self.games:
+            return ["No games."]
+        lines = [f"{self.games} games, {self.stalemates} stalemates ({self.stalemates / self.games:.1%}), "
+            f"an average of {self.total_rounds_played / self.games:.1f} rounds."]
+        seats = sorted(set(self.games_by_starting_seat) | set(self.wins_by_seat))
+        for seat in seats:
+            lines.append(f"Seat {seat} won {self.wins_by_seat[seat]} games ({self.wins_by_seat[seat] / self.games:.1%}).")
+        for starting_seat, games in sorted(self.games_by_starting_seat.items()):
+            rates = ', '.join(f"seat {seat} {self.wins_by_starting_seat[(starting_seat, seat)] / games:.1%}"
+                for seat in seats)
+            lines.append(f"When seat {starting_seat} started ({games} games): {rates}.")
+        lines.append("Game lengths:")
+        for first_length, games in self.game_length_histogram():
+            lines.append(f"  {first_length:4d}+ {games:8d} {'#' * max(1, round(40 * games / self.games))}")
+        lines.append("Most frequent positions:")
+        for key, count in self.positions.most_common(top_positions):
+            lines.append(f"  {count:8d} {self.position_names[key]}")
+        lines.append("Moves by player type:")
+        player_types = sorted({player_type for player_type, _ in self.moves})
+        for player_type in player_types:
+            total = sum(count for (moves_type, _), count in self.moves.items() if moves_type == player_type)
+            rates = ', '.join(f"{code} {self.moves[(player_type, code)] / total:.1%}" for code in ('h', 's'))
+            lines.append(f"  {player_type}: {total} moves, {rates}")
+        return lines
+
+
+def analyze(path: str, analysis: LogAnalysis|None = None) -> LogAnalysis:
+    """ Adds every complete record after analysis.offset to analysis, or to a new analysis """
+    analysis = analysis if analysis else LogAnalysis()
+    for record, offset in read_records(path, analysis.offset):
+        analysis.add(record)
+        analysis.offset = offset
+    return analysis
+
+
+def follow(path: str, analysis: LogAnalysis|None = None, poll_seconds: float = 1.0) -> Iterator[LogAnalysis]:
+    """ Keeps adding records as they are appended to the log, yielding the analysis whenever it has grown """
+    analysis = analysis if analysis else LogAnalysis()
+    while True:
+        games = analysis.games
+        analyze(path, analysis)
+        if analysis.games > games:
+            yield analysis
+        else:
+            time.sleep(poll_seconds)
+
+
+def main():
+    analysis = LogAnalysis()
+    analysis.offset = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    analyze(sys.argv[1], analysis)
+    for line in analysis.summary():
+        print(line)
+    print(f"Read up to offset {analysis.offset}.")
+
+
+if __name__ == '__main__':
+    main()
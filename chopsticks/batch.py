@@ -0,0 +1,197 @@
+"""
+Description: NumPy versions of the move generator and position checks, which work on whole
+arrays of encoded states at once.
+"""
+
+from __future__ import annotations
+import numpy as np
+
+from chopsticks.bot_util import BotUtil
+from chopsticks.logic import Logic, Undo
+from chopsticks.state import State, get_place_values
+from typing import cast
+
+
+class Batch:
+    """
+    Array operations for one (num_players, num_hands, num_fingers) variant
+
+    States are encoded as their State.key(): one base-num_fingers digit per hand, player
+    by player, with the player to move as the top digit. Every method takes a 1-d array
+    of keys and works on all of them in one call.
+    """
+
+    _batches: dict[tuple[int, int, int], Batch] = {}
+
+    def __init__(self, num_players: int, num_hands: int, num_fingers: int):
+        self.num_players = num_players
+        self.num_hands = num_hands
+        self.num_fingers = num_fingers
+        place_values = get_place_values(num_players, num_hands, num_fingers)
+        self.place_values = np.array(place_values[:-1], dtype=np.int64)
+        self.player_place_value = place_values[-1]
+        self.hand_place_values = self.place_values[:num_hands]
+        self.split_table = split_table(num_hands, num_fingers)
+
+    @staticmethod
+    def get(num_players: int, num_hands: int, num_fingers: int) -> Batch:
+        """ The shared batch for a variant """
+        dimensions = (num_players, num_hands, num_fingers)
+        if dimensions not in Batch._batches:
+            Batch._batches[dimensions] = Batch(num_players, num_hands, num_fingers)
+        return Batch._batches[dimensions]
+
+    def encode(self, states: list[State]) -> np.ndarray:
+        return np.array([state.key() for state in states], dtype=np.int64)
+
+    def decode(self, keys: np.ndarray) -> list[State]:
+        return [State(self.num_players, self.num_hands, self.num_fingers, [int(fingers) for fingers in row],
+            int(player_id)) for row, player_id in zip(self.fingers(keys), self.current_player_ids(keys))]
+
+    def fingers(self, keys: np.ndarray) -> np.ndarray:
+        """ Fingers on every hand, shaped (states, num_players * num_hands) in player-major order """
+        keys = np.asarray(keys, dtype=np.int64)
+        return (keys[:, np.newaxis] // self.place_values) % self.num_fingers
+
+    def current_player_ids(self, keys: np.ndarray) -> np.ndarray:
+        return np.asarray(keys, dtype=np.int64) // self.player_place_value + 1
+
+    def alive_hands(self, keys: np.ndarray) -> np.ndarray:
+        """ Number of alive hands of every player, shaped (states, num_players) """
+        return self._hands(self.fingers(keys)).astype(bool).sum(axis=-1)
+
+    def is_game_over(self, keys: np.ndarray) -> np.ndarray:
+        return (self.alive_hands(keys) > 0).sum(axis=-1) <= 1
+
+    def has_vulnerable_hand(self, keys: np.ndarray, player_1_ids: np.ndarray|int,
+            player_2_ids: np.ndarray|int) -> np.ndarray:
+        """ Whether a hand of player_1 and a hand of player_2 add up to exactly num_fingers """
+        hands = self._hands(self.fingers(keys))
+        rows = np.arange(len(hands))
+        player_1_hands = hands[rows, np.asarray(player_1_ids) - 1]
+        player_2_hands = hands[rows, np.asarray(player_2_ids) - 1]
+        return (player_1_hands[:, :, np.newaxis] + player_2_hands[:, np.newaxis, :]
+            == self.num_fingers).any(axis=(1, 2))
+
+    def is_vulnerable(self, keys: np.ndarray, current_player_ids: np.ndarray|int) -> np.ndarray:
+        """ Whether any opponent has a hand that could knock out a hand of the current player """
+        hands = self._hands(self.fingers(keys))
+        current_player_ids = np.broadcast_to(np.asarray(current_player_ids), len(hands))
+        current_hands = hands[np.arange(len(hands)), current_player_ids - 1]
+        sums = hands[:, :, :, np.newaxis] + current_hands[:, np.newaxis, np.newaxis, :]
+        is_opponent = np.arange(1, self.num_players + 1) != current_player_ids[:, np.newaxis]
+        return ((sums == self.num_fingers).any(axis=(2, 3)) & is_opponent).any(axis=1)
+
+    def successors(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Keys of the states after each legal move of the player to move, shaped (states, moves)
+
+        Each row is in BotUtil.get_legal_moves order and padded with -1. Successors have
+        the next alive player to move, as the game would after the move.
+        """
+        fingers = self.fingers(keys)
+        num_states = len(fingers)
+        rows = np.arange(num_states)
+        player_ids = self.current_player_ids(keys)
+        my_offsets = (player_ids - 1) * self.num_hands
+        my_hands = self._hands(fingers)[rows, player_ids - 1]
+        is_new_my_hand = self._is_first_occurrence(my_hands)
+
+        candidates: list[np.ndarray] = []
+        is_legal: list[np.ndarray] = []
+
+        # hits, on each opponent in turn order with my hand then their hand as in BotUtil
+        for opponent_slot in range(self.num_players - 1):
+            opponent_ids = np.where(opponent_slot + 1 < player_ids, opponent_slot + 1, opponent_slot + 2)
+            opponent_offsets = (opponent_ids - 1) * self.num_hands
+            opponent_hands = self._hands(fingers)[rows, opponent_ids - 1]
+            is_new_opponent_hand = self._is_first_occurrence(opponent_hands)
+            for my_hand in range(self.num_hands):
+                for opponent_hand in range(self.num_hands):
+                    candidate = fingers.copy()
+                    candidate[rows, opponent_offsets + opponent_hand] = \
+                        (opponent_hands[:, opponent_hand] + my_hands[:, my_hand]) % self.num_fingers
+                    candidates.append(candidate)
+                    is_legal.append(is_new_my_hand[:, my_hand] & (my_hands[:, my_hand] > 0)
+                        & is_new_opponent_hand[:, opponent_hand] & (opponent_hands[:, opponent_hand] > 0))
+
+        # splits, looked up by the configuration of my hands
+        split_configs = self.split_table[my_hands @ self.hand_place_values]
+        for split in range(split_configs.shape[1]):
+            candidate = fingers.copy()
+            split_hands = (split_configs[:, split, np.newaxis] // self.hand_place_values) % self.num_fingers
+            candidate[rows[:, np.newaxis], my_offsets[:, np.newaxis] + np.arange(self.num_hands)] = split_hands
+            candidates.append(candidate)
+            is_legal.append(split_configs[:, split] >= 0)
+
+        if not candidates:
+            return np.full((num_states, 0), -1, dtype=np.int64)
+        successor_fingers = np.stack(candidates, axis=1)
+        legal = np.stack(is_legal, axis=1)
+
+        next_player_ids = self.next_player_ids(successor_fingers, player_ids[:, np.newaxis])
+        successor_keys = successor_fingers @ self.place_values + (next_player_ids - 1) * self.player_place_value
+
+        # move the legal successors to the front of each row, keeping their order
+        order = np.argsort(~legal, axis=1, kind='stable')
+        successor_keys = np.take_along_axis(np.where(legal, successor_keys, -1), order, axis=1)
+        return successor_keys[:, :max(1, int(legal.sum(axis=1).max(initial=0)))]
+
+    def next_player_ids(self, fingers: np.ndarray, player_ids: np.ndarray) -> np.ndarray:
+        """
+        Logic.next_player_id for fingers shaped (..., num_players * num_hands), with player_ids
+        broadcast against the leading axes: the next alive player, or player_id if nobody else is alive
+        """
+        alive = self._hands(fingers).any(axis=-1)
+        player_ids = np.broadcast_to(player_ids, alive.shape[:-1])
+        next_player_ids = player_ids.copy()
+        found = np.zeros(alive.shape[:-1], dtype=bool)
+        for offset in range(1, self.num_players):
+            candidate_ids = (player_ids + offset - 1) % self.num_players + 1
+            is_next = ~found & np.take_along_axis(alive, candidate_ids[..., np.newaxis] - 1, axis=-1)[..., 0]
+            next_player_ids[is_next] = candidate_ids[is_next]
+            found |= is_next
+        return next_player_ids
+
+    def canonical_keys(self, keys: np.ndarray) -> np.ndarray:
+        """ State.canonical_key() of every state: each player's hands sorted, players left in place """
+        keys = np.asarray(keys, dtype=np.int64)
+        sorted_fingers = np.sort(self._hands(self.fingers(keys)), axis=-1).reshape(len(keys), -1)
+        return sorted_fingers @ self.place_values + (keys // self.player_place_value) * self.player_place_value
+
+    def _hands(self, fingers: np.ndarray) -> np.ndarray:
+        """ Fingers reshaped so the last two axes are player and hand """
+        return fingers.reshape(fingers.shape[:-1] + (self.num_players, self.num_hands))
+
+    @staticmethod
+    def _is_first_occurrence(hands: np.ndarray) -> np.ndarray:
+        """ Whether each hand is the first of its player's hands with that many fingers """
+        is_first = np.ones(hands.shape, dtype=bool)
+        for hand in range(1, hands.shape[1]):
+            is_first[:, hand] = (hands[:, :hand] != hands[:, hand, np.newaxis]).all(axis=1)
+        return is_first
+
+
+def split_table(num_hands: int, num_fingers: int) -> np.ndarray:
+    """
+    Hand configurations reachable by one legal split from each configuration, padded with -1
+
+    Configurations number a player's hands as base-num_fingers digits, hand 1 first.
+    The splits come from BotUtil and Logic, so array code follows the same rules as the bots.
+    """
+    num_configs = num_fingers ** num_hands
+    reachable: list[list[int]] = []
+    for config in range(num_configs):
+        hands = [(config // num_fingers ** hand) % num_fingers for hand in range(num_hands)]
+        state = State(2, num_hands, num_fingers, hands + [1] * num_hands)
+        configs: list[int] = []
+        for split in BotUtil._get_legal_split_moves(state, 1):
+            undo = Logic.apply(state, split, 1)
+            configs.append(sum(fingers * num_fingers ** hand for hand, fingers in enumerate(state.hands(1))))
+            Logic.undo(state, cast(Undo, undo))
+        reachable.append(configs)
+
+    table = np.full((num_configs, max(1, max(len(configs) for configs in reachable))), -1, dtype=np.int64)
+    for config, configs in enumerate(reachable):
+        table[config, :len(configs)] = configs
+    return table
@@ -0,0 +1,220 @@
+"""
+Description: Reproducible timings of move generation, scenarios, search and whole tournaments,
+written to a JSON file so runs before and after a change can be compared.
+
+    python -m chopsticks.benchmark results.json [quick]
+    python -m chopsticks.benchmark compare before.json after.json
+"""
+
+from __future__ import annotations
+import sys
+import json
+import time
+import random
+import platform
+import subprocess
+import numpy as np
+
+from chopsticks.bot_util import BotUtil
+from chopsticks.bots import DefendBot, ThetaBot, NegamaxBot, MonteCarloBot
+from chopsticks.core import Game, HeadlessGame
+from chopsticks.player import Player
+from chopsticks.logic import Logic
+from chopsticks.state import State, Scenario
+import chopsticks.profiling as profiling
+import chopsticks.trace as trace
+
+SEED = 2019
+
+# (num_players, num_hands, num_fingers)
+CONFIGURATIONS = [(2, 2, 5), (3, 2, 5), (2, 3, 5), (2, 2, 10)]
+
+# bot types played against RandomBots, and the number of games each plays per configuration
+TOURNAMENT_GAMES = {'RB': 200, 'ANB': 200, 'AB': 50, 'DB': 50, 'ADB': 20, 'TB': 50, 'PB': 50, 'NB': 2, 'MB': 2}
+
+SIMULATE_ROUNDS = [1, 2, 3, 4, 5, 6]
+
+# NegamaxBot's search is cut off after this many nodes, rather than after a time budget
+NEGAMAX_NODES = 4000
+
+
+class BenchmarkGame(HeadlessGame):
+    """
+    A headless game whose bots do the same search on every machine: NegamaxBot with a node
+    budget instead of a time budget, MonteCarloBot in this process only, and no opening book
+    """
+
+    def build_player(self, player_id: int, player_type: str) -> Player:
+        match player_type:
+            case 'NB':
+                return NegamaxBot(player_id, 20, time_budget=None, node_budget=NEGAMAX_NODES)
+            case 'MB':
+                return MonteCarloBot(player_id, 2000, workers=1)
+            case _ if player_type.endswith('+book'):
+                raise Exception("Benchmarks don't use opening books")
+        return super().build_player(player_id, player_type)
+
+
+def positions(num_players: int, num_hands: int, num_fingers: int, count: int) -> list[State]:
+    """ The same count positions every run, reached by seeded random play from the start """
+    rng = random.Random(SEED)
+    found: list[State] = []
+    while len(found) < count:
+        state = State(num_players, num_hands, num_fingers)
+        player_id = rng.randint(1, num_players)
+        for _ in range(rng.randint(0, 12)):
+            if Logic.check_if_game_over(state):
+                break
+            Logic.do_move(state, rng.choice(BotUtil.get_legal_moves(state, player_id)), player_id)
+            player_id = Logic.next_player_id(state, player_id)
+        if not Logic.check_if_game_over(state):
+            state.set_current_player(player_id)
+            found.append(state)
+    return found
+
+
+def best_time(function, repeats: int = 3) -> float:
+    """ The fastest of several runs, which is the least disturbed by everything else on the machine """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_legal_moves(states: list[State]) -> dict:
+    def run():
+        for state in states:
+            BotUtil.get_legal_moves(state, state.get_current_player_id())
+    seconds = best_time(run)
+    return {'calls': len(states), 'seconds': seconds, 'microseconds_per_call': seconds / len(states) * 1e6}
+
+
+def bench_scenarios(states: list[State]) -> dict:
+    moves = [(state, move) for state in states
+        for move in BotUtil.get_legal_moves(state, state.get_current_player_id())]
+
+    def run():
+        for state, move in moves:
+            Scenario(state, state.get_current_player_id(), move)
+    seconds = best_time(run)
+    return {'calls': len(moves), 'seconds': seconds, 'microseconds_per_call': seconds / len(moves) * 1e6}
+
+
+def bench_simulate(states: list[State], g: Game, rounds: int) -> dict:
+    """ DefendBot's search without a transposition table, from each position """
+    nodes = profiling.counters.simulate_nodes
+
+    def run():
+        for state in states:
+            bot = DefendBot(state.get_current_player_id(), rounds, 0)
+            BotUtil.simulate(g, state.copy(), bot.id, None, None, bot.id, rounds, 1, bot.exit_test)
+    seconds = best_time(run, 1)
+    nodes = profiling.counters.simulate_nodes - nodes
+    return {'rounds': rounds, 'calls': len(states), 'seconds': seconds, 'nodes': nodes,
+        'milliseconds_per_call': seconds / len(states) * 1000, 'nodes_per_second': nodes / seconds}
+
+
+def bench_theta_bot(states: list[State], g: Game) -> dict:
+    def run():
+        for state in states:
+            ThetaBot(state.get_current_player_id()).get_next_move(g, state)
+    seconds = best_time(run)
+    return {'calls': len(states), 'seconds': seconds, 'milliseconds_per_call': seconds / len(states) * 1000}
+
+
+def bench_tournament(num_players: int, num_hands: int, num_fingers: int, player_type: str, games: int) -> dict:
+    """ The bot against RandomBots, with the same seeds as a Tournament with seed SEED """
+    player_types = [player_type] + ['RB'] * (num_players - 1)
+    seeds = random.Random(SEED)
+    wins = 0
+    stalemates = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        result = BenchmarkGame(num_hands, num_fingers, player_types, seeds.getrandbits(64)).play()
+        wins += result.winning_player_id == 1
+        stalemates += result.winning_player_id is None
+    seconds = time.perf_counter() - start
+    return {'player_type': player_type, 'games': games, 'seconds': seconds, 'games_per_second': games / seconds,
+        'wins': wins, 'stalemates': stalemates}
+
+
+def run(quick: bool = False) -> dict:
+    """ Every benchmark on every configuration; quick uses fewer positions and games """
+    trace.configure(trace.OFF)
+    scale = 0.1 if quick else 1.0
+    results: list[dict] = []
+    for num_players, num_hands, num_fingers in CONFIGURATIONS:
+        configuration = {'players': num_players, 'hands': num_hands, 'fingers': num_fingers}
+        states = positions(num_players, num_hands, num_fingers, max(10, int(500 * scale)))
+        g = Game(num_hands, num_fingers, ['RB'] * num_players, seed=SEED)
+
+        results.append({'benchmark': 'legal_moves', **configuration, **bench_legal_moves(states)})
+        results.append({'benchmark': 'scenario', **configuration, **bench_scenarios(states)})
+        search_states = states[:max(5, int(50 * scale))]
+        for rounds in SIMULATE_ROUNDS:
+            result = bench_simulate(search_states, g, rounds)
+            results.append({'benchmark': 'simulate', **configuration, **result})
+            # the next depth would take several times longer
+            if result['seconds'] > 2 * scale:
+                break
+        results.append({'benchmark': 'theta_bot', **configuration, **bench_theta_bot(search_states, g)})
+
+        for player_type, games in TOURNAMENT_GAMES.items():
+            # the tablebase only covers two players, and is too large to solve beyond the smallest variants
+            if player_type == 'PB' and not (num_players == 2 and num_fingers ** (2 * num_hands) <= 10 ** 6):
+                continue
+            results.append({'benchmark': 'tournament', **configuration,
+                **bench_tournament(num_players, num_hands, num_fingers, player_type, max(1, int(games * scale)))})
+
+    return {'metadata': metadata(quick), 'results': results}
+
+
+def metadata(quick: bool) -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit, 'seed': SEED, 'quick': quick,
+        'negamax_nodes': NEGAMAX_NODES,
+        'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.platform()}
+
+
+def result_key(result: dict) -> tuple:
+    """ What identifies the same measurement in two runs """
+    return (result['benchmark'], result['players'], result['hands'], result['fingers'],
+        result.get('rounds'), result.get('player_type'))
+
+
+def compare(before: dict, after: dict) -> list[str]:
+    """ The speedup of each measurement found in both runs, per call or game so quick runs compare too """
+    def seconds_each(result: dict) -> float:
+        return result['seconds'] / result.get('games', result.get('calls'))
+
+    before_results = {result_key(result): result for result in before['results']}
+    lines: list[str] = []
+    for result in after['results']:
+        key = result_key(result)
+        if key in before_results:
+            label = ' '.join(str(part) for part in key if part is not None)
+            lines.append(f"{label}: {seconds_each(before_results[key]) / seconds_each(result):.2f}x")
+    return lines
+
+
+def main():
+    if sys.argv[1] == 'compare':
+        with open(sys.argv[2]) as before_file, open(sys.argv[3]) as after_file:
+            for line in compare(json.load(before_file), json.load(after_file)):
+                print(line)
+        return
+
+    results = run(quick=len(sys.argv) > 2 and sys.argv[2] == 'quick')
+    with open(sys.argv[1], 'w') as file:
+        json.dump(results, file, indent=2)
+    for result in results['results']:
+        print(result)
+
+
+if __name__ == '__main__':
+    main()
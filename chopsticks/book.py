@@ -0,0 +1,141 @@
+"""
+Description: Opening books: the best move, found by a deep search, for every position within
+the first few plies of a game variant, saved next to the tablebases and consulted before
+searching by the bots built with use_book, such as the '+book' player types.
+
+    python -m chopsticks.book players hands fingers [plies] [rounds]
+"""
+
+from __future__ import annotations
+import os
+import sys
+import time
+import numpy as np
+
+from chopsticks.bot_util import BotUtil
+from chopsticks.logic import Logic
+from chopsticks.move import Move, Hit, Split
+from chopsticks.state import State
+import chopsticks.tablebase as tablebase
+
+# books already opened by this process, or None when a variant has no book, by (num_players, num_hands, num_fingers)
+_open_books: dict[tuple[int, int, int], Book|None] = {}
+
+
+class Book:
+    """
+    The book move of every position it covers, by State.key()
+
+    Keys are exact, so the player to move and the order of every player's hands are part of
+    the position, and any move found is legal in the position being looked up.
+    """
+
+    def __init__(self, num_players: int, num_hands: int, num_fingers: int, moves: dict[int, Move]):
+        self.num_players = num_players
+        self.num_hands = num_hands
+        self.num_fingers = num_fingers
+        self.moves = moves
+
+    def __len__(self):
+        return len(self.moves)
+
+    def move(self, state: State) -> Move|None:
+        return self.moves.get(state.key())
+
+    def save(self, path: str|None = None):
+        path = path if path else book_path(self.num_players, self.num_hands, self.num_fingers)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        keys = np.array(list(self.moves), dtype=np.int64)
+        # each move as its code followed by the fields of its Hit or Split
+        moves = np.array([[ord(move.code), move.opponent_id, move.my_hand, move.opponent_hand, 0]
+            if isinstance(move, Hit) else
+            [ord(move.code), move.left_hand_id, move.right_hand_id, move.new_left_hand_fingers, move.new_right_hand_fingers]
+            for move in self.moves.values()], dtype=np.uint8).reshape(-1, 5)
+        # write then rename, so other processes never read a half-written file
+        temp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temp_path, keys=keys, moves=moves)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def load(num_players: int, num_hands: int, num_fingers: int, path: str|None = None) -> Book:
+        path = path if path else book_path(num_players, num_hands, num_fingers)
+        with np.load(path) as arrays:
+            keys = arrays['keys'].tolist()
+            rows = arrays['moves'].tolist()
+        moves: dict[int, Move] = {}
+        for key, (code, first, second, third, fourth) in zip(keys, rows):
+            moves[key] = Hit(first, second, third) if chr(code) == Hit.code else Split(first, second, third, fourth)
+        return Book(num_players, num_hands, num_fingers, moves)
+
+
+def open_book(num_players: int, num_hands: int, num_fingers: int) -> Book|None:
+    """ The book for a variant, loaded once per process, or None if none has been built """
+    dimensions = (num_players, num_hands, num_fingers)
+    if dimensions not in _open_books:
+        path = book_path(num_players, num_hands, num_fingers)
+        _open_books[dimensions] = Book.load(num_players, num_hands, num_fingers, path) \
+            if os.path.exists(path) else None
+    return _open_books[dimensions]
+
+
+def book_path(num_players: int, num_hands: int, num_fingers: int):
+    return os.path.join(tablebase.DATA_DIR, f"book-{num_players}-{num_hands}-{num_fingers}.npz")
+
+
+def build(num_players: int, num_hands: int, num_fingers: int, plies: int = 6, rounds: int = 12) -> Book:
+    """
+    Searches every position reachable in fewer than plies plies from the start, with any
+    starting player, to rounds rounds, without a time limit so the same book is built every time
+    """
+    # imported here, since the bots consult books themselves
+    from chopsticks.core import HeadlessGame
+    from chopsticks.bots import NegamaxBot
+    g = HeadlessGame(num_hands, num_fingers, ['RB'] * num_players, seed=0)
+    searchers = {player_id: NegamaxBot(player_id, rounds, time_budget=None) for player_id in g.state.player_ids()}
+
+    frontier: list[State] = []
+    seen: set[int] = set()
+    for player_id in g.state.player_ids():
+        state = g.state.copy()
+        # a player who starts with no hands passes the turn on
+        state.set_current_player(player_id if state.is_alive(player_id) else Logic.next_player_id(state, player_id))
+        if state.key() not in seen:
+            seen.add(state.key())
+            frontier.append(state)
+
+    moves: dict[int, Move] = {}
+    for ply in range(plies):
+        next_frontier: list[State] = []
+        for state in frontier:
+            player_id = state.get_current_player_id()
+            moves[state.key()] = searchers[player_id].get_next_move(g, state)
+            if ply + 1 == plies:
+                continue
+            for move in BotUtil.get_legal_moves(state, player_id):
+                child = state.copy()
+                Logic.do_move(child, move, player_id)
+                if Logic.check_if_game_over(child):
+                    continue
+                child.set_current_player(Logic.next_player_id(child, player_id))
+                if child.key() not in seen:
+                    seen.add(child.key())
+                    next_frontier.append(child)
+        frontier = next_frontier
+    return Book(num_players, num_hands, num_fingers, moves)
+
+
+def main():
+    num_players = int(sys.argv[1])
+    num_hands = int(sys.argv[2])
+    num_fingers = int(sys.argv[3])
+    plies = int(sys.argv[4]) if len(sys.argv) > 4 else 6
+    rounds = int(sys.argv[5]) if len(sys.argv) > 5 else 12
+    start = time.perf_counter()
+    book = build(num_players, num_hands, num_fingers, plies, rounds)
+    book.save()
+    print(f"Searched {len(book)} positions to {rounds} rounds in {time.perf_counter() - start:.1f}s, "
+        f"saved to {book_path(num_players, num_hands, num_fingers)}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,181 +1,201 @@
 from __future__ import annotations
 from chopsticks.move import Move, Hit, Split
 
-from typing import TYPE_CHECKING, cast, Callable
+from typing import TYPE_CHECKING, cast, Callable, Hashable
+from collections import OrderedDict
 import random
-from state import Scenario
+from chopsticks.logic import Logic, Undo
+from chopsticks.move_table import MoveTable
+import chopsticks.trace as trace
+import chopsticks.profiling as profiling
 if TYPE_CHECKING:
     from chopsticks.core import Game
     from chopsticks.state import State
-    from chopsticks.player import Player, Hand
 
 
 class BotUtil:
 
     @staticmethod
-    def get_legal_moves(g: Game, state: State, player_id: int) -> list[Move]:
+    def get_legal_moves(state: State, player_id: int) -> list[Move]:
         """ Get all legal moves available right now """
-        legal_moves: list[Move] = cast(list[Move], BotUtil._get_legal_hit_moves(g, state, player_id))
-        legal_moves.extend(BotUtil._get_legal_split_moves(g, state, player_id))
+        table = MoveTable.get(state.num_hands, state.num_fingers)
+        my_hands = tuple(state.hands(player_id))
+        legal_moves: list[Move] = []
+        for opponent_id in state.player_ids():
+            if not opponent_id == player_id:
+                legal_moves.extend(table.hits(opponent_id, my_hands, tuple(state.hands(opponent_id))))
+        legal_moves.extend(table.splits(my_hands))
         return legal_moves
 
     @staticmethod
-    def _get_legal_hit_moves(g: Game, state: State, player_id: int) -> list[Hit]:
+    def _get_legal_hit_moves(state: State, player_id: int) -> list[Hit]:
         """ Generate list of legal hit moves based on game state """
+        table = MoveTable.get(state.num_hands, state.num_fingers)
+        my_hands = tuple(state.hands(player_id))
         legal_hit_moves: list[Hit] = []
-
-        # iterate through other players
-        for opponent_id in range(1, g.num_players + 1):
+        for opponent_id in state.player_ids():
             if not opponent_id == player_id:
-
-                # iterate through any of my hands that are alive
-                my_hand_unique: set[int] = set()
-                for my_hand in range(1, g.num_hands + 1):
-                    if state.player(player_id).hand(my_hand).is_alive():
-                        my_alive_fingers = state.player(player_id).hand(my_hand).alive_fingers
-                        if my_alive_fingers in my_hand_unique:
-                            # skip hand with duplicate number of fingers
-                            continue
-                        else:
-                            my_hand_unique.add(my_alive_fingers)
-
-                        # iterate through opponent hands that are alive
-                        opponent_hand_unique: set[int] = set()
-                        for opponent_hand in range(1, g.num_hands + 1):
-                            if g.player(opponent_id).hand(opponent_hand).is_alive():
-                                opponent_alive_fingers = state.player(opponent_id).hand(opponent_hand).alive_fingers
-                                if opponent_alive_fingers in opponent_hand_unique:
-                                    # skip opponent hand with duplicate number of fingers
-                                    continue
-                                else:
-                                    opponent_hand_unique.add(opponent_alive_fingers)
-
-                                move = Hit(opponent_id, my_hand, opponent_hand)
-                                legal_hit_moves.append(move)
-
+                legal_hit_moves.extend(table.hits(opponent_id, my_hands, tuple(state.hands(opponent_id))))
         return legal_hit_moves
 
     @staticmethod
-    def _get_legal_split_moves(g: Game, state: State, player_id: int) -> list[Split]:
+    def _get_legal_split_moves(state: State, player_id: int) -> list[Split]:
         """ Generate list of legal split moves, based on current game state """
-        player = state.player(player_id)
-        player_alive_fingers = player.get_alive_fingers()
-        legal_split_moves: list[Split] = []
-        # TODO remove hard-coded assumption about two hands, already in logic.py
-        max_hand_fingers = min(player_alive_fingers, g.num_fingers - 1)
-        for left_fingers in range(0, max_hand_fingers + 1):
-
-            # if this move would actually change the game state
-            if not left_fingers == player.hand(1).alive_fingers \
-                    and not left_fingers == player.hand(2).alive_fingers:
+        table = MoveTable.get(state.num_hands, state.num_fingers)
+        return list(table.splits(tuple(state.hands(player_id))))
 
-                right_fingers = player_alive_fingers - left_fingers
-                if not right_fingers > max_hand_fingers:
+    @staticmethod
+    def simulate(g: Game, state: State, current_player_id: int,
+        starting_move: Move|None,
+        prior_move: Move|None, optimizing_player_id: int, additional_rounds: int, current_round: int,
+        exit_test: Callable[[State, Undo, int, int, int, Game], int],
+        transposition_table: BotUtil.TranspositionTable|None = None) -> SimulationResults|None:
+        """
+        Searches the tree of moves below state, which is changed in place while searching
+        but restored to how it started before returning.
+
+        Below the root a node's result depends only on the position, the player to move
+        and the rounds left, so with a transposition table each one is searched once.
+        The table must only be shared by searches with the same exit test and optimizing player.
+        """
+        
+        if not additional_rounds:
+            if trace.level <= trace.TRACE:
+                BotUtil.print_r("no additional rounds on this tree", current_round)
+            return None
 
-                    # eliminate duplicate half of the legal splits
-                    if not left_fingers < right_fingers:
-                        move = Split(1, 2, left_fingers, right_fingers)
-                        legal_split_moves.append(move)
+        if transposition_table is None or not starting_move:
+            return BotUtil._simulate(g, state, current_player_id, starting_move, prior_move, 
+                optimizing_player_id, additional_rounds, current_round, exit_test, transposition_table)
 
-        return legal_split_moves
+        table_key = (state.canonical_key(), current_player_id, additional_rounds)
+        outcome = transposition_table.get(table_key)
+        if outcome is None:
+            results = BotUtil._simulate(g, state, current_player_id, starting_move, prior_move, 
+                optimizing_player_id, additional_rounds, current_round, exit_test, transposition_table)
+            transposition_table.put(table_key, BotUtil.SimulationResults.outcome(results))
+            return results
 
-    @staticmethod
-    def get_opponent(players: list[Player], hit: Hit) -> Player:
-        player: Player
-        for player in players:
-            if player.id == hit.opponent_id:
-                return player
-        raise Exception("Could not find opponent")
+        if trace.level <= trace.TRACE:
+            BotUtil.print_r(f"found outcome {outcome} in transposition table", current_round)
+        if outcome > 0:
+            return BotUtil.SimulationResults().record_success(starting_move)
+        elif outcome < 0:
+            return BotUtil.SimulationResults().record_failure()
+        else:
+            return None
 
     @staticmethod
-    def simulate(g: Game, state: State, current_player_id: int, starting_state: State, 
+    def _simulate(g: Game, state: State, current_player_id: int,
         starting_move: Move|None,
         prior_move: Move|None, optimizing_player_id: int, additional_rounds: int, current_round: int,
-        exit_test: Callable[[Scenario, int, int, State, State, int, Game], int]) -> SimulationResults|None:
-        
-        if not additional_rounds:
-            BotUtil.print_r("no additional rounds on this tree", current_round)
-            return None
+        exit_test: Callable[[State, Undo, int, int, int, Game], int],
+        transposition_table: BotUtil.TranspositionTable|None) -> SimulationResults|None:
 
+        profiling.counters.simulate_nodes += 1
         is_my_turn = current_player_id == optimizing_player_id
-        legal_moves = BotUtil.get_legal_moves(g, state, current_player_id)
+        tracing = trace.level <= trace.TRACE
+        legal_moves = BotUtil.get_legal_moves(state, current_player_id)
         results = BotUtil.SimulationResults()
-        moves_to_recurse: dict[Move, Scenario] = {}
+        moves_to_recurse: list[Move] = []
         for move in legal_moves:
-            scenario = Scenario(g, state, current_player_id, move)
-            BotUtil.print_r(f"consider move {move} leading to scenario {scenario}", current_round)
-            test_result = exit_test(scenario, additional_rounds - 1, current_round, starting_state, 
-                state, optimizing_player_id, g)
+            undo = cast(Undo, Logic.apply(state, move, current_player_id))
+            if tracing:
+                BotUtil.print_r(f"consider move {move} leading to scenario {state}", current_round)
+            test_result = exit_test(state, undo, additional_rounds - 1, current_round, 
+                optimizing_player_id, g)
+            Logic.undo(state, undo)
 
             # for a good test result
             if test_result > 0:
                 if is_my_turn:
-                    BotUtil.print_r("good result for me", current_round)
+                    if tracing:
+                        BotUtil.print_r("good result for me", current_round)
                     return results.record_success(starting_move if starting_move else move)
                 else:
-                    BotUtil.print_r("ignore good result for me on opponent's turn", current_round)
+                    if tracing:
+                        BotUtil.print_r("ignore good result for me on opponent's turn", current_round)
                     continue
 
             # for a bad test result
             elif test_result < 0:
                 if is_my_turn:
-                    BotUtil.print_r("ignore bad result for me on my turn", current_round)
+                    if tracing:
+                        BotUtil.print_r("ignore bad result for me on my turn", current_round)
                     continue
                 else:
-                    BotUtil.print_r("bad result for me on opponent's turn, kill tree", current_round)
+                    if tracing:
+                        BotUtil.print_r("bad result for me on opponent's turn, kill tree", current_round)
                     return results.record_failure()
 
             # for a neutral test result, recurse
             else:
-                BotUtil.print_r(f"found neutral move, so recurse later if needed", current_round)
-                moves_to_recurse[move] = scenario
+                if tracing:
+                    BotUtil.print_r(f"found neutral move, so recurse later if needed", current_round)
+                moves_to_recurse.append(move)
                 results.add_naive_neutral_move(move)
                 continue
 
         # did a breadth-first search at this level and did not return, 
         # so now recurse on the saved neutral moves in random order
-        BotUtil.print_r(f"recurse on stored neutral moves", current_round)
-        shuffled_moves = random.sample(moves_to_recurse.keys(), len(moves_to_recurse))
+        if tracing:
+            BotUtil.print_r(f"recurse on stored neutral moves", current_round)
+        shuffled_moves = BotUtil.get_random(g).sample(moves_to_recurse, len(moves_to_recurse))
         for move in shuffled_moves:
             next_player_id = 1 if current_player_id == g.num_players else current_player_id + 1
-            scenario = moves_to_recurse[move]
-            BotUtil.print_r(f"recurse on move {move} leading to scenario {scenario}", current_round)
-            recursion_results = BotUtil.simulate(g, scenario, next_player_id, starting_state, 
+            undo = cast(Undo, Logic.apply(state, move, current_player_id))
+            if tracing:
+                BotUtil.print_r(f"recurse on move {move} leading to scenario {state}", current_round)
+            recursion_results = BotUtil.simulate(g, state, next_player_id, 
                 starting_move if starting_move else move,
-                move, optimizing_player_id, additional_rounds - 1, current_round + 1, exit_test)
+                move, optimizing_player_id, additional_rounds - 1, current_round + 1, exit_test,
+                transposition_table)
+            Logic.undo(state, undo)
 
             if recursion_results:
                 if recursion_results.success:
-                    BotUtil.print_r(f"returning recursive success {recursion_results.success}", current_round)
+                    if tracing:
+                        BotUtil.print_r(f"returning recursive success {recursion_results.success}", current_round)
                     return recursion_results
                 elif recursion_results.failure:
                     if is_my_turn:
                         continue
                     else:
-                        BotUtil.print_r(f"returning recursive failure", current_round)
+                        if tracing:
+                            BotUtil.print_r(f"returning recursive failure", current_round)
                         return recursion_results
                 else:
-                    BotUtil.print_r(f"recursion returned with only neutral moves, so add neutral move", current_round)
+                    if tracing:
+                        BotUtil.print_r(f"recursion returned with only neutral moves, so add neutral move", current_round)
                     results.add_neutral_move(move)
                     continue
 
             else:
-                BotUtil.print_r(f"returned from recursion with no results, so adding neutral move {move}", current_round)
+                if tracing:
+                    BotUtil.print_r(f"returned from recursion with no results, so adding neutral move {move}", current_round)
                 results.add_neutral_move(move)
                 continue
 
         # considered all recursion moves and still no definitive move
         if is_my_turn:
-            BotUtil.print_r(f"considered all moves, nothing found, returning neutral moves: {results.neutral_moves}", current_round)
+            if tracing:
+                BotUtil.print_r(f"considered all moves, nothing found, returning neutral moves: {results.neutral_moves}", current_round)
             return results
         else:
-            BotUtil.print_r("considered all opponent moves, nothing bad found", current_round)
+            if tracing:
+                BotUtil.print_r("considered all opponent moves, nothing bad found", current_round)
             return None
 
 
+    @staticmethod
+    def get_random(g: Game|None) -> random.Random:
+        """ The game's own random number generator, or the global one when there is no game """
+        return g.random if g else cast(random.Random, random)
+
     @staticmethod
     def print_r(message: str, depth: int):
-        print("..." * depth + " " + message)
+        """ Traces a search message, indented by depth; callers check trace.level first """
+        trace.emit(trace.TRACE, message, depth=depth)
 
     @staticmethod
     def print_t(message: str):
@@ -204,35 +224,68 @@ class BotUtil:
         def add_naive_neutral_move(self, naive_neutral_move: Move):
             self.naive_neutral_moves.append(naive_neutral_move)
 
+        @staticmethod
+        def outcome(results: BotUtil.SimulationResults|None) -> int:
+            """ 1 for success, -1 for failure and 0 for anything else, which callers treat as neutral """
+            if results and results.success:
+                return 1
+            elif results and results.failure:
+                return -1
+            return 0
+
+    class TranspositionTable:
+        """ Bounded cache of search results that evicts the least recently used entry when full """
+
+        def __init__(self, max_size: int = 100000):
+            self.max_size = max_size
+            self.entries: OrderedDict[Hashable, object] = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+
+        def get(self, key: Hashable):
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+        def put(self, key: Hashable, entry: object):
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+        def clear(self):
+            self.entries.clear()
+
+        def __len__(self):
+            return len(self.entries)
+
+        def __repr__(self):
+            return f"TranspositionTable({len(self.entries)}/{self.max_size} entries, " \
+                f"{self.hits} hits, {self.misses} misses)"
+
     @staticmethod
-    def is_vulnerable(current_player_id: int, scenario: Scenario, g: Game):
-        opponents = BotUtil.get_opponents(scenario.players(), current_player_id)
-        for opponent in opponents:
-            if BotUtil.has_vulnerable_hand(g, opponent, scenario.player(current_player_id)):
+    def is_vulnerable(current_player_id: int, scenario: State):
+        for opponent_id in scenario.opponent_ids(current_player_id):
+            if BotUtil.has_vulnerable_hand(scenario, opponent_id, current_player_id):
                 return True
         return False
 
     @staticmethod
-    def get_opponents(players: list[Player], player_id: int) -> list[Player]:
-        opponents: list[Player] = []
-        for player in players:
-            if not player.id == player_id:
-                opponents.append(player)
-        return opponents
-
-    @staticmethod
-    def has_vulnerable_hand(g: Game, player_1: Player, player_2: Player):
-        for player_1_hand in player_1.hands():
-            for player_2_hand in player_2.hands():
-                if player_1_hand.alive_fingers + player_2_hand.alive_fingers == g.num_fingers:
+    def has_vulnerable_hand(state: State, player_1_id: int, player_2_id: int):
+        for player_1_fingers in state.hands(player_1_id):
+            for player_2_fingers in state.hands(player_2_id):
+                if player_1_fingers + player_2_fingers == state.num_fingers:
                     return True
         return False
 
     @staticmethod
-    def is_vulnerable_hand(hand: Hand, current_player_id: int, scenario: Scenario, g: Game):
-        opponents = BotUtil.get_opponents(scenario.players(), current_player_id)
-        for opponent in opponents:
-            for opponent_hand in opponent.hands():
-                if hand.alive_fingers + opponent_hand.alive_fingers == g.num_fingers:
+    def is_vulnerable_hand(fingers: int, current_player_id: int, scenario: State):
+        for opponent_id in scenario.opponent_ids(current_player_id):
+            for opponent_fingers in scenario.hands(opponent_id):
+                if fingers + opponent_fingers == scenario.num_fingers:
                     return True
         return False
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import random
+import time
 from abc import abstractmethod
 
 from chopsticks.player import Player
@@ -8,7 +9,12 @@ from chopsticks.move import Split
 from chopsticks.bot_util import BotUtil
 from chopsticks.state import Scenario
 from chopsticks.move import Hit
+from chopsticks.logic import Logic, Undo
 from chopsticks.rule import *
+from chopsticks.tablebase import open_tablebase, WIN, LOSS
+from chopsticks.book import open_book
+import chopsticks.mcts as mcts
+import chopsticks.trace as trace
 
 from typing import TYPE_CHECKING, cast
 if TYPE_CHECKING:
@@ -17,106 +23,135 @@ if TYPE_CHECKING:
     from chopsticks.move import Move
 
 class Bot(Player):
-    """Class for bot players"""
+    """
+    Class for bot players
+
+    With use_book, the bots that search play the variant's opening book move, when it has
+    one for the position, instead of searching.
+    """
+
+    def __init__(self, id: int, use_book: bool = False):
+        super().__init__(id)
+        self.use_book = use_book
 
     @abstractmethod
     def get_next_move(self, g: Game, state: State) -> Move:
         return cast(Move, None)
 
+    def book_move(self, state: State) -> Move|None:
+        """ The opening book's move in this position, if the variant has a book that covers it """
+        if not self.use_book:
+            return None
+        book = open_book(state.num_players, state.num_hands, state.num_fingers)
+        move = book.move(state) if book else None
+        if move and trace.level <= trace.DEBUG:
+            trace.emit(trace.DEBUG, "... Found book move")
+        return move
+
 class RandomBot(Bot):
     """Bot that makes a random legal move"""
 
     def get_next_move(self, g: Game, state: State) -> Move:
-        legal_moves: list[Move] = BotUtil.get_legal_moves(g, state, self.id)
+        legal_moves: list[Move] = BotUtil.get_legal_moves(state, self.id)
         # print(f"... Legal moves: {legal_moves}")
-        move = random.choice(legal_moves)
+        move = BotUtil.get_random(g).choice(legal_moves)
         return move
 
 class AttackNowBot(Bot):
     """ Bot that always hits if it will erase an opponent's hand right now. """
 
     def get_next_move(self, g: Game, state: State):
-        legal_moves = BotUtil.get_legal_moves(g, state, self.id)
+        legal_moves = BotUtil.get_legal_moves(state, self.id)
         for move in legal_moves:
             # ignore splits
             if isinstance(move, Split):
                 continue
 
             # determine opponent's starting number of alive hands
-            before_opponent = BotUtil.get_opponent(state.players(), cast(Hit, move))
-            before_alive_hands = len(before_opponent.get_alive_hands())
+            opponent_id = cast(Hit, move).opponent_id
+            before_alive_hands = state.count_alive_hands(opponent_id)
 
             # determine opponent's resulting number of alive hands
-            scenario = Scenario(g, state, self.id, move)
-            after_opponent = BotUtil.get_opponent(scenario.players(), cast(Hit, move))
-            after_alive_hands = len(after_opponent.get_alive_hands())
+            scenario = Scenario(state, self.id, move)
+            after_alive_hands = scenario.count_alive_hands(opponent_id)
 
             # see if they lost a hand
             if after_alive_hands < before_alive_hands:
-                print("... Found strategy move")
+                if trace.level <= trace.DEBUG:
+                    trace.emit(trace.DEBUG, "... Found strategy move")
                 return move
         
         # no strategy-matching move found
-        print("... No strategy move found, resorting to random.")
-        return random.choice(legal_moves)
+        if trace.level <= trace.DEBUG:
+            trace.emit(trace.DEBUG, "... No strategy move found, resorting to random.")
+        return BotUtil.get_random(g).choice(legal_moves)
 
 class RecurseBot(Bot):
     """ Abstract class that recurses to get the next move """
 
-    def __init__(self, id: int, num_hands: int, num_fingers: int, rounds: int):
-        super().__init__(id, num_hands, num_fingers)
+    def __init__(self, id: int, rounds: int, transposition_table_size: int = 100000, use_book: bool = False):
+        super().__init__(id, use_book)
         self.rounds = rounds
+        self.transposition_table = BotUtil.TranspositionTable(transposition_table_size)
 
     def get_next_move(self, g: Game, state: State):
-        results = BotUtil.simulate(g=g, state=state, current_player_id=self.id, starting_state=state, 
+        book_move = self.book_move(state)
+        if book_move:
+            return book_move
+
+        # the search makes and unmakes moves on one private copy of the state
+        results = BotUtil.simulate(g=g, state=state.copy(), current_player_id=self.id, 
             starting_move=None, prior_move=None, optimizing_player_id=self.id, additional_rounds=self.rounds, 
-            current_round=1, exit_test=self.exit_test)
+            current_round=1, exit_test=self.exit_test, transposition_table=self.transposition_table)
 
         if results:
             if results.success:
-                print("... Found strategy move")
+                if trace.level <= trace.DEBUG:
+                    trace.emit(trace.DEBUG, "... Found strategy move")
                 return results.success
             elif results.neutral_moves:
-                print("... Only neutral moves found, choosing one of them.")
-                return random.choice(results.neutral_moves)
+                if trace.level <= trace.DEBUG:
+                    trace.emit(trace.DEBUG, "... Only neutral moves found, choosing one of them.")
+                return BotUtil.get_random(g).choice(results.neutral_moves)
             elif results.naive_neutral_moves:
-                print("... Only naive neutral moves found, choosing one of them.")
-                return random.choice(results.naive_neutral_moves)
+                if trace.level <= trace.DEBUG:
+                    trace.emit(trace.DEBUG, "... Only naive neutral moves found, choosing one of them.")
+                return BotUtil.get_random(g).choice(results.naive_neutral_moves)
 
-        print("... No safe moves found, resorting to random.")
-        legal_moves = BotUtil.get_legal_moves(g, state, self.id)
-        return random.choice(legal_moves)
+        if trace.level <= trace.DEBUG:
+            trace.emit(trace.DEBUG, "... No safe moves found, resorting to random.")
+        legal_moves = BotUtil.get_legal_moves(state, self.id)
+        return BotUtil.get_random(g).choice(legal_moves)
 
     @abstractmethod
-    def exit_test(self, scenario: Scenario, additional_rounds: int, current_round: int, 
-        starting_state: State, prior_state: State|None, optimizing_player_id: int, g: Game) -> int:
+    def exit_test(self, scenario: State, undo: Undo, additional_rounds: int, current_round: int, 
+        optimizing_player_id: int, g: Game) -> int:
+        """ Scores the move recorded in undo, which has just been made to reach scenario """
         return cast(int, None)
 
 class AttackBot(RecurseBot):
     """ Bot that always hits if it will erase an opponent's hand within 1 move. """
 
-    def exit_test(self, scenario: Scenario, additional_rounds: int, current_round: int, 
-        starting_state: State, prior_state: State|None, optimizing_player_id: int, g: Game) -> int:
+    def exit_test(self, scenario: State, undo: Undo, additional_rounds: int, current_round: int, 
+        optimizing_player_id: int, g: Game) -> int:
 
-        if not scenario.get_current_player().id == optimizing_player_id:
+        if not undo.player_id == optimizing_player_id:
             return 0
 
-        if isinstance(scenario.move, Split):
+        if isinstance(undo.move, Split):
             return 0
 
-        prior_state = prior_state if prior_state else starting_state 
-
         # determine opponent's starting number of alive hands
-        before_opponent = BotUtil.get_opponent(prior_state.players(), cast(Hit, scenario.move))
-        before_alive_hands = len(before_opponent.get_alive_hands())
+        opponent_id = cast(Hit, undo.move).opponent_id
+        before_alive_hands = undo.prior_alive_hands(scenario, opponent_id)
 
         # determine opponent's resulting number of alive hands
-        after_opponent = BotUtil.get_opponent(scenario.players(), cast(Hit, scenario.move))
-        after_alive_hands = len(after_opponent.get_alive_hands())
+        after_alive_hands = scenario.count_alive_hands(opponent_id)
 
         # see if they lost a hand
         if after_alive_hands < before_alive_hands:
-            BotUtil.print_r("... Found strategy move", current_round)
+            if trace.level <= trace.TRACE:
+                BotUtil.print_r("... Found strategy move", current_round)
             return 1
         else:
             return 0
@@ -124,16 +159,16 @@ class AttackBot(RecurseBot):
 class DefendBot(RecurseBot):
     """ Bot that always skips a move that could let the opponent erase one of it's hands within x moves. """
 
-    def exit_test(self, scenario: Scenario, additional_rounds: int, current_round: int, 
-        starting_state: State, prior_state: State|None, optimizing_player_id: int, g: Game) -> int:
+    def exit_test(self, scenario: State, undo: Undo, additional_rounds: int, current_round: int, 
+        optimizing_player_id: int, g: Game) -> int:
 
-        prior_state = prior_state if prior_state else starting_state 
-        before_alive_hands = prior_state.player(optimizing_player_id).get_alive_hands()
-        after_alive_hands = scenario.player(optimizing_player_id).get_alive_hands()
-        if len(after_alive_hands) < len(before_alive_hands):
-            BotUtil.print_r(f"... rejecting due to hands {scenario.player(optimizing_player_id).hands()}", current_round)
+        before_alive_hands = undo.prior_alive_hands(scenario, optimizing_player_id)
+        after_alive_hands = scenario.count_alive_hands(optimizing_player_id)
+        if after_alive_hands < before_alive_hands:
+            if trace.level <= trace.TRACE:
+                BotUtil.print_r(f"... rejecting due to hands {scenario.hands(optimizing_player_id)}", current_round)
             return -1
-        elif BotUtil.is_vulnerable(optimizing_player_id, scenario, g):
+        elif BotUtil.is_vulnerable(optimizing_player_id, scenario):
             return -1
         else:
             return 0
@@ -141,70 +176,231 @@ class DefendBot(RecurseBot):
 class AttackDefendBot(RecurseBot):
     """ Bot that combines AttackBot and DefendBot strategies. """
 
-    def __init__(self, id: int, num_hands: int, num_fingers: int, rounds: int):
-        super().__init__(id=id, num_hands=num_hands, num_fingers=num_fingers, rounds=rounds)
-        self.attack_bot = AttackBot(id=id, num_hands=num_hands, num_fingers=num_fingers, rounds=rounds)
-        self.defend_bot = DefendBot(id=id, num_hands=num_hands, num_fingers=num_fingers, rounds=rounds)
+    def __init__(self, id: int, rounds: int, transposition_table_size: int = 100000, use_book: bool = False):
+        super().__init__(id=id, rounds=rounds, transposition_table_size=transposition_table_size, use_book=use_book)
+        # only used for their exit tests, so they don't need transposition tables of their own
+        self.attack_bot = AttackBot(id=id, rounds=rounds, transposition_table_size=0)
+        self.defend_bot = DefendBot(id=id, rounds=rounds, transposition_table_size=0)
 
-    def exit_test(self, scenario: Scenario, additional_rounds: int, current_round: int, 
-        starting_state: State, prior_state: State|None, optimizing_player_id: int, g: Game) -> int:
+    def exit_test(self, scenario: State, undo: Undo, additional_rounds: int, current_round: int, 
+        optimizing_player_id: int, g: Game) -> int:
 
         # prioritize defend over attack
-        defend_result = self.defend_bot.exit_test(scenario, additional_rounds, current_round, 
-            starting_state, prior_state, optimizing_player_id, g)
+        defend_result = self.defend_bot.exit_test(scenario, undo, additional_rounds, current_round, 
+            optimizing_player_id, g)
         if defend_result:
             return defend_result
         else:
-            return self.attack_bot.exit_test(scenario, additional_rounds, current_round, 
-            starting_state, prior_state, optimizing_player_id, g)
+            return self.attack_bot.exit_test(scenario, undo, additional_rounds, current_round, 
+            optimizing_player_id, g)
+
+
+class NegamaxBot(AttackDefendBot):
+    """
+    Bot that searches with negamax and alpha-beta pruning, scoring the frontier with the
+    AttackDefendBot exit tests.
+
+    It deepens one round at a time until it reaches its rounds, its time budget (in seconds)
+    or its node budget, and then plays the best move of the deepest search it got through.
+    With more than two players every opponent is assumed to play against this bot.
+    """
+
+    WIN_SCORE = 1000
+    INFINITY = 1000000
+    EXACT, LOWER, UPPER = 0, 1, 2
+
+    class BudgetExceeded(Exception):
+        pass
+
+    def __init__(self, id: int, rounds: int, time_budget: float|None = 0.1, node_budget: int|None = None,
+            transposition_table_size: int = 100000):
+        super().__init__(id=id, rounds=rounds, transposition_table_size=transposition_table_size)
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        self.nodes = 0
+        self.depth_reached = 0
+        self._deadline: float|None = None
+        self._best_move: Move|None = None
+
+    def get_next_move(self, g: Game, state: State):
+        legal_moves = BotUtil.get_legal_moves(state, self.id)
+        moves = BotUtil.get_random(g).sample(legal_moves, len(legal_moves))
+        self._deadline = time.perf_counter() + self.time_budget if self.time_budget else None
+        self.nodes = 0
+        self.depth_reached = 0
+        self._best_move = moves[0]
+        # an interrupted search leaves its copy of the state part way down the tree, so copy every time
+        try:
+            for depth in range(1, self.rounds + 1):
+                best_move = self._search_root(g, state.copy(), moves, depth)
+                self.depth_reached = depth
+                # search the best move first next time, to prune the most
+                moves.remove(best_move)
+                moves.insert(0, best_move)
+        except NegamaxBot.BudgetExceeded:
+            if trace.level <= trace.DEBUG:
+                trace.emit(trace.DEBUG, f"... Out of budget after {self.nodes} nodes, at depth {self.depth_reached + 1}")
+        return self._best_move
+
+    def _search_root(self, g: Game, state: State, moves: list[Move], depth: int) -> Move:
+        alpha = -NegamaxBot.INFINITY
+        best_move = moves[0]
+        for move in moves:
+            undo = cast(Undo, Logic.apply(state, move, self.id))
+            value = self._child_value(g, state, undo, depth - 1, alpha, NegamaxBot.INFINITY)
+            Logic.undo(state, undo)
+            if value > alpha:
+                alpha = value
+                best_move = move
+                # the first move searched at each depth is the previous best, so this is never worse
+                self._best_move = move
+        return best_move
+
+    def _child_value(self, g: Game, state: State, undo: Undo, depth: int, alpha: int, beta: int) -> int:
+        """ Value, for the player who just moved, of the position that the move in undo reached """
+        mover_id = undo.player_id
+        if Logic.check_if_game_over(state):
+            winner_id = Logic.get_winning_player_id(state)
+            score = NegamaxBot.WIN_SCORE + depth
+            return score if winner_id and self._same_side(winner_id, mover_id) else -score
+        if not depth:
+            score = self.exit_test(state, undo, 0, 0, self.id, g)
+            return score if mover_id == self.id else -score
+
+        next_player_id = Logic.next_player_id(state, mover_id)
+        if self._same_side(mover_id, next_player_id):
+            return self._negamax(g, state, next_player_id, depth, alpha, beta)
+        else:
+            return -self._negamax(g, state, next_player_id, depth, -beta, -alpha)
+
+    def _negamax(self, g: Game, state: State, player_id: int, depth: int, alpha: int, beta: int) -> int:
+        """ Value of the position for player_id, who is to move """
+        self.nodes += 1
+        if self.node_budget and self.nodes > self.node_budget:
+            raise NegamaxBot.BudgetExceeded()
+        if self._deadline and not self.nodes % 64 and time.perf_counter() > self._deadline:
+            raise NegamaxBot.BudgetExceeded()
+
+        table_key = (state.canonical_key(), player_id, depth)
+        entry = cast(tuple[int, int]|None, self.transposition_table.get(table_key))
+        if entry:
+            value, bound = entry
+            if bound == NegamaxBot.EXACT or \
+                    (bound == NegamaxBot.LOWER and value >= beta) or \
+                    (bound == NegamaxBot.UPPER and value <= alpha):
+                return value
+
+        original_alpha = alpha
+        best_value = -NegamaxBot.INFINITY
+        for move in BotUtil.get_legal_moves(state, player_id):
+            undo = cast(Undo, Logic.apply(state, move, player_id))
+            value = self._child_value(g, state, undo, depth - 1, alpha, beta)
+            Logic.undo(state, undo)
+            if value > best_value:
+                best_value = value
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    break
+
+        if best_value <= original_alpha:
+            bound = NegamaxBot.UPPER
+        elif best_value >= beta:
+            bound = NegamaxBot.LOWER
+        else:
+            bound = NegamaxBot.EXACT
+        self.transposition_table.put(table_key, (best_value, bound))
+        return best_value
+
+    def _same_side(self, player_1_id: int, player_2_id: int):
+        return (player_1_id == self.id) == (player_2_id == self.id)
+
+
+class MonteCarloBot(Bot):
+    """
+    Bot that runs Monte Carlo tree search with random playouts and plays its most visited move.
+
+    Playouts are divided between worker processes, each growing its own tree.
+    """
+
+    def __init__(self, id: int, playouts: int, workers: int = 1, exploration: float = 1.4,
+            max_playout_rounds: int = 200):
+        super().__init__(id)
+        self.playouts = playouts
+        self.workers = workers
+        self.exploration = exploration
+        self.max_playout_rounds = max_playout_rounds
+
+    def get_next_move(self, g: Game, state: State):
+        legal_moves = BotUtil.get_legal_moves(state, self.id)
+        if len(legal_moves) == 1:
+            return legal_moves[0]
+        visits = mcts.parallel_search(state, self.id, self.playouts, self.workers, self.exploration,
+            self.max_playout_rounds, random.Random(BotUtil.get_random(g).getrandbits(32)))
+        return legal_moves[visits.index(max(visits))]
 
 
 class RulesBot(Bot):
     """ Bot that follows a set of rules. """
 
-    def __init__(self, id: int, num_hands: int, num_fingers: int):
-        super().__init__(id, num_hands, num_fingers)
+    def __init__(self, id: int, use_book: bool = False):
+        super().__init__(id, use_book)
 
         self.next_low_score = -100
         self.next_high_score = 100
         self.rules: list[Rule] = []
 
     def get_next_move(self, g: Game, state: State):
-        legal_moves = BotUtil.get_legal_moves(g, state, self.id)
+        book_move = self.book_move(state)
+        if book_move:
+            return book_move
+
+        legal_moves = BotUtil.get_legal_moves(state, self.id)
         good_moves: dict[Move, int] = {}
         bad_moves: dict[Move, int] = {}
         neutral_moves: list[Move] = []
+        # each move is made and unmade on one copy, leaving state as the prior state for the rules
+        scenario = state.copy()
+        tracing = trace.level <= trace.TRACE
         for move in legal_moves:
-            scenario = Scenario(g, state, self.id, move)
-            print(f"testing move {move} resulting in scenario {scenario}")
+            undo = cast(Undo, Logic.apply(scenario, move, self.id))
+            if tracing:
+                trace.emit(trace.TRACE, f"testing move {move} resulting in scenario {scenario}")
             found_matching_rule = False
             for rule in self.rules:
-                print(f"... on rule {rule}")
+                if tracing:
+                    trace.emit(trace.TRACE, f"... on rule {rule}")
                 score: int = rule.test(g, move, scenario, state, self.id)
                 if score > 0:
                     good_moves[move] = score
                     found_matching_rule = True
-                    BotUtil.print_t(f"Found good score {score} on rule {rule}")
+                    if tracing:
+                        BotUtil.print_t(f"Found good score {score} on rule {rule}")
                     break
                 elif score < 0:
                     bad_moves[move] = score
                     found_matching_rule = True
-                    BotUtil.print_t(f"Found bad score {score} on rule {rule}")
+                    if tracing:
+                        BotUtil.print_t(f"Found bad score {score} on rule {rule}")
                     break
                 else:
                     # rule doesn't match this move
                     pass
+            Logic.undo(scenario, undo)
             if not found_matching_rule:
                 neutral_moves.append(move)
-                print(f"... No match, neutral score")
+                if tracing:
+                    trace.emit(trace.TRACE, f"... No match, neutral score")
         if len(good_moves):
-            print(f"returning good move with highest score from {good_moves}")
+            if trace.level <= trace.DEBUG:
+                trace.emit(trace.DEBUG, f"returning good move with highest score from {good_moves}")
             return self.get_highest_score(good_moves)
         elif len(neutral_moves):
-            print(f"returning neutral move from {neutral_moves}")
-            return random.choice(neutral_moves)
+            if trace.level <= trace.DEBUG:
+                trace.emit(trace.DEBUG, f"returning neutral move from {neutral_moves}")
+            return BotUtil.get_random(g).choice(neutral_moves)
         else:
-            print(f"returning bad move with highest score from {bad_moves}")
+            if trace.level <= trace.DEBUG:
+                trace.emit(trace.DEBUG, f"returning bad move with highest score from {bad_moves}")
             return self.get_highest_score(bad_moves)
 
     def get_highest_score(self, moves: dict[Move, int]) -> Move:
@@ -229,8 +425,8 @@ class RulesBot(Bot):
 
 class ThetaBot(RulesBot):
 
-    def __init__(self, id: int, num_hands: int, num_fingers: int):
-        super().__init__(id, num_hands, num_fingers)
+    def __init__(self, id: int, use_book: bool = False):
+        super().__init__(id, use_book)
 
         self.rules.append(HitIfItEndsTheGame(self.get_next_high_score()))
         self.rules.append(DontLeaveOneHandAndVulnerable(self.get_next_low_score()))
@@ -243,3 +439,40 @@ class ThetaBot(RulesBot):
         self.rules.append(DontSplitAndLeaveOneHandZero(self.get_next_low_score()))
         self.rules.append(HitIfOpponentHasOneFingerAndIHaveMore(self.get_next_high_score()))
         self.rules.append(HitIfItEliminatesAHand(self.get_next_high_score()))
+
+
+class TablebaseBot(Bot):
+    """ Bot that plays a two-player game perfectly by looking up every move's result in the solved tablebase. """
+
+    def __init__(self, id: int, num_hands: int, num_fingers: int):
+        super().__init__(id)
+        # opened, and solved first if need be, before the game rather than during the first move
+        self.tablebase = open_tablebase(2, num_hands, num_fingers)
+
+    def get_next_move(self, g: Game, state: State):
+        tablebase = self.tablebase
+        opponent_id = state.opponent_ids(self.id)[0]
+        scenario = state.copy()
+        scenario.set_current_player(opponent_id)
+
+        # rank each move by the opponent's result: losing soonest is best, winning soonest worst
+        best_moves: list[Move] = []
+        best_rank = None
+        for move in BotUtil.get_legal_moves(state, self.id):
+            undo = cast(Undo, Logic.apply(scenario, move, self.id))
+            outcome = tablebase.outcome(scenario)
+            if outcome == LOSS:
+                rank = -1000 + cast(int, tablebase.distance(scenario))
+            elif outcome == WIN:
+                rank = 1000 - cast(int, tablebase.distance(scenario))
+            else:
+                rank = 0
+            Logic.undo(scenario, undo)
+
+            if best_rank is None or rank < best_rank:
+                best_rank = rank
+                best_moves = [move]
+            elif rank == best_rank:
+                best_moves.append(move)
+
+        return BotUtil.get_random(g).choice(best_moves)
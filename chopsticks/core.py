@@ -7,13 +7,21 @@ Authors: Luca Bianchi
 Description: Core functionality module for the Chopsticks game. Contains the game class
 '''
 from __future__ import annotations
-from chopsticks.bots import RandomBot, AttackNowBot, AttackBot, DefendBot, AttackDefendBot, ThetaBot
+from chopsticks.bots import RandomBot, AttackNowBot, AttackBot, DefendBot, AttackDefendBot, ThetaBot, TablebaseBot, NegamaxBot, MonteCarloBot
 from chopsticks.user_interface import CommandLine
 from chopsticks.state import State
 import chopsticks.logic as logic
+import chopsticks.trace as trace
+import chopsticks.profiling as profiling
+from chopsticks.bot_util import BotUtil
 from chopsticks.player import Human, Player
 from chopsticks.move import Move
+from chopsticks.records import GameRecord, RecordWriter, check_seed
+from chopsticks.sprt import Sprt, wilson_interval
 import random
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from typing import cast
 
 STALEMATE_COUNT = 3
@@ -36,81 +44,119 @@ class Game:
         Number of fingers that each hand has
     player_types: List[str]
         Array of player types.  See build_player().
+    seed: int, optional
+        Seed for the game's random number generator, which picks the starting player
+        and is used by the bots.  Without one, the seed is drawn from the random module.
+    workers: int, optional
+        Most processes a bot may search with, such as MB's parallel playouts.  Without it,
+        one per CPU: games played in worker processes pass 1, so pools are never nested.
+    profiled: bool, optional
+        Whether to record the time and work of every bot decision in self.profile, which
+        costs a little on every move, so it is off by default.
 
     """
-    def __init__(self, num_hands: int, num_fingers: int, player_types: list[str]):
-        if num_hands > 9 or num_fingers > 9:
-            # due to State hashing function
-            raise Exception("num_hands and num_fingers must be single digits")
+    # headless games have no user interface and print nothing, see HeadlessGame
+    headless = False
 
+    def __init__(self, num_hands: int, num_fingers: int, player_types: list[str], seed: int|None = None,
+            workers: int|None = None, profiled: bool = False):
         self.num_players = len(player_types)
         self.num_hands = num_hands
         self.num_fingers = num_fingers
         self.game_is_over = False
         self.logic = logic.Logic()
-        self.ui  = CommandLine()
+        self.ui = None if self.headless else CommandLine()
         self.prior_states: dict[int, int] = {}
         self.rounds_played = 0
         self.last_move = None
+        check_seed(seed)
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.random = random.Random(self.seed)
+        self.player_types = player_types
+        self.workers = workers if workers else (os.cpu_count() or 1)
+        self.profiled = profiled
+        self.profile = profiling.DecisionProfile()
         
-        self.state = State(
-            [self.build_player(index + 1, player_type, num_hands, num_fingers) 
-                for index, player_type in enumerate(player_types)])
+        self.players: list[Player] = [self.build_player(index + 1, player_type) 
+            for index, player_type in enumerate(player_types)]
+        self.state = State(self.num_players, num_hands, num_fingers)
         
         if STARTING_HANDS:
-            for player_index, player in enumerate(self.state.players()):
-                player_starting_hands = STARTING_HANDS[player_index]
-                for hand_index, hand in enumerate(player.hands()):
-                    hand.alive_fingers = player_starting_hands[hand_index]
+            for player_id in self.state.player_ids():
+                player_starting_hands = STARTING_HANDS[player_id - 1]
+                for hand_index, fingers in enumerate(player_starting_hands):
+                    self.state.set_fingers(player_id, hand_index + 1, fingers)
+        self.starting_hands = self.state.all_hands()
+        self.starting_player_id = 0
+        self.moves: list[tuple[int, Move]] = []
         
-        print(f"Players: {self.state.players()}" +
-              "\nHands per Player: ", self.num_hands, "\nFingers per hand: ", self.num_fingers , "\n")
+        if not self.headless and trace.level <= trace.INFO:
+            trace.emit(trace.INFO, f"Players: {self.players}\nHands per Player:  {self.num_hands} " \
+                f"\nFingers per hand:  {self.num_fingers} \n")
 
-    def build_player(self, player_id: int, player_type: str, num_hands: int, num_fingers: int):
+    def build_player(self, player_id: int, player_type: str) -> Player:
+        # AB, DB, ADB and TB with '+book' play the opening book's moves before searching, see chopsticks.book
+        use_book = player_type.endswith('+book')
         match player_type:
             case 'H':
-                return Human(player_id, num_hands, num_fingers)
+                return Human(player_id)
             case 'RB':
-                return RandomBot(player_id, num_hands, num_fingers)
+                return RandomBot(player_id)
             case 'ANB':
-                return AttackNowBot(player_id, num_hands, num_fingers)
-            case 'AB':
-                return AttackBot(player_id, num_hands, num_fingers, 5)
-            case 'DB':
-                return DefendBot(player_id, num_hands, num_fingers, 2)
-            case 'ADB':
-                return AttackDefendBot(player_id, num_hands, num_fingers, 10)
-            case 'TB':
-                return ThetaBot(player_id, num_hands, num_fingers)
+                return AttackNowBot(player_id)
+            case 'AB' | 'AB+book':
+                return AttackBot(player_id, 5, use_book=use_book)
+            case 'DB' | 'DB+book':
+                return DefendBot(player_id, 2, use_book=use_book)
+            case 'ADB' | 'ADB+book':
+                return AttackDefendBot(player_id, 10, use_book=use_book)
+            case 'TB' | 'TB+book':
+                return ThetaBot(player_id, use_book=use_book)
+            case 'PB':
+                if not self.num_players == 2:
+                    raise Exception("PB can only play two-player games, the only ones with a tablebase")
+                return TablebaseBot(player_id, self.num_hands, self.num_fingers)
+            case 'NB':
+                return NegamaxBot(player_id, 20)
+            case 'MB':
+                return MonteCarloBot(player_id, 2000, workers=self.workers)
             case _:
                 raise Exception(f"Unknown player type: {player_type}")
     
     def player(self, player_id: int):
-        return self.state.player(player_id)
+        return self.players[player_id - 1]
 
     def play(self):
         """Game Loop"""
-        i = random.randint(1, self.num_players)
-        print(f"Starting Player is {self.player(i)}")
+        i = self.random.randint(1, self.num_players)
+        self.starting_player_id = i
+        if trace.level <= trace.INFO:
+            trace.emit(trace.INFO, f"Starting Player is {self.player(i)}")
         while self.game_is_over == False:
-            if self.player(i).is_alive():
+            if self.state.is_alive(i):
                 self.state.set_current_player(i)
-                self.ui.display_game_state(self.state)
+                if trace.level <= trace.INFO:
+                    cast(CommandLine, self.ui).display_game_state(self.players, self.state)
                 if self.test_stalemate(self.state):
                     break
                 if isinstance(self.player(i), Human):
                     is_valid_move = False
                     while is_valid_move == False:
                         move: Move = self.player(i).get_next_move(self, self.state)
-                        is_valid_move = self.logic.do_move(self, self.state, move, i)
+                        is_valid_move = self.logic.do_move(self.state, move, i)
                         if is_valid_move == False:
                             print("Not A Valid Move")
                 else:
-                    move = self.player(i).get_next_move(self, self.state)    
-                    print(f"... {self.player(i)} selected move: {move}")
-                    is_valid_move = self.logic.do_move(self, self.state, move, i)
+                    if self.profiled:
+                        move = self.get_profiled_move(i)
+                    else:
+                        move = self.player(i).get_next_move(self, self.state)
+                    if trace.level <= trace.INFO:
+                        trace.emit(trace.INFO, f"... {self.player(i)} selected move: {move}")
+                    is_valid_move = self.logic.do_move(self.state, move, i)
                     if not is_valid_move:
                         raise Exception(f"Bot returned invalid move: {move}")
+                self.moves.append((i, move))
                     
             self.rounds_played += 1
             self.game_is_over = self.logic.check_if_game_over(self.state)
@@ -118,28 +164,30 @@ class Game:
             if(i > self.num_players):
                 i=1
         
-        if self.logic.check_if_game_over(self.state):
-            print(f"Game Over after {self.rounds_played} rounds played.  " \
-                f"The winner is {self.logic.get_winning_player(self.state)}!\n\n")
-        else:
-            print(f"Game Over after {self.rounds_played} rounds played due to stalemate.\n\n")
+        if trace.level <= trace.INFO:
+            if self.logic.check_if_game_over(self.state):
+                trace.emit(trace.INFO, f"Game Over after {self.rounds_played} rounds played.  " \
+                    f"The winner is {self.get_winning_player()}!\n\n")
+            else:
+                trace.emit(trace.INFO, f"Game Over after {self.rounds_played} rounds played due to stalemate.\n\n")
 
     def play_async(self, move: Move|None):
-        i = self.state.get_current_player().id
+        i = self.state.get_current_player_id()
         if not self.game_is_over:
-            if self.player(i).is_alive():
+            if self.state.is_alive(i):
                 self.state.set_current_player(i)
                 if self.test_stalemate(self.state):
                     return "stalemate"
                 if isinstance(self.player(i), Human):
                     move = cast(Move, move)
-                    is_valid_move = self.logic.do_move(self, self.state, move, i)
+                    is_valid_move = self.logic.do_move(self.state, move, i)
                     if is_valid_move == False:
                         return "Not A Valid Move"
                 else:
                     move = self.player(i).get_next_move(self, self.state)    
-                    print(f"... {self.player(i)} selected move: {move}")
-                    is_valid_move = self.logic.do_move(self, self.state, move, i)
+                    if trace.level <= trace.INFO:
+                        trace.emit(trace.INFO, f"... {self.player(i)} selected move: {move}")
+                    is_valid_move = self.logic.do_move(self.state, move, i)
                     if not is_valid_move:
                         raise Exception(f"Bot returned invalid move: {move}")
                     
@@ -153,49 +201,202 @@ class Game:
         
         if self.logic.check_if_game_over(self.state):
             return(f"Game Over after {self.rounds_played} rounds played.  " \
-                f"The winner is {self.logic.get_winning_player(self.state)}!\n\n")
+                f"The winner is {self.get_winning_player()}!\n\n")
         else:
             return(f"Game Over after {self.rounds_played} rounds played due to stalemate.\n\n")
     
 
+    def get_profiled_move(self, player_id: int) -> Move:
+        """ Asks a bot for its move, recording the time and work it took in self.profile """
+        legal_moves = len(BotUtil.get_legal_moves(self.state, player_id))
+        simulate_nodes = profiling.counters.simulate_nodes
+        scenarios = profiling.counters.scenarios
+        start = time.perf_counter()
+        move = self.player(player_id).get_next_move(self, self.state)
+        self.profile.record(profiling.Decision(self.player_types[player_id - 1], time.perf_counter() - start,
+            profiling.counters.simulate_nodes - simulate_nodes, profiling.counters.scenarios - scenarios,
+            legal_moves))
+        return move
+
+    def record(self) -> GameRecord:
+        """ The record of this game, once it has been played """
+        return GameRecord(self.num_hands, self.num_fingers, self.player_types, self.seed, self.starting_hands,
+            self.starting_player_id, self.moves, self.logic.get_winning_player_id(self.state), self.rounds_played)
+
+    def get_winning_player(self) -> Player|None:
+        winning_player_id = self.logic.get_winning_player_id(self.state)
+        return self.player(winning_player_id) if winning_player_id else None
+
     def test_stalemate(self, state: State):
-        if not state.key() in self.prior_states:
-            count = 1
-        else:
-            count = self.prior_states[state.key()] + 1
-        self.prior_states[state.key()] = count
+        # the order of a player's hands doesn't matter when deciding if a position repeats
+        key = state.canonical_key()
+        count = self.prior_states.get(key, 0) + 1
+        self.prior_states[key] = count
         if count == STALEMATE_COUNT:
-            print(f"Found the same state {count} times, declaring a stalemate")
+            if not self.headless and trace.level <= trace.INFO:
+                trace.emit(trace.INFO, f"Found the same state {count} times, declaring a stalemate")
             return True
         if count + 1 == STALEMATE_COUNT:
-            print("Warning, one more time at this state will be a stalemate")
+            if not self.headless and trace.level <= trace.INFO:
+                trace.emit(trace.INFO, "Warning, one more time at this state will be a stalemate")
         return False
 
 
+class GameResult:
+    """ How a game ended: the winner's id, or None for a stalemate, the rounds played and every move """
+
+    __slots__ = ('winning_player_id', 'rounds_played', 'moves')
+
+    def __init__(self, winning_player_id: int|None, rounds_played: int, moves: list[tuple[int, Move]]):
+        self.winning_player_id = winning_player_id
+        self.rounds_played = rounds_played
+        self.moves = moves
+
+
+class HeadlessGame(Game):
+    """
+    A game between bots with no user interface, which prints nothing and builds no messages
+
+    Plays by the same rules, turn order and seeded randomness as Game, so a headless game
+    with the same seed has the same moves and result.
+    """
+
+    headless = True
+
+    def __init__(self, num_hands: int, num_fingers: int, player_types: list[str], seed: int|None = None,
+            workers: int|None = None, profiled: bool = False):
+        if 'H' in player_types:
+            raise Exception("Headless games can only be played by bots")
+        super().__init__(num_hands, num_fingers, player_types, seed, workers, profiled)
+
+    def play(self) -> GameResult:
+        state = self.state
+        logic = self.logic
+        players = self.players
+        profiled = self.profiled
+        i = self.random.randint(1, self.num_players)
+        self.starting_player_id = i
+        while not self.game_is_over:
+            if state.is_alive(i):
+                state.set_current_player(i)
+                if self.test_stalemate(state):
+                    break
+                move = self.get_profiled_move(i) if profiled else players[i - 1].get_next_move(self, state)
+                if not logic.do_move(state, move, i):
+                    raise Exception(f"Bot returned invalid move: {move}")
+                self.moves.append((i, move))
+            self.rounds_played += 1
+            self.game_is_over = logic.check_if_game_over(state)
+            i = i % self.num_players + 1
+        return GameResult(logic.get_winning_player_id(state), self.rounds_played, self.moves)
+
+
 class Tournament:
-    """ A series of games with the same players """
+    """
+    A series of games with the same players
+
+    With more than one worker, the games are played in that many worker processes,
+    without printing each game.  Every game gets its own seed, drawn from seed, so a
+    tournament with a seed gives the same results with any number of workers, as long as
+    its bots don't depend on timing.
+
+    Games between bots are headless unless headless is False, in which case each game is
+    printed as it is played, when played sequentially.
 
-    def __init__(self, num_hands: int, num_fingers: int, num_games: int, player_types: list[str]):
+    With a record_path, every game counted is appended to that game-record log by this process,
+    in game order.
+
+    With an sprt, num_games is only the most games to play: the tournament stops as soon as
+    the test decides whether either of its two players is stronger.
+
+    When profiled, every bot decision is timed and counted, and print_results reports them
+    by player type.
+    """
+
+    def __init__(self, num_hands: int, num_fingers: int, num_games: int, player_types: list[str],
+            workers: int = 1, seed: int|None = None, record_path: str|None = None, sprt: Sprt|None = None,
+            headless: bool = True, profiled: bool = False):
         self.num_hands = num_hands
         self.num_fingers = num_fingers
         self.num_games = num_games
         self.player_types = player_types
+        self.workers = workers
+        check_seed(seed)
+        self.seed = seed
+        self.record_path = record_path
+        self.sprt = sprt
+        self.headless = headless and 'H' not in player_types
+        self.profiled = profiled
+        self.decision: int|None = None
         self.winners: dict[int, int] = {}
         self.stalemates = 0
+        self.games_played = 0
         self.total_rounds_played = 0
+        self.profile = profiling.DecisionProfile()
+        if workers > 1 and 'H' in player_types:
+            raise Exception("Games with human players can't be played in worker processes")
+        if sprt and not len(player_types) == 2:
+            raise Exception("Tournaments can only stop early with two players")
 
     def play(self):
-        print(f"Starting a {self.num_games}-game tournament.")
-        for game_number in range(self.num_games):
-            print(f"Starting Game #{game_number + 1} of {self.num_games}.")
-            g = Game(self.num_hands, self.num_fingers, self.player_types)
-            g.play()
-            self.record_win(g.logic.get_winning_player(g.state))
-            self.total_rounds_played += g.rounds_played
-            print("-----------------------------------------------\n\n")
+        if trace.level <= trace.INFO:
+            trace.emit(trace.INFO, f"Starting a {self.num_games}-game tournament.")
+        game_seeds = self.game_seeds()
+        writer = RecordWriter(self.record_path) if self.record_path else None
+        if self.workers > 1:
+            arguments = [(self.num_hands, self.num_fingers, self.player_types, game_seed, writer is not None,
+                self.profiled) for game_seed in game_seeds]
+            with ProcessPoolExecutor(self.workers, initializer=_silence) as pool:
+                # small chunks when stopping early, so few games are played after the decision
+                chunksize = 1 if self.sprt else max(1, self.num_games // (self.workers * 4))
+                for winning_player_id, rounds_played, profile, record in pool.map(play_game, arguments, 
+                        chunksize=chunksize):
+                    self.record_result(winning_player_id, rounds_played, profile)
+                    # only the games counted are logged, not those finished after an early stop
+                    if writer and record:
+                        writer.write(record)
+                    if self.is_decided():
+                        # results come back in game order, so the same games are counted as when sequential
+                        pool.shutdown(cancel_futures=True)
+                        break
+        else:
+            for game_number, game_seed in enumerate(game_seeds):
+                if self.headless:
+                    g: Game = HeadlessGame(self.num_hands, self.num_fingers, self.player_types, game_seed,
+                        profiled=self.profiled)
+                    result = g.play()
+                    self.record_result(result.winning_player_id, result.rounds_played, g.profile)
+                else:
+                    if trace.level <= trace.INFO:
+                        trace.emit(trace.INFO, f"Starting Game #{game_number + 1} of {self.num_games}.")
+                    g = Game(self.num_hands, self.num_fingers, self.player_types, game_seed, profiled=self.profiled)
+                    g.play()
+                    self.record_win(g.get_winning_player())
+                    self.total_rounds_played += g.rounds_played
+                    self.profile.merge(g.profile)
+                    if trace.level <= trace.INFO:
+                        trace.emit(trace.INFO, "-----------------------------------------------\n\n")
+                if writer:
+                    writer.write(g.record())
+                if self.is_decided():
+                    break
+        if writer:
+            writer.close()
         self.print_results()
 
+    def game_seeds(self) -> list[int]:
+        """ The seed of every game, drawn from the tournament's seed if it has one """
+        seeds = random.Random(self.seed if self.seed is not None else random.getrandbits(64))
+        return [seeds.getrandbits(64) for _ in range(self.num_games)]
+
+    def is_decided(self) -> bool:
+        """ Whether the sequential test, if there is one, has reached a decision """
+        if self.sprt:
+            self.decision = self.sprt.decision(self.winners.get(1, 0), self.stalemates, self.winners.get(2, 0))
+        return self.decision is not None
+
     def record_win(self, player: Player|None):
+        self.games_played += 1
         if player:
             if player.id not in self.winners:
                 self.winners[player.id] = 0
@@ -205,6 +406,18 @@ class Tournament:
         else:
             self.stalemates += 1
 
+    def record_result(self, winning_player_id: int|None, rounds_played: int,
+            profile: profiling.DecisionProfile|None = None):
+        """ Records a game played elsewhere, from its winner's id, length and bot decisions """
+        self.games_played += 1
+        if winning_player_id:
+            self.winners[winning_player_id] = self.winners.get(winning_player_id, 0) + 1
+        else:
+            self.stalemates += 1
+        self.total_rounds_played += rounds_played
+        if profile:
+            self.profile.merge(profile)
+
     def print_results(self):
         def get_key(pair: tuple[int, int]):
             return pair[0]
@@ -212,7 +425,43 @@ class Tournament:
             print(f"Player {player_id} won {wins} games.")
         print(f"{self.stalemates} games ended in stalemate.")
         print("Any other players did not win any games.")
-        print(f"Games lasted for an average of {(self.total_rounds_played / self.num_games):.1f} rounds.")
+        print(f"Games lasted for an average of {(self.total_rounds_played / self.games_played):.1f} rounds.")
+        if self.sprt:
+            for player_id in (1, 2):
+                low, high = wilson_interval(self.winners.get(player_id, 0), self.games_played)
+                print(f"Player {player_id} win rate 95% interval: {low:.1%} to {high:.1%}.")
+            low, high = wilson_interval(self.stalemates, self.games_played)
+            print(f"Stalemate rate 95% interval: {low:.1%} to {high:.1%}.")
+            match self.decision:
+                case None:
+                    print(f"No decision after the maximum of {self.num_games} games.")
+                case 0:
+                    print(f"Neither player is stronger, decided after {self.games_played} games.")
+                case _:
+                    print(f"Player {self.decision} is stronger, decided after {self.games_played} games.")
+        if self.profile.decisions:
+            print("Bot decisions by player type, as p50 / p90 / p99 / max:")
+            for line in self.profile.summary():
+                print(f"  {line}")
+
+
+def play_game(arguments: tuple[int, int, list[str], int, bool, bool]) \
+        -> tuple[int|None, int, profiling.DecisionProfile|None, GameRecord|None]:
+    """
+    Plays one headless game, in a worker process or elsewhere, and returns the winner's id,
+    the rounds played and, if asked for, the profile and the game's record for the caller to log
+    """
+    num_hands, num_fingers, player_types, seed, record, profiled = arguments
+    # one process per bot, since games are played side by side in worker processes
+    g = HeadlessGame(num_hands, num_fingers, player_types, seed, workers=1, profiled=profiled)
+    result = g.play()
+    return result.winning_player_id, result.rounds_played, g.profile if profiled else None, \
+        g.record() if record else None
+
+
+def _silence():
+    """ The games of a parallel tournament are headless, and their bots trace nothing either """
+    trace.configure(trace.OFF, [])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,300 @@
+"""
+Description: Tournaments and leagues played by worker processes on any number of hosts, which
+take batches of games from a coordinator over a socket.
+
+    python -m chopsticks.distributed tournament [host:]port batch_size hands fingers games player_types...
+    python -m chopsticks.distributed league [host:]port batch_size hands fingers games_per_pairing checkpoint.json [player types...]
+    python -m chopsticks.distributed worker host port
+
+The coordinator listens on localhost unless given a host, such as 0.0.0.0 for every interface.
+
+Workers ask for a batch, play its games and send back the results along with their next
+request. A batch is leased to one worker at a time: when the worker disconnects or its lease
+runs out, the batch goes back in the queue for another worker. Only the first result for each
+batch is counted, and results are handed on in batch order, so a run gives the same results
+however many workers play it and however often batches are retried. A batch that raises an
+exception is not retried: the worker sends back the traceback, and the run raises it.
+
+Messages are pickled, so unpickling one can run any code: workers and coordinator only talk
+after proving they share the secret in the CHOPSTICKS_AUTHKEY environment variable, which
+must be set, and the coordinator's port should still not be reachable from untrusted hosts.
+"""
+
+from __future__ import annotations
+import os
+import sys
+import time
+import threading
+import traceback
+from collections import deque
+from multiprocessing.connection import Listener, Client, Connection
+from multiprocessing import AuthenticationError
+from typing import Any, Callable, Iterator, cast
+
+from chopsticks.core import Tournament, play_game
+from chopsticks.league import League
+from chopsticks.records import RecordWriter
+import chopsticks.trace as trace
+
+
+def environment_authkey() -> bytes:
+    """ The shared secret from CHOPSTICKS_AUTHKEY, which has no default """
+    authkey = os.environ.get('CHOPSTICKS_AUTHKEY')
+    if not authkey:
+        raise Exception("Set CHOPSTICKS_AUTHKEY to a secret shared by the coordinator and its workers")
+    return authkey.encode()
+
+
+class Coordinator:
+    """
+    Serves batches of work to workers and collects their results
+
+    Listens from construction until close(), so workers can connect before and between runs.
+    """
+
+    def __init__(self, address: tuple[str, int] = ('localhost', 0), authkey: bytes|None = None,
+            lease_seconds: float = 300.0):
+        self.listener = Listener(address, authkey=authkey if authkey else environment_authkey())
+        self.address: tuple[str, int] = self.listener.address
+        self.lease_seconds = lease_seconds
+        self.condition = threading.Condition()
+        self.closed = False
+        # each run has a new generation, so late results from an earlier run are ignored
+        self.generation = 0
+        self.function: Callable|None = None
+        self.batches: list[list] = []
+        self.pending: deque[int] = deque()
+        # batch index -> (lease deadline, connection holding the lease)
+        self.leases: dict[int, tuple[float, Connection]] = {}
+        self.completed: dict[int, list] = {}
+        # batch index -> traceback, for batches that raised an exception on a worker
+        self.failures: dict[int, str] = {}
+        self.done: set[int] = set()
+        self.retries = 0
+        self.duplicates = 0
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        while True:
+            try:
+                connection = self.listener.accept()
+            except AuthenticationError:
+                continue
+            except OSError:
+                # the listener was closed
+                return
+            threading.Thread(target=self.serve, args=(connection,), daemon=True).start()
+
+    def serve(self, connection: Connection):
+        """ Answers one worker's requests until it disconnects or the coordinator closes """
+        try:
+            while True:
+                message = connection.recv()
+                if message[0] == 'result':
+                    _, (generation, index), results = message
+                    self.complete(generation, index, results)
+                elif message[0] == 'error':
+                    _, (generation, index), error = message
+                    self.fail(generation, index, error)
+                batch = self.lease(connection)
+                if batch is None:
+                    connection.send(('done',))
+                    return
+                connection.send(('batch', *batch))
+        except (EOFError, OSError):
+            self.release(connection)
+        finally:
+            connection.close()
+
+    def complete(self, generation: int, index: int, results: list):
+        with self.condition:
+            if not generation == self.generation or index in self.done:
+                self.duplicates += 1
+                return
+            self.done.add(index)
+            self.completed[index] = results
+            self.leases.pop(index, None)
+            self.condition.notify_all()
+
+    def fail(self, generation: int, index: int, error: str):
+        with self.condition:
+            if not generation == self.generation or index in self.done:
+                return
+            self.done.add(index)
+            self.failures[index] = error
+            self.leases.pop(index, None)
+            self.condition.notify_all()
+
+    def lease(self, connection: Connection) -> tuple[tuple[int, int], Callable, list]|None:
+        """ The next batch for a worker, waiting until there is one, or None once closed """
+        with self.condition:
+            while True:
+                while self.pending and self.pending[0] in self.done:
+                    self.pending.popleft()
+                if self.closed:
+                    return None
+                if self.pending:
+                    index = self.pending.popleft()
+                    self.leases[index] = (time.monotonic() + self.lease_seconds, connection)
+                    return (self.generation, index), cast(Callable, self.function), self.batches[index]
+                self.condition.wait()
+
+    def release(self, connection: Connection):
+        """ Puts back the batches leased to a worker that has gone """
+        with self.condition:
+            for index, (_, holder) in list(self.leases.items()):
+                if holder is connection:
+                    self.requeue(index)
+
+    def requeue(self, index: int):
+        del self.leases[index]
+        if index not in self.done:
+            self.retries += 1
+            self.pending.appendleft(index)
+            self.condition.notify_all()
+
+    def results(self, function: Callable, batches: list[list]) -> Iterator[list]:
+        """
+        Starts serving the batches, and returns the results of function applied to every item
+        of each batch, a batch at a time in batch order, stopping the run early if the caller
+        stops asking, or with an exception if function raised one on a worker
+        """
+        with self.condition:
+            self.generation += 1
+            self.function = function
+            self.batches = batches
+            self.pending = deque(range(len(batches)))
+            self.leases = {}
+            self.completed = {}
+            self.failures = {}
+            self.done = set()
+            self.condition.notify_all()
+        return self.collect(len(batches))
+
+    def collect(self, num_batches: int) -> Iterator[list]:
+        try:
+            for index in range(num_batches):
+                with self.condition:
+                    while index not in self.completed:
+                        if self.failures:
+                            failed_index, error = min(self.failures.items())
+                            raise Exception(f"Batch {failed_index} failed on a worker:\n{error}")
+                        now = time.monotonic()
+                        for leased_index, (deadline, _) in list(self.leases.items()):
+                            if deadline < now:
+                                self.requeue(leased_index)
+                        self.condition.wait(min(1.0, self.lease_seconds))
+                    results = self.completed.pop(index)
+                yield results
+        finally:
+            with self.condition:
+                self.generation += 1
+                self.batches = []
+                self.pending.clear()
+                self.leases = {}
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.listener.close()
+
+    def __enter__(self) -> Coordinator:
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+def work(address: tuple[str, int], authkey: bytes|None = None) -> int:
+    """ Plays batches from the coordinator at address until it closes, returning how many were played """
+    authkey = authkey if authkey else environment_authkey()
+    # workers play silently
+    trace.configure(trace.OFF, [])
+    batches = 0
+    with Client(address, authkey=authkey) as connection:
+        connection.send(('ready',))
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                return batches
+            if message[0] == 'done':
+                return batches
+            _, batch_id, function, arguments = message
+            try:
+                results = [function(item) for item in arguments]
+            except Exception:
+                # the same batch would fail on every worker, so the coordinator is told rather than retrying it
+                connection.send(('error', batch_id, traceback.format_exc()))
+                continue
+            connection.send(('result', batch_id, results))
+            batches += 1
+
+
+def batched(items: list[Any], batch_size: int) -> list[list[Any]]:
+    return [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+
+
+def play_tournament(tournament: Tournament, coordinator: Coordinator, batch_size: int = 100):
+    """ Plays a tournament's games on the coordinator's workers, with its records written here """
+    record = bool(tournament.record_path)
+    arguments = [(tournament.num_hands, tournament.num_fingers, tournament.player_types, game_seed, record,
+        tournament.profiled) for game_seed in tournament.game_seeds()]
+    writer = RecordWriter(tournament.record_path) if tournament.record_path else None
+    try:
+        for results in coordinator.results(play_game, batched(arguments, batch_size)):
+            for winning_player_id, rounds_played, profile, game_record in results:
+                tournament.record_result(winning_player_id, rounds_played, profile)
+                if writer and game_record:
+                    writer.write(game_record)
+                if tournament.is_decided():
+                    break
+            if tournament.decision is not None:
+                break
+    finally:
+        if writer:
+            writer.close()
+    tournament.print_results()
+
+
+def play_league(league: League, coordinator: Coordinator, batch_size: int = 100):
+    """ Plays a league's remaining games on the coordinator's workers, checkpointing here """
+    remaining = league.schedule()[league.games_played:]
+    arguments = [(league.num_hands, league.num_fingers, list(pairing), game_seed, False, False)
+        for pairing, game_seed in remaining]
+    pairings = batched([pairing for pairing, _ in remaining], batch_size)
+    try:
+        for batch_pairings, results in zip(pairings, coordinator.results(play_game, batched(arguments, batch_size))):
+            for pairing, (winning_player_id, rounds_played, _, _) in zip(batch_pairings, results):
+                league.record_result(pairing, winning_player_id, rounds_played)
+    finally:
+        league.save()
+    league.print_results()
+
+
+def parse_address(text: str) -> tuple[str, int]:
+    """ (host, port) from host:port, or from a port alone on localhost """
+    host, _, port = text.rpartition(':')
+    return host if host else 'localhost', int(port)
+
+
+def main():
+    match sys.argv[1]:
+        case 'worker':
+            work((sys.argv[2], int(sys.argv[3])))
+        case 'tournament':
+            tournament = Tournament(int(sys.argv[4]), int(sys.argv[5]), int(sys.argv[6]), sys.argv[7:])
+            with Coordinator(parse_address(sys.argv[2])) as coordinator:
+                play_tournament(tournament, coordinator, int(sys.argv[3]))
+        case 'league':
+            league = League(int(sys.argv[4]), int(sys.argv[5]), int(sys.argv[6]), sys.argv[8:] or None,
+                checkpoint_path=sys.argv[7])
+            with Coordinator(parse_address(sys.argv[2])) as coordinator:
+                play_league(league, coordinator, int(sys.argv[3]))
+        case command:
+            raise Exception(f"Unknown command {command}")
+
+
+if __name__ == '__main__':
+    main()
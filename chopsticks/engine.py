@@ -0,0 +1,156 @@
+"""
+Description: A long-running engine that answers move requests on stdin with a line-based
+protocol in the style of UCI, keeping its bots, their transposition tables and any
+tablebase it has opened warm from one request to the next.
+
+    python -m chopsticks.engine
+
+Commands, one per line:
+
+    isready                         answers readyok
+    newgame [fingers]               starts a new game, of the variant with that many fingers, 5 by default
+    setoption bot <player type>     the bot that chooses moves, NB by default, see Game.build_player
+    position <hands> <player>       the position to move from, for example 1,1/2,3 1: player 1 has
+                                    hands of 1 and 1, player 2 of 2 and 3, and player 1 is to move
+    go [movetime ms] [depth rounds] [nodes count]
+                                    answers bestmove h 2 1 1 or bestmove s 1 2 0 3, in the same
+                                    fields as a Hit or Split, or bestmove none once the game is over
+    quit
+
+Search limits only apply to NB, which searches for 100ms by default. Malformed commands
+are answered with an info string and otherwise ignored.
+"""
+
+from __future__ import annotations
+import sys
+import time
+from typing import IO, Iterable
+
+from chopsticks.bots import NegamaxBot
+from chopsticks.core import HeadlessGame
+from chopsticks.logic import Logic
+from chopsticks.move import Move, Hit, Split
+from chopsticks.state import State
+
+DEFAULT_FINGERS = 5
+DEFAULT_BOT = 'NB'
+DEFAULT_MOVETIME = 100
+
+
+class Engine:
+    """ Answers protocol commands, one line at a time """
+
+    def __init__(self, output: IO[str] = sys.stdout):
+        self.output = output
+        self.num_fingers = DEFAULT_FINGERS
+        self.bot_type = DEFAULT_BOT
+        self.state: State|None = None
+        # one game, holding a bot for every seat, for each bot type and variant seen so far
+        self.games: dict[tuple[str, int, int, int], HeadlessGame] = {}
+
+    def send(self, line: str):
+        self.output.write(line + "\n")
+        self.output.flush()
+
+    def run(self, lines: Iterable[str]):
+        for line in lines:
+            if not self.handle(line):
+                return
+
+    def handle(self, line: str) -> bool:
+        """ Carries out one command, returning False once told to quit """
+        words = line.split()
+        if not words:
+            return True
+        command, arguments = words[0], words[1:]
+        try:
+            match command:
+                case 'quit':
+                    return False
+                case 'isready':
+                    self.send('readyok')
+                case 'newgame':
+                    self.num_fingers = int(arguments[0]) if arguments else DEFAULT_FINGERS
+                    self.state = None
+                case 'setoption':
+                    self.set_option(arguments)
+                case 'position':
+                    self.state = self.parse_position(arguments)
+                case 'go':
+                    self.go(arguments)
+                case _:
+                    raise Exception(f"unknown command {command}")
+        except Exception as exception:
+            self.send(f"info string error {exception}")
+        return True
+
+    def set_option(self, arguments: list[str]):
+        if not len(arguments) == 2 or not arguments[0] == 'bot':
+            raise Exception("expected setoption bot <player type>")
+        if arguments[1] == 'H':
+            raise Exception("the engine only plays bots")
+        self.bot_type = arguments[1]
+
+    def parse_position(self, arguments: list[str]) -> State:
+        if not len(arguments) == 2:
+            raise Exception("expected position <hands> <player>")
+        hands = [[int(fingers) for fingers in player_hands.split(',')] for player_hands in arguments[0].split('/')]
+        num_players = len(hands)
+        num_hands = len(hands[0])
+        player_id = int(arguments[1])
+        if num_players < 2 or any(not len(player_hands) == num_hands for player_hands in hands):
+            raise Exception("every player needs the same number of hands")
+        if any(not 0 <= fingers < self.num_fingers for player_hands in hands for fingers in player_hands):
+            raise Exception(f"hands have from 0 to {self.num_fingers - 1} fingers")
+        if not 1 <= player_id <= num_players:
+            raise Exception(f"no player {player_id}")
+        return State(num_players, num_hands, self.num_fingers,
+            [fingers for player_hands in hands for fingers in player_hands], player_id)
+
+    def game(self, state: State) -> HeadlessGame:
+        """ The game whose bots play in positions like state, built the first time it is needed """
+        key = (self.bot_type, state.num_players, state.num_hands, state.num_fingers)
+        if key not in self.games:
+            self.games[key] = HeadlessGame(state.num_hands, state.num_fingers, [self.bot_type] * state.num_players)
+        return self.games[key]
+
+    def go(self, arguments: list[str]):
+        if not self.state:
+            raise Exception("no position")
+        limits = {name: int(value) for name, value in zip(arguments[::2], arguments[1::2])}
+        state = self.state
+        player_id = state.get_current_player_id()
+        if Logic.check_if_game_over(state) or not state.is_alive(player_id):
+            self.send('bestmove none')
+            return
+
+        g = self.game(state)
+        bot = g.player(player_id)
+        if isinstance(bot, NegamaxBot):
+            bot.time_budget = limits.get('movetime', DEFAULT_MOVETIME) / 1000
+            bot.rounds = limits.get('depth', 20)
+            bot.node_budget = limits.get('nodes')
+        start = time.perf_counter()
+        move = bot.get_next_move(g, state.copy())
+        milliseconds = int((time.perf_counter() - start) * 1000)
+        if isinstance(bot, NegamaxBot):
+            self.send(f"info depth {bot.depth_reached} nodes {bot.nodes} time {milliseconds}")
+        else:
+            self.send(f"info time {milliseconds}")
+        self.send(f"bestmove {format_move(move)}")
+
+
+def format_move(move: Move) -> str:
+    if isinstance(move, Hit):
+        return f"h {move.opponent_id} {move.my_hand} {move.opponent_hand}"
+    if isinstance(move, Split):
+        return f"s {move.left_hand_id} {move.right_hand_id} {move.new_left_hand_fingers} {move.new_right_hand_fingers}"
+    raise Exception(f"can't format move {move}")
+
+
+def main():
+    Engine().run(sys.stdin)
+
+
+if __name__ == '__main__':
+    main()
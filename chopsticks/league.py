@@ -0,0 +1,194 @@
+"""
+Description: Round-robin leagues between bot types, rated with Elo as results come in and
+checkpointed to disk, so an interrupted league resumes without replaying finished games.
+
+    python -m chopsticks.league hands fingers games_per_pairing checkpoint.json [workers] [player types...]
+"""
+
+from __future__ import annotations
+import os
+import sys
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from chopsticks.core import play_game
+import chopsticks.trace as trace
+
+PLAYER_TYPES = ['RB', 'ANB', 'AB', 'DB', 'ADB', 'TB']
+
+STARTING_RATING = 1500.0
+
+CHECKPOINT_VERSION = 1
+
+
+class League:
+    """
+    Every player type plays every other, in both seats, games_per_pairing times
+
+    Games are scheduled one round of pairings at a time, so every rating moves evenly
+    through the league. Each game has its own seed, drawn from the league's seed, and
+    results are rated in schedule order, so a league gives the same results and ratings
+    whether it is played sequentially, by workers or over several resumed runs.
+    """
+
+    def __init__(self, num_hands: int, num_fingers: int, games_per_pairing: int,
+            player_types: list[str]|None = None, workers: int = 1, seed: int|None = None,
+            checkpoint_path: str|None = None, checkpoint_every: int = 100, k_factor: float = 16.0):
+        self.num_hands = num_hands
+        self.num_fingers = num_fingers
+        self.games_per_pairing = games_per_pairing
+        self.player_types = player_types if player_types else list(PLAYER_TYPES)
+        if len(set(self.player_types)) < 2 or 'H' in self.player_types:
+            raise Exception("A league needs at least two different bot types")
+        self.workers = workers
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.k_factor = k_factor
+        # (first seat, second seat) for every ordered pair of different player types
+        self.pairings = [(first, second) for first in self.player_types for second in self.player_types
+            if not first == second]
+        self.games_played = 0
+        self.ratings = {player_type: STARTING_RATING for player_type in self.player_types}
+        # [first seat wins, second seat wins, stalemates, rounds played] for each pairing
+        self.results = {pairing: [0, 0, 0, 0] for pairing in self.pairings}
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            self.load(checkpoint_path, keep_seed=seed is None)
+
+    @property
+    def num_games(self) -> int:
+        return len(self.pairings) * self.games_per_pairing
+
+    def schedule(self) -> list[tuple[tuple[str, str], int]]:
+        """ The pairing and seed of every game in the league, in the order they are rated """
+        seeds = random.Random(self.seed)
+        return [(pairing, seeds.getrandbits(64)) for _ in range(self.games_per_pairing) for pairing in self.pairings]
+
+    def play(self, max_games: int|None = None):
+        """ Plays the games not played yet, or at most max_games of them """
+        remaining = self.schedule()[self.games_played:]
+        if max_games is not None:
+            remaining = remaining[:max_games]
+        arguments = [(self.num_hands, self.num_fingers, list(pairing), game_seed, False, False)
+            for pairing, game_seed in remaining]
+        if trace.level <= trace.INFO:
+            trace.emit(trace.INFO, f"Playing {len(remaining)} of the league's {self.num_games} games.")
+        try:
+            if self.workers > 1:
+                pool = ProcessPoolExecutor(self.workers, initializer=_silence)
+                try:
+                    chunksize = max(1, min(self.checkpoint_every, len(arguments) // (self.workers * 4)))
+                    for (pairing, _), (winning_player_id, rounds_played, _, _) in zip(remaining,
+                            pool.map(play_game, arguments, chunksize=chunksize)):
+                        self.record_result(pairing, winning_player_id, rounds_played)
+                finally:
+                    pool.shutdown(cancel_futures=True)
+            else:
+                for (pairing, _), game_arguments in zip(remaining, arguments):
+                    winning_player_id, rounds_played, _, _ = play_game(game_arguments)
+                    self.record_result(pairing, winning_player_id, rounds_played)
+        finally:
+            # also when interrupted, keeping every game finished so far
+            self.save()
+
+    def record_result(self, pairing: tuple[str, str], winning_player_id: int|None, rounds_played: int):
+        first, second = pairing
+        results = self.results[pairing]
+        score = 0.5
+        if winning_player_id == 1:
+            results[0] += 1
+            score = 1.0
+        elif winning_player_id == 2:
+            results[1] += 1
+            score = 0.0
+        else:
+            results[2] += 1
+        results[3] += rounds_played
+
+        expected = 1 / (1 + 10 ** ((self.ratings[second] - self.ratings[first]) / 400))
+        change = self.k_factor * (score - expected)
+        self.ratings[first] += change
+        self.ratings[second] -= change
+
+        self.games_played += 1
+        if self.checkpoint_path and self.games_played % self.checkpoint_every == 0:
+            self.save()
+
+    def configuration(self) -> dict:
+        return {'version': CHECKPOINT_VERSION, 'num_hands': self.num_hands, 'num_fingers': self.num_fingers,
+            'games_per_pairing': self.games_per_pairing, 'player_types': self.player_types,
+            'seed': self.seed, 'k_factor': self.k_factor}
+
+    def save(self):
+        """ Replaces the checkpoint in one step, so an interruption never leaves half a checkpoint """
+        if not self.checkpoint_path:
+            return
+        checkpoint = {**self.configuration(), 'games_played': self.games_played, 'ratings': self.ratings,
+            'results': [[first, second, *results] for (first, second), results in self.results.items()]}
+        temporary_path = self.checkpoint_path + '.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump(checkpoint, file, indent=1)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def load(self, path: str, keep_seed: bool = False):
+        """ Carries on from a checkpoint of this league, and with keep_seed from the seed it started with """
+        with open(path) as file:
+            checkpoint = json.load(file)
+        if keep_seed:
+            self.seed = checkpoint['seed']
+        configuration = {key: checkpoint.get(key) for key in self.configuration()}
+        if not configuration == self.configuration():
+            raise Exception(f"Checkpoint {path} is for a different league: {configuration}")
+        self.games_played = checkpoint['games_played']
+        self.ratings = checkpoint['ratings']
+        for first, second, *results in checkpoint['results']:
+            self.results[(first, second)] = results
+
+    def standings(self) -> list[str]:
+        lines = [f"{self.games_played} of {self.num_games} games played."]
+        for rank, player_type in enumerate(sorted(self.player_types, key=lambda t: -self.ratings[t])):
+            wins = sum(results[0] for (first, _), results in self.results.items() if first == player_type) \
+                + sum(results[1] for (_, second), results in self.results.items() if second == player_type)
+            losses = sum(results[1] for (first, _), results in self.results.items() if first == player_type) \
+                + sum(results[0] for (_, second), results in self.results.items() if second == player_type)
+            stalemates = sum(results[2] for pairing, results in self.results.items() if player_type in pairing)
+            lines.append(f"{rank + 1}. {player_type}: {self.ratings[player_type]:.0f} "
+                f"({wins} wins, {losses} losses, {stalemates} stalemates)")
+        lines.append("First seat wins / second seat wins / stalemates, average rounds:")
+        for (first, second), (first_wins, second_wins, stalemates, rounds) in self.results.items():
+            games = first_wins + second_wins + stalemates
+            if games:
+                lines.append(f"  {first} v {second}: {first_wins} / {second_wins} / {stalemates}, "
+                    f"{rounds / games:.1f}")
+        return lines
+
+    def print_results(self):
+        for line in self.standings():
+            print(line)
+
+
+def _silence():
+    """ League games are played silently in worker processes """
+    trace.configure(trace.OFF, [])
+
+
+def main():
+    num_hands = int(sys.argv[1])
+    num_fingers = int(sys.argv[2])
+    games_per_pairing = int(sys.argv[3])
+    checkpoint_path = sys.argv[4]
+    workers = int(sys.argv[5]) if len(sys.argv) > 5 else (os.cpu_count() or 1)
+    player_types = sys.argv[6:] or None
+    league = League(num_hands, num_fingers, games_per_pairing, player_types, workers=workers,
+        checkpoint_path=checkpoint_path)
+    try:
+        league.play()
+    finally:
+        league.print_results()
+
+
+if __name__ == '__main__':
+    main()
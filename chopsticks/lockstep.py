@@ -0,0 +1,135 @@
+"""
+Description: Tournaments between cheap bots, played as many games at once on NumPy arrays
+without any per-game output.
+
+    python -m chopsticks.lockstep hands fingers games player_types...
+"""
+
+from __future__ import annotations
+import sys
+import numpy as np
+
+from chopsticks.batch import Batch
+from chopsticks.core import Tournament, STALEMATE_COUNT
+from chopsticks.state import State
+import chopsticks.core as core
+import chopsticks.trace as trace
+
+
+class LockstepTournament(Tournament):
+    """
+    Tournament that advances every game in a batch by one move per step
+
+    Each step checks all the games for stalemate, picks every player's move from the
+    batched successors and removes the finished games, following the same turn order,
+    stalemate and round counting rules as Game.play. Only bots whose policy can be
+    computed on arrays can take part, see POLICIES.
+    """
+
+    POLICIES = ('RB', 'ANB')
+
+    def __init__(self, num_hands: int, num_fingers: int, num_games: int, player_types: list[str],
+            batch_size: int = 10000, seed: int|None = None):
+        super().__init__(num_hands, num_fingers, num_games, player_types, seed=seed)
+        for player_type in player_types:
+            if player_type not in LockstepTournament.POLICIES:
+                raise Exception(f"Player type {player_type} cannot be played in lockstep")
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.batch = Batch.get(len(player_types), num_hands, num_fingers)
+
+    def play(self):
+        if trace.level <= trace.INFO:
+            trace.emit(trace.INFO, f"Starting a {self.num_games}-game lockstep tournament.")
+        for first_game in range(0, self.num_games, self.batch_size):
+            self.play_games(min(self.batch_size, self.num_games - first_game))
+        self.print_results()
+
+    def play_games(self, num_games: int):
+        """ Plays num_games games side by side and records their results """
+        batch = self.batch
+        num_players = batch.num_players
+
+        start = State(num_players, self.num_hands, self.num_fingers)
+        if core.STARTING_HANDS:
+            for player_id in start.player_ids():
+                for hand_index, fingers in enumerate(core.STARTING_HANDS[player_id - 1]):
+                    start.set_fingers(player_id, hand_index + 1, fingers)
+        fingers = np.broadcast_to(np.array(start.all_hands(), dtype=np.int64),
+            (num_games, num_players * self.num_hands))
+
+        # a random starting player, who passes the turn on if they start with no hands
+        starting_player_ids = self.rng.integers(1, num_players + 1, num_games)
+        player_ids = batch.next_player_ids(fingers, (starting_player_ids - 2) % num_players + 1)
+        rounds = (player_ids - starting_player_ids) % num_players
+        keys = fingers @ batch.place_values + (player_ids - 1) * batch.player_place_value
+
+        winner_ids = np.zeros(num_games, dtype=np.int64)
+        history = np.full((num_games, 64), -1, dtype=np.int64)
+        active = np.flatnonzero(~batch.is_game_over(keys))
+        step = 0
+        while len(active):
+            if step == history.shape[1]:
+                history = np.concatenate([history, np.full_like(history, -1)], axis=1)
+
+            # stalemate when a position comes up for the STALEMATE_COUNT-th time
+            canonical_keys = batch.canonical_keys(keys[active])
+            counts = (history[active, :step] == canonical_keys[:, np.newaxis]).sum(axis=1) + 1
+            history[active, step] = canonical_keys
+            active = active[counts < STALEMATE_COUNT]
+            step += 1
+            if not len(active):
+                break
+
+            current_keys = keys[active]
+            successors = batch.successors(current_keys)
+            next_keys = successors[np.arange(len(active)), self.choose_moves(current_keys, successors)]
+
+            # a finished game took one more round; otherwise count the turns of players with no hands
+            mover_ids = batch.current_player_ids(current_keys)
+            next_player_ids = batch.current_player_ids(next_keys)
+            is_over = batch.is_game_over(next_keys)
+            rounds[active] += np.where(is_over, 1, (next_player_ids - mover_ids - 1) % num_players + 1)
+            keys[active] = next_keys
+
+            finished = active[is_over]
+            winner_ids[finished] = np.argmax(batch.alive_hands(next_keys[is_over]) > 0, axis=1) + 1
+            active = active[~is_over]
+
+        for player_id, wins in zip(*np.unique(winner_ids[winner_ids > 0], return_counts=True)):
+            self.winners[int(player_id)] = self.winners.get(int(player_id), 0) + int(wins)
+        self.stalemates += int((winner_ids == 0).sum())
+        self.games_played += num_games
+        self.total_rounds_played += int(rounds.sum())
+
+    def choose_moves(self, keys: np.ndarray, successors: np.ndarray) -> np.ndarray:
+        """ Column of successors holding each game's move, chosen by the policy of the player to move """
+        batch = self.batch
+        num_moves = (successors >= 0).sum(axis=1)
+        choices = (self.rng.random(len(keys)) * num_moves).astype(np.int64)
+
+        player_types = np.array(self.player_types)[batch.current_player_ids(keys) - 1]
+        is_attack_now = player_types == 'ANB'
+        if is_attack_now.any():
+            # AttackNowBot takes the first move that erases an opponent's hand
+            mover_ids = batch.current_player_ids(keys[is_attack_now])
+            is_opponent = np.arange(1, batch.num_players + 1) != mover_ids[:, np.newaxis]
+            opponent_hands = (batch.alive_hands(keys[is_attack_now]) * is_opponent).sum(axis=1)
+            attack_successors = successors[is_attack_now]
+            successor_hands = batch.alive_hands(np.where(attack_successors >= 0, attack_successors, 0).ravel())
+            successor_opponent_hands = (successor_hands.reshape(attack_successors.shape + (-1,))
+                * is_opponent[:, np.newaxis, :]).sum(axis=2)
+            erases = (attack_successors >= 0) & (successor_opponent_hands < opponent_hands[:, np.newaxis])
+            choices[is_attack_now] = np.where(erases.any(axis=1), np.argmax(erases, axis=1),
+                choices[is_attack_now])
+
+        return choices
+
+
+def main():
+    t = LockstepTournament(int(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3]), sys.argv[4:])
+    t.play()
+
+
+if __name__ == '__main__':
+    main()
@@ -9,12 +9,44 @@ Description: Object which contains the game logic
 
 from __future__ import annotations
 from chopsticks.move import Move, Hit, Split
+import chopsticks.trace as trace
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
-    from chopsticks.core import Game
     from chopsticks.state import State
-    from chopsticks.player import Player
+
+class Undo:
+    """
+    Record of the hands changed by one move, enough for Logic.undo to take the move back
+
+    Also answers questions about the state before the move, so search code can walk
+    a tree with one mutable state instead of keeping a copy of every parent.
+    """
+
+    __slots__ = ('move', 'player_id', 'changes')
+
+    def __init__(self, move: Move, player_id: int):
+        self.move = move
+        self.player_id = player_id
+        # (player_id, hand_id, fingers before the move)
+        self.changes: list[tuple[int, int, int]] = []
+
+    def record(self, state: State, player_id: int, hand_id: int):
+        self.changes.append((player_id, hand_id, state.fingers(player_id, hand_id)))
+
+    def prior_fingers(self, state: State, player_id: int, hand_id: int) -> int:
+        for changed_player_id, changed_hand_id, fingers in self.changes:
+            if changed_player_id == player_id and changed_hand_id == hand_id:
+                return fingers
+        return state.fingers(player_id, hand_id)
+
+    def prior_alive_hands(self, state: State, player_id: int) -> int:
+        alive_hands = state.count_alive_hands(player_id)
+        for changed_player_id, changed_hand_id, fingers in self.changes:
+            if changed_player_id == player_id:
+                alive_hands += bool(fingers) - bool(state.fingers(player_id, changed_hand_id))
+        return alive_hands
+
 
 class Logic:
     """
@@ -22,25 +54,59 @@ class Logic:
     """
 
     @staticmethod
-    def do_move(g: Game, state: State, move: Move, player_id: int) -> bool:
+    def do_move(state: State, move: Move, player_id: int) -> bool:
         """ Performs the specified move by the specified player """
         is_valid_move = False
         if isinstance(move, Hit):
-            is_valid_move = Logic.hit(g, state, player_id, move)
+            is_valid_move = Logic.hit(state, player_id, move)
         elif isinstance(move, Split):
-            is_valid_move = Logic.split(g, state, player_id, move)
+            is_valid_move = Logic.split(state, player_id, move)
         return is_valid_move
+
+    @staticmethod
+    def apply(state: State, move: Move, player_id: int) -> Undo|None:
+        """
+        Performs the move in place, like do_move, and returns the record that undoes it
+
+        Returns None, leaving the state unchanged, if the move is not valid.
+        """
+        undo = Undo(move, player_id)
+        if isinstance(move, Hit):
+            if not Logic._is_player(state, move.opponent_id) or not Logic._is_hand(state, move.opponent_hand):
+                return None
+            undo.record(state, move.opponent_id, move.opponent_hand)
+        elif isinstance(move, Split):
+            if not Logic._is_hand(state, move.left_hand_id) or not Logic._is_hand(state, move.right_hand_id):
+                return None
+            undo.record(state, player_id, move.left_hand_id)
+            undo.record(state, player_id, move.right_hand_id)
+
+        if not Logic.do_move(state, move, player_id):
+            return None
+        return undo
+
+    @staticmethod
+    def undo(state: State, undo: Undo):
+        """ Reverses a move made by Logic.apply, which must be the last move applied to the state """
+        for player_id, hand_id, fingers in reversed(undo.changes):
+            state.set_fingers(player_id, hand_id, fingers)
+
+    @staticmethod
+    def _is_player(state: State, player_id: int):
+        return 1 <= player_id <= state.num_players
+
+    @staticmethod
+    def _is_hand(state: State, hand_id: int):
+        return 1 <= hand_id <= state.num_hands
         
         
     @staticmethod
-    def hit(g: Game, state: State, attack_player_id: int, hit: Hit):
+    def hit(state: State, attack_player_id: int, hit: Hit):
         """
-        hits a player's hand with the current player's hand and updates the Game object g
+        hits a player's hand with the current player's hand and updates the state
         
         Parameters
         ----------
-        g: Game object
-            reference to the game object
         state: State
             Game state list of players' hands
         attack_player_id: int
@@ -55,24 +121,30 @@ class Logic:
         #move validation
         if attack_player_id == hit.opponent_id:
             return False
+        if not Logic._is_player(state, hit.opponent_id):
+            return False
+        if not Logic._is_hand(state, hit.my_hand) or not Logic._is_hand(state, hit.opponent_hand):
+            return False
         
-        defending_hand = state.player(hit.opponent_id).hand(hit.opponent_hand)
-        num_attacking_fingers = state.player(attack_player_id).hand(hit.my_hand).alive_fingers
+        defending_fingers = state.fingers(hit.opponent_id, hit.opponent_hand)
+        num_attacking_fingers = state.fingers(attack_player_id, hit.my_hand)
+        # hands with no fingers are out of the game, so they can neither hit nor be hit
+        if not defending_fingers or not num_attacking_fingers:
+            return False
         
-        is_valid_move = defending_hand.add_fingers(num_attacking_fingers)
+        state.set_fingers(hit.opponent_id, hit.opponent_hand,
+            (defending_fingers + num_attacking_fingers) % state.num_fingers)
         
-        return is_valid_move
+        return True
 
     
     @staticmethod
-    def split(g: Game, state: State, player_id: int, split: Split):
+    def split(state: State, player_id: int, split: Split):
         """
-        Splits the fingers between two hands and updates the Game object g
+        Splits the fingers between two hands and updates the state
         
         Parameters
         ----------
-        g: Game object
-            reference to the game object
         state: State
             Game state list of players' hands
         player_id: int
@@ -85,40 +157,53 @@ class Logic:
         """
 
         
-        if split.left_hand_id > g.num_hands:
-            print('Select a hand')
+        if not Logic._is_hand(state, split.left_hand_id):
+            if trace.level <= trace.INFO:
+                trace.emit(trace.INFO, 'Select a hand')
+            return False
+        if not Logic._is_hand(state, split.right_hand_id):
+            if trace.level <= trace.INFO:
+                trace.emit(trace.INFO, 'Select a hand')
             return False
-        if split.right_hand_id > g.num_hands:
-            print('Select a hand')
+        if split.left_hand_id == split.right_hand_id:
+            if trace.level <= trace.INFO:
+                trace.emit(trace.INFO, 'Select two different hands')
             return False
         
-        left_hand_fingers = state.player(player_id).hand(split.left_hand_id).alive_fingers
-        right_hand_fingers = state.player(player_id).hand(split.right_hand_id).alive_fingers
+        left_hand_fingers = state.fingers(player_id, split.left_hand_id)
+        right_hand_fingers = state.fingers(player_id, split.right_hand_id)
         
        
         if left_hand_fingers + right_hand_fingers == 1:
-            print('Cannot split.')
+            if trace.level <= trace.INFO:
+                trace.emit(trace.INFO, 'Cannot split.')
             return False
         if left_hand_fingers == split.new_right_hand_fingers and right_hand_fingers == split.new_left_hand_fingers:
-            print('This is the same hand set as before.')
+            if trace.level <= trace.INFO:
+                trace.emit(trace.INFO, 'This is the same hand set as before.')
             return False
         if left_hand_fingers + right_hand_fingers != split.new_left_hand_fingers + split.new_right_hand_fingers:
-            print('Must equal same amount of fingers.')
+            if trace.level <= trace.INFO:
+                trace.emit(trace.INFO, 'Must equal same amount of fingers.')
             return False
-        if split.new_left_hand_fingers >= g.num_fingers:
-            print('Too many fingers on one hand.')
+        if split.new_left_hand_fingers >= state.num_fingers:
+            if trace.level <= trace.INFO:
+                trace.emit(trace.INFO, 'Too many fingers on one hand.')
             return False
-        if split.new_right_hand_fingers >= g.num_fingers:
-            print('Too many fingers on one hand.')
+        if split.new_right_hand_fingers >= state.num_fingers:
+            if trace.level <= trace.INFO:
+                trace.emit(trace.INFO, 'Too many fingers on one hand.')
             return False
         if split.new_left_hand_fingers < 0:
-            print('Cannot have a negative')
+            if trace.level <= trace.INFO:
+                trace.emit(trace.INFO, 'Cannot have a negative')
             return False
         if split.new_right_hand_fingers < 0:
-            print('Cannot have a negative')
+            if trace.level <= trace.INFO:
+                trace.emit(trace.INFO, 'Cannot have a negative')
             return False
-        state.player(player_id).hand(split.left_hand_id).alive_fingers = split.new_left_hand_fingers
-        state.player(player_id).hand(split.right_hand_id).alive_fingers = split.new_right_hand_fingers
+        state.set_fingers(player_id, split.left_hand_id, split.new_left_hand_fingers)
+        state.set_fingers(player_id, split.right_hand_id, split.new_right_hand_fingers)
         return True
 
 
@@ -129,27 +214,37 @@ class Logic:
         
         Parameter
         ---------
-        g: Game object
-            reference to the game object
+        state: State
+            Game state list of players' hands
 
         Returns
         -------
         True if only one player is alive, otherwise false
         """
         alive_count = 0
-        for player in state.players():
-            if player.is_alive():
+        for player_id in state.player_ids():
+            if state.is_alive(player_id):
                 alive_count += 1
         return alive_count < 2
 
     @staticmethod
-    def get_winning_player(state: State) -> Player|None:
-        alive_players: list[Player] = []
-        for player in state.players():
-            if player.is_alive():
-                alive_players.append(player)
-        if len(alive_players) == 1:
-            return alive_players[0]
+    def next_player_id(state: State, player_id: int) -> int:
+        """ The next player after player_id who is still alive, in turn order """
+        next_player_id = player_id
+        for _ in state.player_ids():
+            next_player_id = 1 if next_player_id == state.num_players else next_player_id + 1
+            if state.is_alive(next_player_id):
+                break
+        return next_player_id
+
+    @staticmethod
+    def get_winning_player_id(state: State) -> int|None:
+        alive_player_ids: list[int] = []
+        for player_id in state.player_ids():
+            if state.is_alive(player_id):
+                alive_player_ids.append(player_id)
+        if len(alive_player_ids) == 1:
+            return alive_player_ids[0]
         else:
             # Stalemate
             return None
@@ -0,0 +1,140 @@
+"""
+Description: Monte Carlo tree search with UCT selection and random playouts, which can be
+spread over a pool of worker processes.
+"""
+
+from __future__ import annotations
+import math
+import random
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+
+from chopsticks.bot_util import BotUtil
+from chopsticks.logic import Logic
+from chopsticks.state import State
+from typing import cast
+
+# worker pools shared by every bot in this process, by number of workers
+_pools: dict[int, ProcessPoolExecutor] = {}
+
+
+class Node:
+    """ A position in the search tree, reached by move, which was made by player_id """
+
+    __slots__ = ('move_index', 'player_id', 'next_player_id', 'parent', 'children', 'untried_moves',
+        'visits', 'wins')
+
+    def __init__(self, state: State, move_index: int, player_id: int, parent: Node|None, rng: random.Random):
+        self.move_index = move_index
+        self.player_id = player_id
+        self.parent = parent
+        self.children: list[Node] = []
+        self.visits = 0
+        self.wins = 0.0
+        if Logic.check_if_game_over(state):
+            self.next_player_id = 0
+            self.untried_moves: list[int] = []
+        else:
+            self.next_player_id = Logic.next_player_id(state, player_id) if parent else player_id
+            legal_moves = BotUtil.get_legal_moves(state, self.next_player_id)
+            self.untried_moves = rng.sample(range(len(legal_moves)), len(legal_moves))
+
+    def select_child(self, exploration: float) -> Node:
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.wins / child.visits +
+            exploration * math.sqrt(log_visits / child.visits))
+
+
+def search(fingers: list[int], num_players: int, num_hands: int, num_fingers: int, player_id: int,
+        playouts: int, seed: int, exploration: float, max_playout_rounds: int) -> list[int]:
+    """
+    Runs playouts from the position and returns the visit count of each of player_id's legal
+    moves, in BotUtil.get_legal_moves order
+
+    Takes the position as plain values so it can run in a worker process.
+    """
+    rng = random.Random(seed)
+    root_state = State(num_players, num_hands, num_fingers, fingers, player_id)
+    root = Node(root_state, -1, player_id, None, rng)
+
+    for _ in range(playouts):
+        state = root_state.copy()
+        node = root
+
+        # selection
+        while not node.untried_moves and node.children:
+            node = node.select_child(exploration)
+            mover_id = cast(Node, node.parent).next_player_id
+            Logic.do_move(state, BotUtil.get_legal_moves(state, mover_id)[node.move_index], mover_id)
+
+        # expansion
+        if node.untried_moves:
+            move_index = node.untried_moves.pop()
+            mover_id = node.next_player_id
+            Logic.do_move(state, BotUtil.get_legal_moves(state, mover_id)[move_index], mover_id)
+            child = Node(state, move_index, mover_id, node, rng)
+            node.children.append(child)
+            node = child
+
+        winner_id = playout(state, node.next_player_id, max_playout_rounds, rng)
+
+        # backpropagation, scoring each node for the player who moved into it
+        backup_node: Node|None = node
+        while backup_node:
+            backup_node.visits += 1
+            if winner_id is None:
+                backup_node.wins += 0.5
+            elif winner_id == backup_node.player_id:
+                backup_node.wins += 1
+            backup_node = backup_node.parent
+
+    visits = [0] * len(BotUtil.get_legal_moves(root_state, player_id))
+    for child in root.children:
+        visits[child.move_index] = child.visits
+    return visits
+
+
+def playout(state: State, player_id: int, max_rounds: int, rng: random.Random) -> int|None:
+    """ Plays random legal moves to the end of the game, returning the winner, or None if it runs too long """
+    for _ in range(max_rounds):
+        if Logic.check_if_game_over(state):
+            return Logic.get_winning_player_id(state)
+        legal_moves = BotUtil.get_legal_moves(state, player_id)
+        Logic.do_move(state, rng.choice(legal_moves), player_id)
+        player_id = Logic.next_player_id(state, player_id)
+    return Logic.get_winning_player_id(state)
+
+
+def parallel_search(state: State, player_id: int, playouts: int, workers: int, exploration: float,
+        max_playout_rounds: int, rng: random.Random) -> list[int]:
+    """
+    Splits the playouts between independent trees, one per worker, and adds up their root visits
+
+    Root parallelism needs no communication during the search, so strength scales with workers.
+    """
+    arguments = [(state.all_hands(), state.num_players, state.num_hands, state.num_fingers, player_id,
+        playouts // workers + (1 if worker < playouts % workers else 0), rng.getrandbits(32),
+        exploration, max_playout_rounds) for worker in range(workers)]
+    if workers == 1:
+        return search(*arguments[0])
+
+    visits: list[int] = []
+    for worker_visits in _get_pool(workers).map(_search, arguments):
+        visits = [total + count for total, count in zip(visits, worker_visits)] if visits else worker_visits
+    return visits
+
+
+def _search(arguments: tuple) -> list[int]:
+    return search(*arguments)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    if workers not in _pools:
+        _pools[workers] = ProcessPoolExecutor(workers)
+    return _pools[workers]
+
+
+@atexit.register
+def _shutdown_pools():
+    for pool in _pools.values():
+        pool.shutdown(cancel_futures=True)
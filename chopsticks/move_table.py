@@ -0,0 +1,104 @@
+"""
+Description: Legal moves for each hand configuration, generated once and shared
+"""
+
+from __future__ import annotations
+from chopsticks.move import Hit, Split
+
+
+class MoveTable:
+    """
+    Legal moves of one (num_hands, num_fingers) variant, by hand configuration
+
+    Moves only depend on the fingers on the hands involved, so each configuration's
+    moves are generated the first time it is seen and the same immutable tuple of
+    moves is returned every time after that.
+    """
+
+    _tables: dict[tuple[int, int], MoveTable] = {}
+
+    def __init__(self, num_hands: int, num_fingers: int):
+        self.num_hands = num_hands
+        self.num_fingers = num_fingers
+        self._hits: dict[tuple[int, tuple[int, ...], tuple[int, ...]], tuple[Hit, ...]] = {}
+        self._splits: dict[tuple[int, ...], tuple[Split, ...]] = {}
+
+    @staticmethod
+    def get(num_hands: int, num_fingers: int) -> MoveTable:
+        """ The shared table for a variant """
+        dimensions = (num_hands, num_fingers)
+        if dimensions not in MoveTable._tables:
+            MoveTable._tables[dimensions] = MoveTable(num_hands, num_fingers)
+        return MoveTable._tables[dimensions]
+
+    def hits(self, opponent_id: int, my_hands: tuple[int, ...], opponent_hands: tuple[int, ...]) -> tuple[Hit, ...]:
+        """ Legal hits on one opponent """
+        key = (opponent_id, my_hands, opponent_hands)
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = tuple(self._generate_hits(opponent_id, my_hands, opponent_hands))
+        return hits
+
+    def splits(self, my_hands: tuple[int, ...]) -> tuple[Split, ...]:
+        """ Legal splits of my hands """
+        splits = self._splits.get(my_hands)
+        if splits is None:
+            splits = self._splits[my_hands] = tuple(self._generate_splits(my_hands))
+        return splits
+
+    def _generate_hits(self, opponent_id: int, my_hands: tuple[int, ...], opponent_hands: tuple[int, ...]) -> list[Hit]:
+        legal_hit_moves: list[Hit] = []
+
+        # iterate through any of my hands that are alive
+        my_hand_unique: set[int] = set()
+        for my_hand, my_alive_fingers in enumerate(my_hands, 1):
+            if my_alive_fingers:
+                if my_alive_fingers in my_hand_unique:
+                    # skip hand with duplicate number of fingers
+                    continue
+                else:
+                    my_hand_unique.add(my_alive_fingers)
+
+                # iterate through opponent hands that are alive
+                opponent_hand_unique: set[int] = set()
+                for opponent_hand, opponent_alive_fingers in enumerate(opponent_hands, 1):
+                    if opponent_alive_fingers:
+                        if opponent_alive_fingers in opponent_hand_unique:
+                            # skip opponent hand with duplicate number of fingers
+                            continue
+                        else:
+                            opponent_hand_unique.add(opponent_alive_fingers)
+
+                        move = Hit(opponent_id, my_hand, opponent_hand)
+                        legal_hit_moves.append(move)
+
+        return legal_hit_moves
+
+    def _generate_splits(self, my_hands: tuple[int, ...]) -> list[Split]:
+        """
+        Splits between every pair of hands, keeping one split for each distinct multiset
+        of fingers it can leave the player with
+
+        Which hand holds which count makes no difference to the game, so swapping fingers
+        between hands is not a move, and splits that differ only in which hands they
+        rearrange are duplicates of each other.
+        """
+        legal_split_moves: list[Split] = []
+        seen_hands = {tuple(sorted(my_hands))}
+        max_hand_fingers = self.num_fingers - 1
+        for left_hand in range(1, len(my_hands)):
+            for right_hand in range(left_hand + 1, len(my_hands) + 1):
+                pair_alive_fingers = my_hands[left_hand - 1] + my_hands[right_hand - 1]
+                other_hands = my_hands[:left_hand - 1] + my_hands[left_hand:right_hand - 1] + my_hands[right_hand:]
+
+                # the left hand takes the larger share, which eliminates the duplicate half of the splits
+                for left_fingers in range((pair_alive_fingers + 1) // 2, min(pair_alive_fingers, max_hand_fingers) + 1):
+                    right_fingers = pair_alive_fingers - left_fingers
+                    new_hands = tuple(sorted(other_hands + (left_fingers, right_fingers)))
+
+                    # if this move would actually change the game state, in a way not already found
+                    if new_hands not in seen_hands:
+                        seen_hands.add(new_hands)
+                        legal_split_moves.append(Split(left_hand, right_hand, left_fingers, right_fingers))
+
+        return legal_split_moves
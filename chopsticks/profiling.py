@@ -0,0 +1,71 @@
+"""
+Description: Counts and timings of every bot decision made in a game, summarized by player type.
+"""
+
+from __future__ import annotations
+import math
+
+
+class Counters:
+    """ Work done in this process so far, which decisions measure as before and after differences """
+
+    __slots__ = ('simulate_nodes', 'scenarios')
+
+    def __init__(self):
+        self.simulate_nodes = 0
+        self.scenarios = 0
+
+
+# incremented by BotUtil.simulate and Scenario
+counters = Counters()
+
+
+class Decision:
+    """ The cost of one call to a bot's get_next_move """
+
+    __slots__ = ('player_type', 'seconds', 'simulate_nodes', 'scenarios', 'legal_moves')
+
+    def __init__(self, player_type: str, seconds: float, simulate_nodes: int, scenarios: int, legal_moves: int):
+        self.player_type = player_type
+        self.seconds = seconds
+        self.simulate_nodes = simulate_nodes
+        self.scenarios = scenarios
+        self.legal_moves = legal_moves
+
+
+class DecisionProfile:
+    """ Decisions grouped by the type of player that made them """
+
+    PERCENTILES = (0.5, 0.9, 0.99, 1.0)
+
+    def __init__(self):
+        self.decisions: dict[str, list[Decision]] = {}
+
+    def record(self, decision: Decision):
+        self.decisions.setdefault(decision.player_type, []).append(decision)
+
+    def merge(self, other: DecisionProfile):
+        for player_type, decisions in other.decisions.items():
+            self.decisions.setdefault(player_type, []).extend(decisions)
+
+    def summary(self) -> list[str]:
+        """ One line per player type with the p50, p90, p99 and maximum of each measurement """
+        lines: list[str] = []
+        for player_type, decisions in sorted(self.decisions.items()):
+            times = [f"{value * 1000:.2f}" for value in
+                percentiles([decision.seconds for decision in decisions], DecisionProfile.PERCENTILES)]
+            nodes = percentiles([decision.simulate_nodes for decision in decisions], DecisionProfile.PERCENTILES)
+            scenarios = percentiles([decision.scenarios for decision in decisions], DecisionProfile.PERCENTILES)
+            legal_moves = percentiles([decision.legal_moves for decision in decisions], DecisionProfile.PERCENTILES)
+            lines.append(f"{player_type} ({len(decisions)} decisions): "
+                f"time {' / '.join(times)} ms, "
+                f"simulate nodes {' / '.join(map(str, nodes))}, "
+                f"scenarios {' / '.join(map(str, scenarios))}, "
+                f"legal moves {' / '.join(map(str, legal_moves))}")
+        return lines
+
+
+def percentiles(values: list, fractions: tuple[float, ...]) -> list:
+    """ Nearest-rank percentiles of values """
+    ordered = sorted(values)
+    return [ordered[max(0, math.ceil(fraction * len(ordered)) - 1)] for fraction in fractions]
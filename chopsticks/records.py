@@ -0,0 +1,162 @@
+"""
+Description: Compact binary records of finished games, appended to a log file one game at a time
+and read back as a stream.
+
+Each record is a 4-byte length and a 4-byte CRC-32 of the payload, followed by the payload.
+Records are written with a single append while holding a lock on the file, so any number
+of processes can append to the same log, and a reader stops cleanly at a record that is
+still being written.
+"""
+
+from __future__ import annotations
+import os
+import struct
+import zlib
+from typing import Iterator
+
+from chopsticks.move import Move, Hit, Split
+from chopsticks.state import State
+
+try:
+    import fcntl
+except ImportError:
+    # without file locks, appends still rely on O_APPEND writes not interleaving
+    fcntl = None  # type: ignore
+
+VERSION = 1
+
+# seeds are recorded as unsigned 64-bit ints
+MAX_SEED = 2 ** 64 - 1
+
+_header = struct.Struct('<II')
+# version, players, hands, fingers, seed, starting player, winner (0 for a stalemate), rounds played, moves
+_game = struct.Struct('<BBBBQBBII')
+# player id, move code, then the move's hands and fingers
+_move = struct.Struct('<BcBBBB')
+
+
+def check_seed(seed: int|None):
+    """ Refuses a seed that couldn't be recorded, before any game is played with it """
+    if seed is not None and not 0 <= seed <= MAX_SEED:
+        raise Exception(f"Seeds must be from 0 to {MAX_SEED}, not {seed}")
+
+
+class GameRecord:
+    """ Everything needed to replay one game: its variant, players, seed, starting hands and moves """
+
+    def __init__(self, num_hands: int, num_fingers: int, player_types: list[str], seed: int,
+            starting_hands: list[int], starting_player_id: int, moves: list[tuple[int, Move]],
+            winning_player_id: int|None, rounds_played: int):
+        self.num_hands = num_hands
+        self.num_fingers = num_fingers
+        self.player_types = player_types
+        self.seed = seed
+        self.starting_hands = starting_hands
+        self.starting_player_id = starting_player_id
+        self.moves = moves
+        self.winning_player_id = winning_player_id
+        self.rounds_played = rounds_played
+
+    @property
+    def num_players(self) -> int:
+        return len(self.player_types)
+
+    def starting_state(self) -> State:
+        return State(self.num_players, self.num_hands, self.num_fingers, list(self.starting_hands),
+            self.starting_player_id)
+
+    def encode(self) -> bytes:
+        if self.num_fingers > 255 or self.num_hands > 255 or self.num_players > 255:
+            raise Exception("Games with more than 255 players, hands or fingers can't be recorded")
+        parts = [_game.pack(VERSION, self.num_players, self.num_hands, self.num_fingers, self.seed,
+            self.starting_player_id, self.winning_player_id or 0, self.rounds_played, len(self.moves))]
+        for player_type in self.player_types:
+            encoded_type = player_type.encode('ascii')
+            parts.append(bytes([len(encoded_type)]) + encoded_type)
+        parts.append(bytes(self.starting_hands))
+        for player_id, move in self.moves:
+            if isinstance(move, Hit):
+                parts.append(_move.pack(player_id, b'h', move.opponent_id, move.my_hand, move.opponent_hand, 0))
+            elif isinstance(move, Split):
+                parts.append(_move.pack(player_id, b's', move.left_hand_id, move.right_hand_id,
+                    move.new_left_hand_fingers, move.new_right_hand_fingers))
+            else:
+                raise Exception(f"Can't record move {move}")
+        return b''.join(parts)
+
+    @staticmethod
+    def decode(payload: bytes) -> GameRecord:
+        version, num_players, num_hands, num_fingers, seed, starting_player_id, winning_player_id, \
+            rounds_played, num_moves = _game.unpack_from(payload)
+        if not version == VERSION:
+            raise Exception(f"Unknown game record version {version}")
+        offset = _game.size
+        player_types: list[str] = []
+        for _ in range(num_players):
+            length = payload[offset]
+            player_types.append(payload[offset + 1:offset + 1 + length].decode('ascii'))
+            offset += 1 + length
+        starting_hands = list(payload[offset:offset + num_players * num_hands])
+        offset += num_players * num_hands
+        moves: list[tuple[int, Move]] = []
+        for player_id, code, first, second, third, fourth in _move.iter_unpack(payload[offset:]):
+            move: Move = Hit(first, second, third) if code == b'h' else Split(first, second, third, fourth)
+            moves.append((player_id, move))
+        if not len(moves) == num_moves:
+            raise Exception(f"Game record has {len(moves)} moves, expected {num_moves}")
+        return GameRecord(num_hands, num_fingers, player_types, seed, starting_hands, starting_player_id,
+            moves, winning_player_id or None, rounds_played)
+
+
+class RecordWriter:
+    """ Appends game records to a log file, safely alongside other processes doing the same """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def write(self, record: GameRecord):
+        payload = record.encode()
+        data = _header.pack(len(payload), zlib.crc32(payload)) + payload
+        if fcntl:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            written = 0
+            while written < len(data):
+                written += os.write(self.fd, data[written:])
+        finally:
+            if fcntl:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def close(self):
+        os.close(self.fd)
+
+    def __enter__(self) -> RecordWriter:
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+def read_records(path: str, offset: int = 0) -> Iterator[tuple[GameRecord, int]]:
+    """
+    Yields each complete record from offset on, with the offset just past it
+
+    Reading stops at the end of the file or at a record that is not completely written yet,
+    so reading again from the last offset yielded picks up records appended since.
+    """
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        while True:
+            header = file.read(_header.size)
+            if len(header) < _header.size:
+                return
+            length, checksum = _header.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length:
+                return
+            if not zlib.crc32(payload) == checksum:
+                raise Exception(f"Corrupt game record at offset {offset} of {path}")
+            offset += _header.size + length
+            yield GameRecord.decode(payload), offset
@@ -0,0 +1,70 @@
+"""
+Description: Sequential test of whether one of two players is stronger, checked after every game
+so a tournament can stop as soon as the answer is clear.
+"""
+
+from __future__ import annotations
+import math
+
+PLAYER_1 = 1
+PLAYER_2 = 2
+NEITHER = 0
+
+
+class Sprt:
+    """
+    Generalized sequential probability ratio test on player 1's score, 1 for a win,
+    0.5 for a stalemate and 0 for a loss
+
+    Two tests run side by side: player 1 scores 0.5 + margin against an even 0.5, and
+    player 2 does. Whichever reaches its upper bound first names the stronger player; once
+    both reach their lower bounds, neither is stronger by margin or more. alpha and beta
+    are the chances of naming a player that isn't stronger and of missing one that is.
+    """
+
+    def __init__(self, margin: float = 0.1, alpha: float = 0.05, beta: float = 0.05, min_games: int = 30):
+        self.margin = margin
+        self.alpha = alpha
+        self.beta = beta
+        self.min_games = min_games
+        self.lower_bound = math.log(beta / (1 - alpha))
+        self.upper_bound = math.log((1 - beta) / alpha)
+
+    def log_likelihood_ratios(self, wins: int, stalemates: int, losses: int) -> tuple[float, float]:
+        """ Evidence that player 1 is stronger, and that player 2 is, from player 1's results """
+        games = wins + stalemates + losses
+        mean = (wins + 0.5 * stalemates) / games
+        variance = (wins + 0.25 * stalemates) / games - mean ** 2
+        if variance <= 0:
+            # every game had the same result, which says nothing about the players' strengths
+            # unless that result was a stalemate
+            if stalemates == games:
+                return -math.inf, -math.inf
+            variance = 0.25 / games
+        # normal approximation of the log likelihood ratio of score 0.5 + margin against 0.5
+        player_1 = games * self.margin * (2 * mean - 1 - self.margin) / (2 * variance)
+        player_2 = games * self.margin * (1 - 2 * mean - self.margin) / (2 * variance)
+        return player_1, player_2
+
+    def decision(self, wins: int, stalemates: int, losses: int) -> int|None:
+        """ PLAYER_1, PLAYER_2 or NEITHER once the results are conclusive, otherwise None """
+        if wins + stalemates + losses < self.min_games:
+            return None
+        player_1, player_2 = self.log_likelihood_ratios(wins, stalemates, losses)
+        if player_1 >= self.upper_bound:
+            return PLAYER_1
+        if player_2 >= self.upper_bound:
+            return PLAYER_2
+        if player_1 <= self.lower_bound and player_2 <= self.lower_bound:
+            return NEITHER
+        return None
+
+
+def wilson_interval(successes: int, trials: int, z: float = 1.96) -> tuple[float, float]:
+    """ Confidence interval of a rate, 95% by default, which stays sensible near 0 and 1 """
+    if not trials:
+        return 0.0, 1.0
+    rate = successes / trials
+    center = (rate + z * z / (2 * trials)) / (1 + z * z / trials)
+    half_width = z * math.sqrt(rate * (1 - rate) / trials + z * z / (4 * trials * trials)) / (1 + z * z / trials)
+    return max(0.0, center - half_width), min(1.0, center + half_width)
@@ -1,66 +1,166 @@
 from __future__ import annotations
-import copy
 from chopsticks.logic import Logic
-from typing import TYPE_CHECKING, cast
+import chopsticks.profiling as profiling
+from typing import TYPE_CHECKING
 import json
 if TYPE_CHECKING:
-    from chopsticks.player import Player
     from chopsticks.move import Move
-    from chopsticks.core import Game
 
 
-class State:
+# place values of the mixed-radix state key, by (num_players, num_hands, num_fingers)
+_place_values: dict[tuple[int, int, int], tuple[int, ...]] = {}
+
 
-    def __init__(self, players: list[Player]):
-        self._players = players
-        self.set_current_player(1)
+def get_place_values(num_players: int, num_hands: int, num_fingers: int) -> tuple[int, ...]:
+    """
+    Place value of each hand in the state key, followed by the place value of the player to move
 
-    def player(self, player_id: int):
-        return self._players[player_id - 1]
+    Each hand is a base-num_fingers digit, so keys are unique and dense for any
+    number of players, hands and fingers.
+    """
+    dimensions = (num_players, num_hands, num_fingers)
+    if dimensions not in _place_values:
+        _place_values[dimensions] = tuple(num_fingers ** index
+            for index in range(num_players * num_hands + 1))
+    return _place_values[dimensions]
 
-    def players(self) -> list[Player]:
-        return self._players
 
-    def get_current_player(self):
-        return self.player(self._current_player_id)
+class State:
+    """
+    Compact game state: the alive fingers on every hand, plus the player to move.
+
+    Hands are kept in one flat list of ints, player-major, so a state holds no
+    references to Player objects and copying one is a single list slice.  Player
+    and hand ids are 1-based, as everywhere else in the game.
+
+    The key is kept up to date by set_fingers and set_current_player, so reading it
+    never walks the hands.
+    """
+
+    __slots__ = ('num_players', 'num_hands', 'num_fingers', '_fingers', '_current_player_id',
+        '_place_values', '_key')
+
+    def __init__(self, num_players: int, num_hands: int, num_fingers: int,
+            fingers: list[int]|None = None, current_player_id: int = 1):
+        self.num_players = num_players
+        self.num_hands = num_hands
+        self.num_fingers = num_fingers
+        self._fingers = fingers if fingers is not None else [1] * (num_players * num_hands)
+        self._place_values = get_place_values(num_players, num_hands, num_fingers)
+        self._current_player_id = current_player_id
+        self._key = (current_player_id - 1) * self._place_values[-1]
+        for place_value, hand_fingers in zip(self._place_values, self._fingers):
+            self._key += hand_fingers * place_value
+
+    def copy(self) -> State:
+        state = State.__new__(State)
+        self._copy_to(state)
+        return state
+
+    def _copy_to(self, state: State):
+        """ Copies this state into an uninitialised one, carrying the key over rather than recomputing it """
+        state.num_players = self.num_players
+        state.num_hands = self.num_hands
+        state.num_fingers = self.num_fingers
+        state._fingers = self._fingers[:]
+        state._place_values = self._place_values
+        state._current_player_id = self._current_player_id
+        state._key = self._key
+
+    def player_ids(self):
+        return range(1, self.num_players + 1)
+
+    def opponent_ids(self, player_id: int) -> list[int]:
+        return [opponent_id for opponent_id in self.player_ids() if not opponent_id == player_id]
+
+    def fingers(self, player_id: int, hand_id: int) -> int:
+        return self._fingers[(player_id - 1) * self.num_hands + hand_id - 1]
+
+    def set_fingers(self, player_id: int, hand_id: int, num_fingers: int):
+        index = (player_id - 1) * self.num_hands + hand_id - 1
+        self._key += (num_fingers - self._fingers[index]) * self._place_values[index]
+        self._fingers[index] = num_fingers
+
+    def hands(self, player_id: int) -> list[int]:
+        """ Alive fingers on each of the player's hands """
+        start = (player_id - 1) * self.num_hands
+        return self._fingers[start:start + self.num_hands]
+
+    def all_hands(self) -> list[int]:
+        """ Alive fingers on every hand, player by player """
+        return self._fingers[:]
+
+    def count_alive_hands(self, player_id: int) -> int:
+        alive_hands = 0
+        for fingers in self.hands(player_id):
+            if fingers:
+                alive_hands += 1
+        return alive_hands
+
+    def get_alive_fingers(self, player_id: int) -> int:
+        return sum(self.hands(player_id))
+
+    def is_alive(self, player_id: int):
+        """Checks if the player is alive"""
+        return self.get_alive_fingers(player_id) > 0
+
+    def get_current_player_id(self) -> int:
+        return self._current_player_id
 
     def set_current_player(self, current_player_id: int):
+        self._key += (current_player_id - self._current_player_id) * self._place_values[-1]
         self._current_player_id = current_player_id
 
     def __repr__(self):
-        return str([player.hands() for player in self.players()])
-
-    def key(self):
-        return self.__hash__()
+        return str([self.hands(player_id) for player_id in self.player_ids()])
+
+    def key(self) -> int:
+        return self._key
+
+    def canonical_key(self, relative: bool = False) -> int:
+        """
+        Key shared by every state that differs from this one only in the order of each player's hands
+
+        With relative, players are also renumbered so the player to move comes first,
+        which identifies positions that are the same from the mover's point of view.
+        Only this cyclic renumbering keeps the turn order, so other relabelings of
+        opponents are not treated as equivalent.
+        """
+        if relative:
+            first_player_id = self._current_player_id
+            key = 0
+        else:
+            first_player_id = 1
+            key = (self._current_player_id - 1) * self._place_values[-1]
+        index = 0
+        for offset in range(self.num_players):
+            player_id = (first_player_id + offset - 1) % self.num_players + 1
+            for fingers in sorted(self.hands(player_id)):
+                key += fingers * self._place_values[index]
+                index += 1
+        return key
 
     def __hash__(self):
-        hash: int = self._current_player_id
-        for player in self.players():
-            for hand in player.hands():
-                hash = hash * 10
-                hash = hash + hand.alive_fingers
-        return hash
+        return hash(self._key)
 
     def to_json(self):
-        return json.dumps(self, default=lambda o: o.__dict__, 
-            sort_keys=True, indent=4)
+        # same shape the web client has always read: _players[i]._hands[j].alive_fingers
+        return json.dumps({
+            "_current_player_id": self._current_player_id,
+            "_players": [
+                {"id": player_id, "_hands": [{"alive_fingers": fingers} for fingers in self.hands(player_id)]}
+                    for player_id in self.player_ids()],
+        }, sort_keys=True, indent=4)
 
 
 class Scenario(State):
+    """ The state resulting from one player making one move from a starting state """
+
+    __slots__ = ('move',)
 
-    def __init__(self, g: Game, starting_state: State, player_id: int, move: Move):
+    def __init__(self, starting_state: State, player_id: int, move: Move):
+        profiling.counters.scenarios += 1
+        starting_state._copy_to(self)
         self.set_current_player(player_id)
-        self._initPlayers(starting_state)
-        self._initOpponents(player_id)
         self.move = move
-        Logic.do_move(g, self, move, player_id)
-
-    def _initPlayers(self, starting_state: State):
-        self._players = cast(State, copy.deepcopy(starting_state._players))
-
-    def _initOpponents(self, player_id: int):
-        self._opponents: list[Player] = []
-        player: Player
-        for player in self.players():
-            if not player.id == player_id:
-                self._opponents.append(player)
+        Logic.do_move(self, move, player_id)
@@ -0,0 +1,170 @@
+"""
+Description: Retrograde-analysis solver that labels every two-player position as a win,
+loss or draw for the player to move, with the number of plies to the end of the game.
+"""
+
+from __future__ import annotations
+import os
+import sys
+import numpy as np
+
+from chopsticks.batch import split_table
+from chopsticks.state import State
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+DATA_DIR = os.environ.get('CHOPSTICKS_DATA', os.path.join(os.path.expanduser('~'), '.chopsticks'))
+
+# tablebases already opened by this process, by (num_players, num_hands, num_fingers)
+_open_tablebases: dict[tuple[int, int, int], Tablebase] = {}
+
+
+class Tablebase:
+    """
+    Solved outcome of every position of one game variant
+
+    Positions are indexed by State.canonical_key(relative=True): the mover's hands
+    followed by the opponent's, so a position and its mirror image share an entry.
+    Each entry is 0 for a draw, d + 1 for a win in d plies and -(d + 1) for a loss in
+    d plies, from the point of view of the player to move.
+    """
+
+    def __init__(self, num_players: int, num_hands: int, num_fingers: int, values: np.ndarray):
+        self.num_players = num_players
+        self.num_hands = num_hands
+        self.num_fingers = num_fingers
+        self.values = values
+
+    def outcome(self, state: State) -> int:
+        """ WIN, LOSS or DRAW for the player to move """
+        return int(np.sign(self.values[state.canonical_key(relative=True)]))
+
+    def distance(self, state: State) -> int|None:
+        """ Plies until the game ends with best play, or None for a draw """
+        value = int(self.values[state.canonical_key(relative=True)])
+        return abs(value) - 1 if value else None
+
+    def save(self, path: str|None = None):
+        path = path if path else tablebase_path(self.num_players, self.num_hands, self.num_fingers)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # write then rename, so other processes never map a half-written file
+        temp_path = f"{path}.{os.getpid()}.tmp.npy"
+        np.save(temp_path, self.values)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def load(num_players: int, num_hands: int, num_fingers: int, path: str|None = None) -> Tablebase:
+        """ Memory-maps a saved tablebase read-only, so every process using it shares the OS page cache """
+        path = path if path else tablebase_path(num_players, num_hands, num_fingers)
+        values = np.load(path, mmap_mode='r')
+        if not len(values) == num_fingers ** (num_players * num_hands):
+            raise Exception(f"{path} is not a tablebase for {num_players} players, "
+                f"{num_hands} hands and {num_fingers} fingers")
+        return Tablebase(num_players, num_hands, num_fingers, values)
+
+
+def open_tablebase(num_players: int, num_hands: int, num_fingers: int) -> Tablebase:
+    """ The tablebase for a variant, mapped once per process and solved and saved first if needed """
+    dimensions = (num_players, num_hands, num_fingers)
+    if dimensions not in _open_tablebases:
+        if not os.path.exists(tablebase_path(num_players, num_hands, num_fingers)):
+            solve(num_players, num_hands, num_fingers).save()
+        _open_tablebases[dimensions] = Tablebase.load(num_players, num_hands, num_fingers)
+    return _open_tablebases[dimensions]
+
+
+def tablebase_path(num_players: int, num_hands: int, num_fingers: int):
+    return os.path.join(DATA_DIR, f"tablebase-{num_players}-{num_hands}-{num_fingers}.npy")
+
+
+def solve(num_players: int, num_hands: int, num_fingers: int) -> Tablebase:
+    """
+    Labels every position by iterating backwards from the finished games
+
+    Each pass labels, all at once, the positions with a move to a position already
+    known to be lost (wins) and those whose moves all reach known wins (losses).
+    Whatever is left when a pass labels nothing can be played forever: a draw.
+    """
+    if not num_players == 2:
+        raise Exception("The tablebase can only be solved for two players")
+
+    num_configs = num_fingers ** num_hands
+    index = np.arange(num_configs * num_configs, dtype=np.int64)
+    my_config = index % num_configs
+    opponent_config = index // num_configs
+
+    successors = np.concatenate([
+        _hit_successors(index, my_config, opponent_config, num_hands, num_fingers),
+        _split_successors(my_config, opponent_config, num_hands, num_fingers)], axis=1)
+    is_move = successors >= 0
+    has_move = is_move.any(axis=1)
+    successors = np.where(is_move, successors, 0)
+
+    values = np.zeros(len(index), dtype=np.int16)
+    values[opponent_config == 0] = WIN
+    values[my_config == 0] = LOSS
+    undecided = values == 0
+
+    plies = 1
+    while True:
+        successor_values = values[successors]
+        wins = undecided & (is_move & (successor_values < 0)).any(axis=1)
+        losses = undecided & has_move & (~is_move | (successor_values > 0)).all(axis=1)
+        if not wins.any() and not losses.any():
+            break
+        values[wins] = plies + 1
+        values[losses] = -(plies + 1)
+        undecided &= ~(wins | losses)
+        plies += 1
+
+    return Tablebase(num_players, num_hands, num_fingers, values)
+
+
+def _hit_successors(index: np.ndarray, my_config: np.ndarray, opponent_config: np.ndarray,
+        num_hands: int, num_fingers: int) -> np.ndarray:
+    """
+    Successor of each position after each (my hand, opponent hand) hit, or -1 where the hit is not legal
+
+    After the hit the opponent moves, so the successor lists the opponent's hands first.
+    """
+    num_configs = num_fingers ** num_hands
+    successors = np.full((len(index), num_hands * num_hands), -1, dtype=np.int64)
+    for my_hand in range(num_hands):
+        my_fingers = (my_config // num_fingers ** my_hand) % num_fingers
+        for opponent_hand in range(num_hands):
+            place_value = num_fingers ** opponent_hand
+            opponent_fingers = (opponent_config // place_value) % num_fingers
+            hit_config = opponent_config + ((opponent_fingers + my_fingers) % num_fingers - opponent_fingers) * place_value
+            is_legal = (my_fingers > 0) & (opponent_fingers > 0)
+            successors[:, my_hand * num_hands + opponent_hand] = np.where(is_legal,
+                hit_config + my_config * num_configs, -1)
+    return successors
+
+
+def _split_successors(my_config: np.ndarray, opponent_config: np.ndarray,
+        num_hands: int, num_fingers: int) -> np.ndarray:
+    """ Successor of each position after each of the mover's legal splits, or -1 past the last one """
+    num_configs = num_fingers ** num_hands
+    split_configs = split_table(num_hands, num_fingers)
+    my_split_configs = split_configs[my_config]
+    return np.where(my_split_configs >= 0,
+        opponent_config[:, np.newaxis] + my_split_configs * num_configs, -1)
+
+
+def main():
+    num_hands = int(sys.argv[1])
+    num_fingers = int(sys.argv[2])
+    tablebase = solve(2, num_hands, num_fingers)
+    tablebase.save()
+    values = tablebase.values
+    print(f"Solved {len(values)} positions: {(values > 0).sum()} wins, {(values < 0).sum()} losses, "
+        f"{(values == 0).sum()} draws for the player to move.")
+    start = State(2, num_hands, num_fingers)
+    print(f"The starting position is a {['loss', 'draw', 'win'][tablebase.outcome(start) + 1]} "
+        f"for the first player.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Description: Leveled tracing of what the game, the bots and their searches are doing, sent to
+stdout, a JSON lines file or an in-memory ring buffer.
+
+Messages below the current level are dropped before they are built: callers check
+the level first, so a disabled trace costs one comparison and no formatting or I/O.
+
+    if trace.level <= trace.DEBUG:
+        trace.emit(trace.DEBUG, f"testing move {move}")
+
+The level and a JSON lines file can also be chosen with the CHOPSTICKS_TRACE
+(trace, debug, info or off) and CHOPSTICKS_TRACE_FILE environment variables.
+"""
+
+from __future__ import annotations
+import os
+import json
+import time
+from collections import deque
+
+# levels, from the most to the least detailed
+TRACE = 5    # every node of a search and every rule tested
+DEBUG = 10   # how each bot chose its move
+INFO = 20    # the progress of games and tournaments
+OFF = 100
+
+LEVELS = {'trace': TRACE, 'debug': DEBUG, 'info': INFO, 'off': OFF}
+
+# messages with a lower level than this are not emitted
+level = INFO
+
+
+class StdoutSink:
+    """ Prints messages, indented by their search depth """
+
+    def write(self, record: dict):
+        depth = record.get('depth')
+        print(record['message'] if depth is None else "..." * depth + " " + record['message'])
+
+    def close(self):
+        pass
+
+
+class JsonlSink:
+    """ Appends one JSON object per message to a file """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'a')
+
+    def write(self, record: dict):
+        self.file.write(json.dumps(record, default=repr) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class RingBufferSink:
+    """ Keeps the most recent messages in memory, for inspecting what happened just before a problem """
+
+    def __init__(self, capacity: int = 10000):
+        self.records: deque[dict] = deque(maxlen=capacity)
+
+    def write(self, record: dict):
+        self.records.append(record)
+
+    def messages(self) -> list[str]:
+        return [record['message'] for record in self.records]
+
+    def close(self):
+        pass
+
+
+sinks: list[StdoutSink|JsonlSink|RingBufferSink] = [StdoutSink()]
+
+
+def emit(message_level: int, message: str, **fields):
+    """ Sends a message to every sink; callers check the level first """
+    record = {'time': time.time(), 'level': message_level, 'message': message, **fields}
+    for sink in sinks:
+        sink.write(record)
+
+
+def configure(new_level: int|None = None, new_sinks: list|None = None):
+    """ Changes the level and replaces the sinks, closing the old ones """
+    global level, sinks
+    if new_level is not None:
+        level = new_level
+    if new_sinks is not None:
+        for sink in sinks:
+            if sink not in new_sinks:
+                sink.close()
+        sinks = new_sinks
+
+
+if os.environ.get('CHOPSTICKS_TRACE'):
+    level = LEVELS[os.environ['CHOPSTICKS_TRACE'].lower()]
+if os.environ.get('CHOPSTICKS_TRACE_FILE'):
+    sinks = [JsonlSink(os.environ['CHOPSTICKS_TRACE_FILE'])]
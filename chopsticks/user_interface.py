@@ -6,7 +6,7 @@ Authors: Luca Bianchi
 """
 
 from __future__ import annotations
-from chopsticks.player import Human, Player, Hand
+from chopsticks.player import Human, Player
 from chopsticks.move import Move, Hit, Split
 from chopsticks.state import State
 from abc import ABC, abstractmethod
@@ -17,7 +17,7 @@ class Ui(ABC):
         pass
 
     @abstractmethod
-    def display_game_state(self, state: State):
+    def display_game_state(self, players: list[Player], state: State):
         pass
 
     @abstractmethod
@@ -26,7 +26,7 @@ class Ui(ABC):
 
 class Gui(Ui):
     """Graphical user interface"""
-    def display_game_state(self, state: State):
+    def display_game_state(self, players: list[Player], state: State):
         pass
 
     def get_user_input(self, player_id: int) -> None:
@@ -37,25 +37,25 @@ class CommandLine(Ui):
     def __init__(self):
         pass
     
-    def display_game_state(self, state: State):
+    def display_game_state(self, players: list[Player], state: State):
         """Prints the number of fingers each player has"""
-        print(self.get_game_state(state))
+        print(self.get_game_state(players, state))
 
-    def get_game_state(self, state: State):
+    def get_game_state(self, players: list[Player], state: State):
         str_list: list[str] = []
         player: Player
-        for player in state.players():
+        for player in players:
             if isinstance(player, Human):
                 str_list.append(f"Human {str(player.id)}: (")
             else:
                 str_list.append(f"{player}: (")
             
-            hand: Hand
-            for hand in player.hands():
-                str_list.append(" " + str(hand.alive_fingers) + " ")
+            fingers: int
+            for fingers in state.hands(player.id):
+                str_list.append(" " + str(fingers) + " ")
                 
             str_list.append(")   |   ")
-        current_message = f"{state.get_current_player()}'s turn"
+        current_message = f"{players[state.get_current_player_id() - 1]}'s turn"
         return "\n" + ''.join(str_list) + current_message
     
     def get_user_input(self, player_id: int) -> Move|str :
@@ -0,0 +1,16 @@
+"""
+The tests keep any tablebases and opening books they make in a temporary directory of their
+own, so they never read or write the user's CHOPSTICKS_DATA.
+"""
+
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix='chopsticks-test-')
+atexit.register(shutil.rmtree, _data_dir, True)
+os.environ['CHOPSTICKS_DATA'] = _data_dir
+if 'chopsticks.tablebase' in sys.modules:
+    sys.modules['chopsticks.tablebase'].DATA_DIR = _data_dir
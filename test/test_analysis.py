@@ -0,0 +1,51 @@
+import io
+import os
+import tempfile
+import contextlib
+import unittest
+
+from chopsticks.analysis import LogAnalysis, analyze
+from chopsticks.core import Tournament
+
+
+class TestAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "games.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _play(self, num_games: int, seed: int) -> Tournament:
+        tournament = Tournament(2, 5, num_games, ['ANB', 'RB'], seed=seed, record_path=self.path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            tournament.play()
+        return tournament
+
+    def test_totals_match_the_tournament(self):
+        tournament = self._play(20, 1)
+        analysis = analyze(self.path)
+        self.assertEqual(analysis.games, 20)
+        self.assertEqual(dict(analysis.wins_by_seat), tournament.winners)
+        self.assertEqual(analysis.stalemates, tournament.stalemates)
+        self.assertEqual(sum(games for _, games in analysis.game_length_histogram()), 20)
+        self.assertEqual(sum(analysis.games_by_starting_seat.values()), 20)
+        self.assertEqual(sum(analysis.moves.values()), sum(analysis.positions.values()))
+        self.assertIn("Seat 1 won", "\n".join(analysis.summary()))
+
+    def test_resumes_from_offset_as_the_log_grows(self):
+        self._play(5, 1)
+        analysis = analyze(self.path)
+        offset = analysis.offset
+        self._play(7, 2)
+        analyze(self.path, analysis)
+        self.assertEqual(analysis.games, 12)
+        self.assertEqual(analysis.offset, os.path.getsize(self.path))
+        resumed = LogAnalysis()
+        resumed.offset = offset
+        self.assertEqual(analyze(self.path, resumed).games, 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import random
+import unittest
+
+import numpy as np
+
+from chopsticks.batch import Batch
+from chopsticks.bot_util import BotUtil
+from chopsticks.logic import Logic
+from chopsticks.state import State
+
+
+class TestBatch(unittest.TestCase):
+
+    def _random_states(self, num_players: int, num_hands: int, num_fingers: int, count: int) -> list[State]:
+        rng = random.Random(0)
+        return [State(num_players, num_hands, num_fingers,
+            [rng.randrange(num_fingers) for _ in range(num_players * num_hands)],
+            rng.randint(1, num_players)) for _ in range(count)]
+
+    def _expected_successors(self, state: State) -> list[int]:
+        keys = []
+        player_id = state.get_current_player_id()
+        for move in BotUtil.get_legal_moves(state, player_id):
+            undo = Logic.apply(state, move, player_id)
+            state.set_current_player(Logic.next_player_id(state, player_id))
+            keys.append(state.key())
+            state.set_current_player(player_id)
+            Logic.undo(state, undo)
+        return keys
+
+    def test_successors_match_the_move_generator(self):
+        for dimensions in ((2, 2, 5), (3, 3, 5), (2, 4, 4)):
+            batch = Batch.get(*dimensions)
+            states = self._random_states(*dimensions, 300)
+            successors = batch.successors(batch.encode(states))
+            for state, row in zip(states, successors):
+                self.assertEqual([int(key) for key in row if key >= 0], self._expected_successors(state), state)
+
+    def test_encode_and_decode(self):
+        batch = Batch.get(3, 2, 5)
+        states = self._random_states(3, 2, 5, 20)
+        for state, decoded in zip(states, batch.decode(batch.encode(states))):
+            self.assertEqual(decoded.all_hands(), state.all_hands())
+            self.assertEqual(decoded.get_current_player_id(), state.get_current_player_id())
+
+    def test_checks_match_bot_util(self):
+        batch = Batch.get(3, 2, 5)
+        states = self._random_states(3, 2, 5, 300)
+        keys = batch.encode(states)
+        player_ids = batch.current_player_ids(keys)
+        np.testing.assert_array_equal(batch.is_vulnerable(keys, player_ids),
+            [BotUtil.is_vulnerable(state.get_current_player_id(), state) for state in states])
+        np.testing.assert_array_equal(batch.has_vulnerable_hand(keys, 1, 3),
+            [BotUtil.has_vulnerable_hand(state, 1, 3) for state in states])
+        np.testing.assert_array_equal(batch.alive_hands(keys),
+            [[state.count_alive_hands(player_id) for player_id in state.player_ids()] for state in states])
+        np.testing.assert_array_equal(batch.is_game_over(keys),
+            [Logic.check_if_game_over(state) for state in states])
+
+
+if __name__ == '__main__':
+    unittest.main()
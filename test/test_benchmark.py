@@ -0,0 +1,37 @@
+import unittest
+
+import chopsticks.benchmark as benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_positions_are_the_same_every_run(self):
+        first = benchmark.positions(3, 2, 5, 20)
+        second = benchmark.positions(3, 2, 5, 20)
+        self.assertEqual([state.key() for state in first], [state.key() for state in second])
+
+    def test_compare_reports_speedup_per_call(self):
+        before = {'results': [{'benchmark': 'legal_moves', 'players': 2, 'hands': 2, 'fingers': 5,
+            'calls': 100, 'seconds': 2.0}]}
+        after = {'results': [{'benchmark': 'legal_moves', 'players': 2, 'hands': 2, 'fingers': 5,
+            'calls': 10, 'seconds': 0.1}]}
+        self.assertEqual(benchmark.compare(before, after), ["legal_moves 2 2 5: 2.00x"])
+
+    def test_simulate_counts_nodes(self):
+        states = benchmark.positions(2, 2, 5, 3)
+        g = benchmark.Game(2, 5, ['RB', 'RB'], seed=1)
+        result = benchmark.bench_simulate(states, g, 3)
+        self.assertGreaterEqual(result['nodes'], 3)
+
+    def test_bots_search_the_same_amount_on_every_machine(self):
+        g = benchmark.BenchmarkGame(2, 5, ['NB', 'MB'], seed=1)
+        self.assertIsNone(g.player(1).time_budget)
+        self.assertEqual(g.player(1).node_budget, benchmark.NEGAMAX_NODES)
+        self.assertEqual(g.player(2).workers, 1)
+        first = benchmark.bench_tournament(2, 2, 5, 'NB', 2)
+        second = benchmark.bench_tournament(2, 2, 5, 'NB', 2)
+        self.assertEqual((first['wins'], first['stalemates']), (second['wins'], second['stalemates']))
+
+
+if __name__ == '__main__':
+    unittest.main()
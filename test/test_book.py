@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+import chopsticks.book as book
+from chopsticks.book import Book, build
+from chopsticks.bot_util import BotUtil
+from chopsticks.bots import DefendBot, ThetaBot
+from chopsticks.core import HeadlessGame
+from chopsticks.move import Split
+from chopsticks.state import State
+
+
+class TestBook(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.book = build(2, 2, 5, plies=3, rounds=6)
+
+    def _codes(self, opening_book: Book) -> dict:
+        return {key: (move.code, move.__dict__) for key, move in opening_book.moves.items()}
+
+    def test_covers_the_first_plies_with_legal_moves(self):
+        start = State(2, 2, 5)
+        for player_id in (1, 2):
+            start.set_current_player(player_id)
+            self.assertIsNotNone(self.book.move(start))
+        for key, move in self.book.moves.items():
+            fingers = [key // 5 ** index % 5 for index in range(4)]
+            state = State(2, 2, 5, fingers, key // 5 ** 4 + 1)
+            self.assertEqual(state.key(), key)
+            legal_moves = BotUtil.get_legal_moves(state, state.get_current_player_id())
+            self.assertIn((move.code, move.__dict__), [(legal.code, legal.__dict__) for legal in legal_moves])
+
+    def test_builds_the_same_book_and_saves_it(self):
+        self.assertEqual(self._codes(build(2, 2, 5, plies=3, rounds=6)), self._codes(self.book))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'book.npz')
+            self.book.save(path)
+            self.assertEqual(self._codes(Book.load(2, 2, 5, path)), self._codes(self.book))
+
+    def test_bots_play_book_moves(self):
+        state = State(2, 2, 5)
+        split = Split(1, 2, 0, 2)
+        opening_book = Book(2, 2, 5, {state.key(): split})
+        book._open_books[(2, 2, 5)] = opening_book
+        try:
+            g = HeadlessGame(2, 5, ['DB+book', 'TB+book'], seed=1)
+            self.assertIs(g.player(1).get_next_move(g, state), split)
+            self.assertIs(g.player(2).get_next_move(g, state), split)
+            self.assertIs(ThetaBot(1, use_book=True).get_next_move(g, state), split)
+            # without asking for the book, bots search as they always have
+            self.assertIsNot(DefendBot(1, 2).get_next_move(g, state), split)
+            self.assertIsNot(ThetaBot(1).get_next_move(g, state), split)
+        finally:
+            del book._open_books[(2, 2, 5)]
+
+
+if __name__ == '__main__':
+    unittest.main()
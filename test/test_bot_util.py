@@ -0,0 +1,70 @@
+import io
+import contextlib
+import unittest
+
+from chopsticks.bot_util import BotUtil
+from chopsticks.bots import DefendBot
+from chopsticks.core import Game
+from chopsticks.state import State
+from chopsticks.move_table import MoveTable
+
+
+class TestTranspositionTable(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        table = BotUtil.TranspositionTable(2)
+        table.put('a', 1)
+        table.put('b', 2)
+        table.get('a')
+        table.put('c', 3)
+        self.assertEqual(len(table), 2)
+        self.assertIsNone(table.get('b'))
+        self.assertEqual(table.get('a'), 1)
+        self.assertEqual(table.get('c'), 3)
+
+    def test_counts_hits_and_misses(self):
+        table = BotUtil.TranspositionTable()
+        table.get('a')
+        table.put('a', 0)
+        table.get('a')
+        self.assertEqual((table.hits, table.misses), (1, 1))
+
+    def test_simulate_fills_and_reuses_table(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            g = Game(2, 5, ['DB', 'DB'])
+            bot = DefendBot(1, 4)
+            for fingers in ([1, 1, 1, 1], [1, 2, 1, 1], [1, 1, 1, 1]):
+                state = State(2, 2, 5, fingers)
+                bot.get_next_move(g, state)
+                self.assertEqual(state.hands(1) + state.hands(2), fingers)
+        self.assertTrue(len(bot.transposition_table))
+        self.assertTrue(bot.transposition_table.hits)
+
+
+class TestLegalMoves(unittest.TestCase):
+
+    def test_hits_skip_dead_and_duplicate_hands(self):
+        moves = BotUtil.get_legal_moves(State(2, 2, 5, [2, 2, 0, 3]), 1)
+        self.assertEqual([repr(move) for move in moves if move.code == 'h'], ["( 'h' 2 1 2 )"])
+
+    def test_splits_cover_every_pair_of_hands_once(self):
+        moves = BotUtil.get_legal_moves(State(2, 3, 5, [1, 2, 3, 1, 1, 1]), 1)
+        self.assertEqual([repr(move) for move in moves if move.code == 's'],
+            ["( 's' 1 2 3 0 )", "( 's' 1 3 2 2 )", "( 's' 1 3 4 0 )", "( 's' 2 3 4 1 )"])
+
+    def test_two_hand_splits_keep_larger_share_on_the_left(self):
+        moves = BotUtil.get_legal_moves(State(2, 2, 5, [3, 1, 1, 1]), 1)
+        self.assertEqual([repr(move) for move in moves if move.code == 's'], ["( 's' 1 2 2 2 )", "( 's' 1 2 4 0 )"])
+
+    def test_tables_share_moves(self):
+        state = State(2, 2, 5, [1, 3, 2, 4])
+        self.assertIs(MoveTable.get(2, 5), MoveTable.get(2, 5))
+        first = BotUtil.get_legal_moves(state, 1)
+        second = BotUtil.get_legal_moves(state.copy(), 1)
+        self.assertIsNot(first, second)
+        for first_move, second_move in zip(first, second):
+            self.assertIs(first_move, second_move)
+
+
+if __name__ == '__main__':
+    unittest.main()
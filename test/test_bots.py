@@ -0,0 +1,64 @@
+import io
+import contextlib
+import random
+import unittest
+
+from chopsticks.bot_util import BotUtil
+from chopsticks.bots import NegamaxBot, MonteCarloBot
+from chopsticks.core import Game
+from chopsticks.logic import Logic
+from chopsticks.state import State
+from chopsticks.tablebase import solve, WIN, LOSS
+from chopsticks.move import Hit
+import chopsticks.mcts as mcts
+
+
+class TestNegamaxBot(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.g = Game(2, 5, ['NB', 'NB'])
+
+    def test_finds_forced_wins_within_its_depth(self):
+        tablebase = solve(2, 2, 5)
+        bot = NegamaxBot(1, 8, time_budget=None)
+        for config in range(5 ** 4):
+            state = State(2, 2, 5, [(config // 5 ** index) % 5 for index in range(4)])
+            if not state.is_alive(1) or not state.is_alive(2):
+                continue
+            if not tablebase.outcome(state) == WIN or tablebase.distance(state) > 7:
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                move = bot.get_next_move(self.g, state)
+            Logic.do_move(state, move, 1)
+            state.set_current_player(2)
+            self.assertEqual(tablebase.outcome(state), LOSS)
+
+    def test_node_budget_still_returns_a_legal_move(self):
+        bot = NegamaxBot(1, 20, time_budget=None, node_budget=10)
+        state = State(2, 2, 5)
+        with contextlib.redirect_stdout(io.StringIO()):
+            move = bot.get_next_move(self.g, state)
+        self.assertLessEqual(bot.nodes, 11)
+        self.assertLess(bot.depth_reached, 20)
+        self.assertIn(repr(move), [repr(legal_move) for legal_move in BotUtil.get_legal_moves(state, 1)])
+        self.assertEqual(state.hands(1) + state.hands(2), [1, 1, 1, 1])
+
+
+class TestMonteCarloBot(unittest.TestCase):
+
+    def test_takes_the_win(self):
+        random.seed(0)
+        move = MonteCarloBot(1, 300).get_next_move(None, State(2, 2, 5, [1, 1, 4, 0]))
+        self.assertIsInstance(move, Hit)
+        self.assertEqual((move.opponent_id, move.opponent_hand), (2, 1))
+
+    def test_parallel_search_adds_up_every_worker(self):
+        visits = mcts.parallel_search(State(3, 2, 5), 1, 301, 2, 1.4, 200, random.Random(0))
+        self.assertEqual(len(visits), len(BotUtil.get_legal_moves(State(3, 2, 5), 1)))
+        self.assertEqual(sum(visits), 301)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,140 +5,141 @@ import chopsticks.player as player
 import chopsticks.core as core
 import chopsticks.logic as logic
 import chopsticks.user_interface as user_interface
+from chopsticks.move import Hit, Split
 
 
 
 class TestLogic(unittest.TestCase):
     """Spilt"""
     def test_split_correct1(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.split(g,0,0,1,2,2), True)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.split(g.state,1,Split(1,2,2,2)), True)
         
     def test_split_correct2(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        g.logic.split(g,0,0,1,2,2)
-        self.assertEqual(g.players[0].hands[1].alive_fingers, 2)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        g.logic.split(g.state,1,Split(1,2,2,2))
+        self.assertEqual(g.state.fingers(1,2), 2)
     
     def test_split_correct3(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        g.logic.split(g,0,0,1,2,2)
-        self.assertEqual(g.players[0].hands[0].alive_fingers, 2)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        g.logic.split(g.state,1,Split(1,2,2,2))
+        self.assertEqual(g.state.fingers(1,1), 2)
     
     def test_split_to_zero(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.split(g,0,0,1,0,2), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.split(g.state,1,Split(1,2,0,2)), False)
         
     def test_split_to_negative(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.split(g,0,0,1,-1,2), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.split(g.state,1,Split(1,2,-1,2)), False)
         
     def test_split_to_num_fingers(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.split(g,0,0,1,5,2), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.split(g.state,1,Split(1,2,5,2)), False)
         
     def test_split_to_greater_num_fingers(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.split(g,0,0,1,6,2), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.split(g.state,1,Split(1,2,6,2)), False)
     
     def test_split_to_zero2(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.split(g,0,0,1,2,0), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.split(g.state,1,Split(1,2,2,0)), False)
         
     def test_split_to_negative2(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.split(g,0,0,1,2,-1), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.split(g.state,1,Split(1,2,2,-1)), False)
         
     def test_split_to_num_fingers2(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.split(g,0,0,1,2,5), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.split(g.state,1,Split(1,2,2,5)), False)
         
     def test_split_to_greater_num_fingers2(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.split(g,0,0,1,2,6), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.split(g.state,1,Split(1,2,2,6)), False)
     
     def test_split_negative_hand_1(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.split(g,0,-1,1,2,2), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.split(g.state,1,Split(0,2,2,2)), False)
         
     def test_split_negative_hand_2(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.split(g,0,0,-1,2,2), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.split(g.state,1,Split(1,0,2,2)), False)
         
     def test_split_out_of_range_hand_1(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.split(g,0,2,1,2,2), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.split(g.state,1,Split(3,2,2,2)), False)
         
     def test_split_out_of_range_hand_2(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.split(g,0,0,2,2,2), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.split(g.state,1,Split(1,3,2,2)), False)
     
 
     """Hit"""
     def test_hit_correct_1(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.hit(g,0,1,1,0), True)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.hit(g.state,1,Hit(2,1,2)), True)
 
     def test_hit_correct_2(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 4
-        g.players[0].hands[1].alive_fingers = 3
-        self.assertEqual(g.logic.hit(g,0,1,1,0), True)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,4)
+        g.state.set_fingers(1,2,3)
+        self.assertEqual(g.logic.hit(g.state,1,Hit(2,1,2)), True)
 
     def test_hit_dead_hand_1(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 1
-        g.players[1].hands[1].alive_fingers = 0
-        self.assertEqual(g.logic.hit(g,0,1,1,0), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,1)
+        g.state.set_fingers(2,2,0)
+        self.assertEqual(g.logic.hit(g.state,1,Hit(2,1,2)), False)
     
     def test_hit_dead_hand_2(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 0
-        g.players[1].hands[1].alive_fingers = 1
-        self.assertEqual(g.logic.hit(g,0,1,1,0), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,0)
+        g.state.set_fingers(2,2,1)
+        self.assertEqual(g.logic.hit(g.state,1,Hit(2,1,2)), False)
 
     def test_hit_dead_hand_3(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 0
-        g.players[0].hands[1].alive_fingers = 1
-        self.assertEqual(g.logic.hit(g,0,0,1,0), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,0)
+        g.state.set_fingers(1,2,1)
+        self.assertEqual(g.logic.hit(g.state,1,Hit(1,1,2)), False)
 
     def test_hit_dead_hand_4(self):
-        g = core.Game(2,0,2,5)
-        g.players[0].hands[0].alive_fingers = 0
-        g.players[0].hands[1].alive_fingers = 0
-        self.assertEqual(g.logic.hit(g,0,0,1,0), False)
+        g = core.Game(2,5,['RB','RB'])
+        g.state.set_fingers(1,1,0)
+        g.state.set_fingers(1,2,0)
+        self.assertEqual(g.logic.hit(g.state,1,Hit(1,1,2)), False)
     
 
 
@@ -0,0 +1,106 @@
+import io
+import os
+import time
+import contextlib
+import unittest
+import multiprocessing
+from unittest import mock
+from multiprocessing.connection import Client
+
+from chopsticks.core import Tournament
+from chopsticks.distributed import Coordinator, work, play_tournament, play_league, parse_address
+from chopsticks.league import League
+
+AUTHKEY = b'test secret'
+
+
+class TestDistributed(unittest.TestCase):
+
+    def _workers(self, coordinator: Coordinator, count: int) -> list:
+        workers = [multiprocessing.Process(target=work, args=(coordinator.address, AUTHKEY)) for _ in range(count)]
+        for worker in workers:
+            worker.start()
+        return workers
+
+    def _finish(self, coordinator: Coordinator, workers: list):
+        coordinator.close()
+        for worker in workers:
+            worker.join(10)
+            self.assertEqual(worker.exitcode, 0)
+
+    def _tournament(self) -> Tournament:
+        return Tournament(2, 5, 40, ['ANB', 'DB'], seed=5)
+
+    def test_workers_give_the_same_results(self):
+        sequential = self._tournament()
+        with contextlib.redirect_stdout(io.StringIO()):
+            sequential.play()
+        coordinator = Coordinator(authkey=AUTHKEY)
+        workers = self._workers(coordinator, 3)
+        distributed = self._tournament()
+        with contextlib.redirect_stdout(io.StringIO()):
+            play_tournament(distributed, coordinator, batch_size=3)
+        self._finish(coordinator, workers)
+        self.assertEqual((sequential.winners, sequential.stalemates, sequential.total_rounds_played),
+            (distributed.winners, distributed.stalemates, distributed.total_rounds_played))
+
+    def test_lost_batches_are_retried_and_counted_once(self):
+        coordinator = Coordinator(authkey=AUTHKEY, lease_seconds=0.5)
+        # one worker takes a batch and disconnects, another takes a batch and stalls
+        lost = Client(coordinator.address, authkey=AUTHKEY)
+        stalled = Client(coordinator.address, authkey=AUTHKEY)
+        batches = [[1, 2], [3], [4, 5, 6]]
+        results = coordinator.results(str, batches)
+        for client in (lost, stalled):
+            client.send(('ready',))
+        _, lost_id, _, _ = lost.recv()
+        _, stalled_id, function, stalled_batch = stalled.recv()
+        lost.close()
+        workers = self._workers(coordinator, 2)
+        self.assertEqual(list(results), [['1', '2'], ['3'], ['4', '5', '6']])
+        # the stalled worker's result arrives after another worker played its batch
+        stalled.send(('result', stalled_id, [function(item) for item in stalled_batch]))
+        time.sleep(0.2)
+        self.assertEqual(coordinator.retries, 2)
+        self.assertEqual(coordinator.duplicates, 1)
+        stalled.close()
+        self._finish(coordinator, workers)
+
+    def test_failing_batches_are_reported_not_retried(self):
+        coordinator = Coordinator(authkey=AUTHKEY)
+        workers = self._workers(coordinator, 2)
+        with self.assertRaises(Exception) as raised:
+            list(coordinator.results(int, [['1'], ['2', 'x'], ['3']]))
+        self.assertIn("Batch 1 failed", str(raised.exception))
+        self.assertIn("ValueError", str(raised.exception))
+        self.assertEqual(coordinator.retries, 0)
+        # the workers carry on with the next run
+        self.assertEqual(list(coordinator.results(int, [['4'], ['5']])), [[4], [5]])
+        self._finish(coordinator, workers)
+
+    def test_needs_a_secret_and_listens_on_localhost(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('CHOPSTICKS_AUTHKEY', None)
+            with self.assertRaises(Exception):
+                Coordinator()
+            with self.assertRaises(Exception):
+                work(('localhost', 1))
+        with Coordinator(authkey=AUTHKEY) as coordinator:
+            self.assertEqual(coordinator.address[0], '127.0.0.1')
+        self.assertEqual(parse_address('5000'), ('localhost', 5000))
+        self.assertEqual(parse_address('0.0.0.0:5000'), ('0.0.0.0', 5000))
+
+    def test_league(self):
+        sequential = League(2, 5, 2, ['RB', 'ANB', 'TB'], seed=3)
+        distributed = League(2, 5, 2, ['RB', 'ANB', 'TB'], seed=3)
+        coordinator = Coordinator(authkey=AUTHKEY)
+        workers = self._workers(coordinator, 2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            sequential.play()
+            play_league(distributed, coordinator, batch_size=5)
+        self._finish(coordinator, workers)
+        self.assertEqual(sequential.ratings, distributed.ratings)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import io
+import unittest
+
+from chopsticks.engine import Engine
+from chopsticks.tablebase import solve
+import chopsticks.tablebase as tablebase
+
+
+class TestEngine(unittest.TestCase):
+
+    def _run(self, engine: Engine, *lines: str) -> list[str]:
+        engine.output = io.StringIO()
+        engine.run(lines)
+        return engine.output.getvalue().splitlines()
+
+    def test_answers_with_a_legal_best_move(self):
+        engine = Engine()
+        output = self._run(engine, 'isready', 'newgame', 'position 1,1/2,3 1', 'go movetime 50')
+        self.assertEqual(output[0], 'readyok')
+        self.assertTrue(output[1].startswith('info depth '))
+        self.assertIn(output[2].split()[1], ('h', 's'))
+
+    def test_finds_the_winning_hit(self):
+        engine = Engine()
+        output = self._run(engine, 'position 0,4/0,1 1', 'go depth 2')
+        self.assertEqual(output[-1], 'bestmove h 2 2 2')
+        tablebase._open_tablebases[(2, 2, 5)] = solve(2, 2, 5)
+        try:
+            output = self._run(engine, 'setoption bot PB', 'position 0,4/0,1 1', 'go')
+        finally:
+            del tablebase._open_tablebases[(2, 2, 5)]
+        self.assertEqual(output[-1], 'bestmove h 2 2 2')
+
+    def test_keeps_its_bots_between_searches(self):
+        engine = Engine()
+        self._run(engine, 'position 1,1/1,1 1', 'go depth 4')
+        bot = engine.games[('NB', 2, 2, 5)].player(1)
+        self.assertTrue(len(bot.transposition_table))
+        self._run(engine, 'newgame', 'position 1,2/1,1 1', 'go depth 4')
+        self.assertIs(engine.games[('NB', 2, 2, 5)].player(1), bot)
+
+    def test_reports_bad_commands_and_quits(self):
+        engine = Engine()
+        output = self._run(engine, 'go', 'position 1,1/1 1', 'position 5,1/1,1 1', 'fly', 'position 0,0/1,1 2',
+            'go', 'quit', 'isready')
+        self.assertTrue(all(line.startswith('info string error') for line in output[:4]))
+        self.assertEqual(output[4:], ['bestmove none'])
+
+
+if __name__ == '__main__':
+    unittest.main()
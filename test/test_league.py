@@ -0,0 +1,50 @@
+import io
+import os
+import contextlib
+import tempfile
+import unittest
+
+from chopsticks.league import League
+
+
+class TestLeague(unittest.TestCase):
+
+    def _league(self, **arguments) -> League:
+        return League(2, 5, 3, ['RB', 'ANB', 'TB'], seed=11, **arguments)
+
+    def _play(self, league: League, max_games: int|None = None) -> League:
+        with contextlib.redirect_stdout(io.StringIO()):
+            league.play(max_games)
+        return league
+
+    def test_plays_every_pairing_in_both_seats(self):
+        league = self._play(self._league())
+        self.assertEqual(league.games_played, 18)
+        self.assertEqual(len(league.results), 6)
+        self.assertTrue(all(sum(results[:3]) == 3 for results in league.results.values()))
+        self.assertAlmostEqual(sum(league.ratings.values()), 3 * 1500)
+        self.assertEqual(min(league.ratings, key=league.ratings.get), 'RB')
+
+    def test_workers_give_the_same_ratings(self):
+        sequential = self._play(self._league())
+        parallel = self._play(self._league(workers=2))
+        self.assertEqual(sequential.results, parallel.results)
+        self.assertEqual(sequential.ratings, parallel.ratings)
+
+    def test_resumes_from_checkpoint(self):
+        uninterrupted = self._play(self._league())
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'league.json')
+            self._play(self._league(checkpoint_path=path, checkpoint_every=2), 7)
+            resumed = self._league(checkpoint_path=path)
+            self.assertEqual(resumed.games_played, 7)
+            self._play(resumed)
+            self.assertEqual(resumed.results, uninterrupted.results)
+            self.assertEqual(resumed.ratings, uninterrupted.ratings)
+            self.assertEqual(self._league(checkpoint_path=path).games_played, 18)
+            with self.assertRaises(Exception):
+                League(2, 5, 4, ['RB', 'ANB', 'TB'], seed=11, checkpoint_path=path)
+
+
+if __name__ == '__main__':
+    unittest.main()
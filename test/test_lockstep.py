@@ -0,0 +1,38 @@
+import io
+import contextlib
+import unittest
+
+from chopsticks.lockstep import LockstepTournament
+
+
+class TestLockstepTournament(unittest.TestCase):
+
+    def _play(self, player_types: list[str], num_games: int = 2000, seed: int = 0) -> LockstepTournament:
+        tournament = LockstepTournament(2, 5, num_games, player_types, batch_size=700, seed=seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            tournament.play()
+        return tournament
+
+    def test_every_game_is_recorded(self):
+        tournament = self._play(['RB', 'RB', 'RB'])
+        self.assertEqual(sum(tournament.winners.values()) + tournament.stalemates, 2000)
+        self.assertGreater(tournament.total_rounds_played, 2000)
+
+    def test_same_seed_same_results(self):
+        first = self._play(['RB', 'ANB'], seed=3)
+        second = self._play(['RB', 'ANB'], seed=3)
+        self.assertEqual((first.winners, first.stalemates, first.total_rounds_played),
+            (second.winners, second.stalemates, second.total_rounds_played))
+        self.assertEqual(first.seed, 3)
+
+    def test_attack_now_bot_beats_random_bot(self):
+        tournament = self._play(['ANB', 'RB'])
+        self.assertGreater(tournament.winners[1], 2 * tournament.winners[2])
+
+    def test_rejects_searching_bots(self):
+        with self.assertRaises(Exception):
+            LockstepTournament(2, 5, 10, ['RB', 'ADB'])
+
+
+if __name__ == '__main__':
+    unittest.main()
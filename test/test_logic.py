@@ -0,0 +1,46 @@
+import unittest
+
+from chopsticks.logic import Logic
+from chopsticks.move import Hit, Split
+from chopsticks.state import State
+
+
+class TestApplyUndo(unittest.TestCase):
+
+    def test_hit_round_trip(self):
+        state = State(2, 2, 5, [2, 1, 3, 1])
+        undo = Logic.apply(state, Hit(2, 1, 1), 1)
+        self.assertIsNotNone(undo)
+        self.assertEqual(state.hands(2), [0, 1])
+        Logic.undo(state, undo)
+        self.assertEqual(state.hands(2), [3, 1])
+
+    def test_split_round_trip(self):
+        state = State(2, 2, 5, [1, 3, 1, 1])
+        undo = Logic.apply(state, Split(1, 2, 2, 2), 1)
+        self.assertEqual(state.hands(1), [2, 2])
+        Logic.undo(state, undo)
+        self.assertEqual(state.hands(1), [1, 3])
+
+    def test_invalid_move_leaves_state(self):
+        state = State(2, 2, 5, [1, 3, 1, 1])
+        self.assertIsNone(Logic.apply(state, Split(1, 2, 3, 1), 1))
+        self.assertIsNone(Logic.apply(state, Hit(1, 1, 1), 1))
+        self.assertIsNone(Logic.apply(state, Hit(2, 1, 3), 1))
+        self.assertEqual(state.hands(1), [1, 3])
+        self.assertEqual(state.hands(2), [1, 1])
+
+    def test_prior_alive_hands(self):
+        state = State(2, 2, 5, [1, 1, 4, 1])
+        undo = Logic.apply(state, Hit(2, 1, 1), 1)
+        self.assertEqual(state.count_alive_hands(2), 1)
+        self.assertEqual(undo.prior_alive_hands(state, 2), 2)
+        self.assertEqual(undo.prior_fingers(state, 2, 1), 4)
+
+    def test_split_to_same_hand_is_invalid(self):
+        state = State(2, 2, 5, [2, 1, 1, 1])
+        self.assertIsNone(Logic.apply(state, Split(1, 1, 3, 1), 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import io
+import os
+import tempfile
+import contextlib
+import unittest
+
+from chopsticks.core import Game, Tournament
+from chopsticks.logic import Logic
+from chopsticks.records import GameRecord, RecordWriter, read_records
+
+
+class TestRecords(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "games.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replaying_a_record_reaches_the_final_state(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            g = Game(2, 5, ['ANB', 'RB', 'TB'], seed=3)
+            g.play()
+        with RecordWriter(self.path) as writer:
+            writer.write(g.record())
+        [(record, offset)] = list(read_records(self.path))
+        self.assertEqual(offset, os.path.getsize(self.path))
+        self.assertEqual((record.player_types, record.seed, record.rounds_played, record.winning_player_id),
+            (['ANB', 'RB', 'TB'], g.seed, g.rounds_played, g.logic.get_winning_player_id(g.state)))
+        state = record.starting_state()
+        for player_id, move in record.moves:
+            self.assertTrue(Logic.do_move(state, move, player_id))
+        self.assertEqual(state.all_hands(), g.state.all_hands())
+
+    def test_refuses_seeds_that_cannot_be_recorded(self):
+        for seed in (-1, 2 ** 64):
+            with self.assertRaises(Exception):
+                Game(2, 5, ['RB', 'RB'], seed=seed)
+            with self.assertRaises(Exception):
+                Tournament(2, 5, 1, ['RB', 'RB'], seed=seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            g = Game(2, 5, ['RB', 'RB'], seed=2 ** 64 - 1)
+            g.play()
+        self.assertEqual(GameRecord.decode(g.record().encode()).seed, 2 ** 64 - 1)
+
+    def test_reading_stops_at_a_partly_written_record(self):
+        record = GameRecord(2, 5, ['RB', 'RB'], 1, [1, 1, 1, 1], 1, [], None, 0)
+        with RecordWriter(self.path) as writer:
+            writer.write(record)
+            writer.write(record)
+        size = os.path.getsize(self.path)
+        with open(self.path, 'r+b') as file:
+            file.truncate(size - 3)
+        offsets = [offset for _, offset in read_records(self.path)]
+        self.assertEqual(offsets, [size // 2])
+        self.assertEqual(list(read_records(self.path, offsets[-1])), [])
+
+    def test_parallel_tournament_records_every_game(self):
+        tournament = Tournament(2, 5, 10, ['ANB', 'RB'], workers=2, seed=1, record_path=self.path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            tournament.play()
+        records = [record for record, _ in read_records(self.path)]
+        self.assertEqual(len(records), 10)
+        self.assertEqual(sum(record.winning_player_id is None for record in records), tournament.stalemates)
+        self.assertEqual(sum(record.rounds_played for record in records), tournament.total_rounds_played)
+
+
+if __name__ == '__main__':
+    unittest.main()
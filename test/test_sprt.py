@@ -0,0 +1,65 @@
+import io
+import os
+import tempfile
+import contextlib
+import unittest
+
+from chopsticks.core import Tournament
+from chopsticks.records import read_records
+from chopsticks.sprt import Sprt, wilson_interval, PLAYER_1, PLAYER_2, NEITHER
+
+
+class TestSprt(unittest.TestCase):
+
+    def test_decisions(self):
+        sprt = Sprt()
+        self.assertIsNone(sprt.decision(10, 0, 0))
+        self.assertEqual(sprt.decision(60, 10, 30), PLAYER_1)
+        self.assertEqual(sprt.decision(30, 10, 60), PLAYER_2)
+        self.assertEqual(sprt.decision(500, 0, 500), NEITHER)
+        self.assertEqual(sprt.decision(0, 30, 0), NEITHER)
+        self.assertIsNone(sprt.decision(20, 0, 16))
+
+    def test_wilson_interval(self):
+        low, high = wilson_interval(50, 100)
+        self.assertAlmostEqual(low + high, 1.0)
+        self.assertTrue(0.39 < low < 0.41)
+        self.assertEqual(wilson_interval(0, 10)[0], 0.0)
+        self.assertTrue(wilson_interval(10, 10)[0] > 0.6)
+
+    def _play(self, player_types: list[str], workers: int) -> Tournament:
+        tournament = Tournament(2, 5, 2000, player_types, workers=workers, seed=3, sprt=Sprt())
+        with contextlib.redirect_stdout(io.StringIO()):
+            tournament.play()
+        return tournament
+
+    def test_tournament_stops_once_decided(self):
+        tournament = self._play(['ANB', 'RB'], 1)
+        self.assertEqual(tournament.decision, PLAYER_1)
+        self.assertTrue(tournament.games_played < 2000)
+        self.assertEqual(sum(tournament.winners.values()) + tournament.stalemates, tournament.games_played)
+
+    def test_workers_stop_at_the_same_game(self):
+        sequential = self._play(['RB', 'ANB'], 1)
+        parallel = self._play(['RB', 'ANB'], 2)
+        self.assertEqual(sequential.decision, PLAYER_2)
+        self.assertEqual((sequential.games_played, sequential.winners, sequential.stalemates),
+            (parallel.games_played, parallel.winners, parallel.stalemates))
+
+    def test_logs_only_the_games_counted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.log')
+            tournament = Tournament(2, 5, 2000, ['RB', 'ANB'], workers=2, seed=3, sprt=Sprt(), record_path=path)
+            with contextlib.redirect_stdout(io.StringIO()):
+                tournament.play()
+            records = [record for record, _ in read_records(path)]
+        self.assertEqual(len(records), tournament.games_played)
+        self.assertEqual(sum(record.winning_player_id == 2 for record in records), tournament.winners.get(2, 0))
+
+    def test_needs_two_players(self):
+        with self.assertRaises(Exception):
+            Tournament(2, 5, 100, ['RB', 'RB', 'RB'], sprt=Sprt())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from chopsticks.state import State, Scenario
+from chopsticks.move import Hit, Split
+
+
+class TestState(unittest.TestCase):
+
+    def test_starting_hands(self):
+        state = State(2, 2, 5)
+        self.assertEqual(state.hands(1), [1, 1])
+        self.assertEqual(state.hands(2), [1, 1])
+        self.assertEqual(state.get_current_player_id(), 1)
+
+    def test_set_fingers(self):
+        state = State(3, 2, 5)
+        state.set_fingers(2, 2, 4)
+        self.assertEqual(state.fingers(2, 2), 4)
+        self.assertEqual(state.hands(2), [1, 4])
+        self.assertEqual(state.get_alive_fingers(2), 5)
+
+    def test_alive_hands(self):
+        state = State(2, 2, 5, [0, 3, 0, 0])
+        self.assertEqual(state.count_alive_hands(1), 1)
+        self.assertTrue(state.is_alive(1))
+        self.assertFalse(state.is_alive(2))
+
+    def test_copy_is_independent(self):
+        state = State(2, 2, 5)
+        copy = state.copy()
+        copy.set_fingers(1, 1, 3)
+        self.assertEqual(state.fingers(1, 1), 1)
+        self.assertEqual(copy.fingers(1, 1), 3)
+
+    def test_opponent_ids(self):
+        self.assertEqual(State(3, 2, 5).opponent_ids(2), [1, 3])
+
+    def test_key_matches_hands(self):
+        self.assertEqual(State(2, 2, 5).key(), State(2, 2, 5).key())
+        self.assertNotEqual(State(2, 2, 5, [1, 2, 1, 1]).key(), State(2, 2, 5).key())
+
+    def test_key_is_unique_beyond_single_digits(self):
+        # 9 + 1 fingers would collide with 1 + 0 in a base-10 key
+        self.assertNotEqual(State(2, 2, 12, [10, 1, 1, 1]).key(), State(2, 2, 12, [1, 0, 1, 1]).key())
+        self.assertNotEqual(State(2, 2, 12, [11, 0, 0, 0]).key(), State(2, 2, 12, [0, 1, 0, 0]).key())
+
+    def test_key_is_updated_incrementally(self):
+        state = State(3, 3, 7)
+        state.set_fingers(2, 3, 6)
+        state.set_fingers(1, 1, 0)
+        state.set_current_player(3)
+        self.assertEqual(state.key(), State(3, 3, 7, state.hands(1) + state.hands(2) + state.hands(3), 3).key())
+        self.assertEqual(state.copy().key(), state.key())
+
+    def test_canonical_key_ignores_hand_order(self):
+        self.assertEqual(State(2, 2, 5, [1, 3, 2, 4]).canonical_key(), State(2, 2, 5, [3, 1, 4, 2]).canonical_key())
+        self.assertNotEqual(State(2, 2, 5, [1, 3, 2, 4]).canonical_key(), State(2, 2, 5, [2, 4, 1, 3]).canonical_key())
+
+    def test_relative_canonical_key(self):
+        self.assertEqual(State(2, 2, 5, [1, 3, 2, 4], 1).canonical_key(relative=True),
+            State(2, 2, 5, [4, 2, 3, 1], 2).canonical_key(relative=True))
+        self.assertEqual(State(3, 2, 5, [1, 1, 2, 2, 3, 3], 2).canonical_key(relative=True),
+            State(3, 2, 5, [2, 2, 3, 3, 1, 1], 1).canonical_key(relative=True))
+
+    def test_repr(self):
+        self.assertEqual(repr(State(2, 2, 5, [1, 2, 3, 4])), "[[1, 2], [3, 4]]")
+
+
+class TestScenario(unittest.TestCase):
+
+    def test_hit_leaves_starting_state_alone(self):
+        state = State(2, 2, 5, [2, 1, 3, 1])
+        scenario = Scenario(state, 1, Hit(2, 1, 1))
+        self.assertEqual(scenario.hands(2), [0, 1])
+        self.assertEqual(state.hands(2), [3, 1])
+        self.assertEqual(scenario.get_current_player_id(), 1)
+
+    def test_split(self):
+        scenario = Scenario(State(2, 2, 5, [1, 3, 1, 1]), 1, Split(1, 2, 2, 2))
+        self.assertEqual(scenario.hands(1), [2, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
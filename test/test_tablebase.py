@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from chopsticks.bot_util import BotUtil
+from chopsticks.logic import Logic
+from chopsticks.state import State
+from chopsticks.tablebase import Tablebase, solve, WIN, LOSS, DRAW
+from chopsticks.bots import TablebaseBot
+from chopsticks.core import HeadlessGame
+from chopsticks.move import Hit
+import chopsticks.tablebase as tablebase
+
+
+class TestSolve(unittest.TestCase):
+
+    def setUp(self):
+        self.tablebase = solve(2, 2, 5)
+
+    def _successor_values(self, state: State):
+        """ (outcome, distance) for the opponent after each of the mover's legal moves """
+        results = []
+        for move in BotUtil.get_legal_moves(state, 1):
+            undo = Logic.apply(state, move, 1)
+            state.set_current_player(2)
+            results.append((self.tablebase.outcome(state), self.tablebase.distance(state)))
+            state.set_current_player(1)
+            Logic.undo(state, undo)
+        return results
+
+    def test_labels_agree_with_the_rules(self):
+        for config in range(5 ** 4):
+            fingers = [(config // 5 ** index) % 5 for index in range(4)]
+            state = State(2, 2, 5, fingers)
+            if not state.is_alive(1) or not state.is_alive(2):
+                continue
+            outcome = self.tablebase.outcome(state)
+            distance = self.tablebase.distance(state)
+            successors = self._successor_values(state)
+            if outcome == WIN:
+                self.assertIn((LOSS, distance - 1), successors, state)
+                self.assertFalse([value for value in successors if value[0] == LOSS and value[1] < distance - 1])
+            elif outcome == LOSS:
+                self.assertTrue(all(value[0] == WIN for value in successors), state)
+                self.assertEqual(max(value[1] for value in successors), distance - 1)
+            else:
+                self.assertIn(DRAW, [value[0] for value in successors], state)
+                self.assertNotIn(LOSS, [value[0] for value in successors], state)
+
+    def test_finished_games(self):
+        self.assertEqual(self.tablebase.outcome(State(2, 2, 5, [0, 0, 1, 2])), LOSS)
+        self.assertEqual(self.tablebase.distance(State(2, 2, 5, [0, 0, 1, 2])), 0)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tablebase.npy")
+            self.tablebase.save(path)
+            loaded = Tablebase.load(2, 2, 5, path)
+            self.assertEqual(loaded.outcome(State(2, 2, 5)), self.tablebase.outcome(State(2, 2, 5)))
+
+
+class TestTablebaseBot(unittest.TestCase):
+
+    def setUp(self):
+        tablebase._open_tablebases[(2, 2, 5)] = solve(2, 2, 5)
+
+    def tearDown(self):
+        del tablebase._open_tablebases[(2, 2, 5)]
+
+    def test_takes_the_win(self):
+        state = State(2, 2, 5, [1, 1, 4, 0])
+        move = TablebaseBot(1, 2, 5).get_next_move(None, state)
+        self.assertIsInstance(move, Hit)
+        self.assertEqual((move.opponent_id, move.opponent_hand), (2, 1))
+
+    def test_never_moves_into_a_loss(self):
+        for config in range(5 ** 4):
+            fingers = [(config // 5 ** index) % 5 for index in range(4)]
+            state = State(2, 2, 5, fingers)
+            if not state.is_alive(1) or not state.is_alive(2) or not tablebase._open_tablebases[(2, 2, 5)].outcome(state) == DRAW:
+                continue
+            scenario = state.copy()
+            Logic.do_move(scenario, TablebaseBot(1, 2, 5).get_next_move(None, state), 1)
+            scenario.set_current_player(2)
+            self.assertEqual(tablebase._open_tablebases[(2, 2, 5)].outcome(scenario), DRAW)
+
+    def test_opens_the_tablebase_before_the_game(self):
+        g = HeadlessGame(2, 5, ['PB', 'RB'])
+        self.assertIs(g.player(1).tablebase, tablebase._open_tablebases[(2, 2, 5)])
+        with self.assertRaises(Exception):
+            HeadlessGame(2, 5, ['PB', 'RB', 'RB'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import io
+import os
+import contextlib
+import unittest
+from unittest import mock
+
+from chopsticks.core import Game, HeadlessGame, Tournament
+import chopsticks.mcts as mcts
+import chopsticks.profiling as profiling
+
+
+class TestTournament(unittest.TestCase):
+
+    def _play(self, workers: int, seed: int, profiled: bool = False) -> Tournament:
+        tournament = Tournament(2, 5, 12, ['ANB', 'DB'], workers=workers, seed=seed, profiled=profiled)
+        with contextlib.redirect_stdout(io.StringIO()):
+            tournament.play()
+        return tournament
+
+    def test_seeded_games_repeat(self):
+        results = []
+        for _ in range(2):
+            with contextlib.redirect_stdout(io.StringIO()):
+                g = Game(2, 5, ['RB', 'AB'], seed=7)
+                g.play()
+            results.append((g.state.all_hands(), g.rounds_played))
+        self.assertEqual(results[0], results[1])
+
+    def test_workers_give_the_same_results(self):
+        sequential = self._play(1, 5)
+        parallel = self._play(2, 5)
+        self.assertEqual(sum(parallel.winners.values()) + parallel.stalemates, 12)
+        self.assertEqual((sequential.winners, sequential.stalemates, sequential.total_rounds_played),
+            (parallel.winners, parallel.stalemates, parallel.total_rounds_played))
+
+    def test_profiles_every_bot_decision(self):
+        for workers in (1, 2):
+            tournament = self._play(workers, 2, profiled=True)
+            self.assertEqual(sorted(tournament.profile.decisions), ['ANB', 'DB'])
+            self.assertTrue(any(decision.simulate_nodes for decision in tournament.profile.decisions['DB']))
+            self.assertTrue(any(decision.scenarios for decision in tournament.profile.decisions['ANB']))
+            self.assertTrue(all(decision.legal_moves for decision in tournament.profile.decisions['ANB']))
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                tournament.print_results()
+            self.assertIn("ANB (", output.getvalue())
+
+    def test_only_profiles_when_asked(self):
+        for workers in (1, 2):
+            self.assertFalse(self._play(workers, 2).profile.decisions)
+        g = HeadlessGame(2, 5, ['ANB', 'DB'], seed=2)
+        g.play()
+        self.assertFalse(g.profile.decisions)
+
+    def test_headless_games_match_printed_games(self):
+        for player_types in (['RB', 'AB'], ['ANB', 'RB', 'TB']):
+            with contextlib.redirect_stdout(io.StringIO()):
+                g = Game(2, 5, player_types, seed=4)
+                g.play()
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                headless = HeadlessGame(2, 5, player_types, seed=4)
+                result = headless.play()
+            self.assertEqual(output.getvalue(), "")
+            self.assertIsNone(headless.ui)
+            self.assertEqual(result.winning_player_id, g.logic.get_winning_player_id(g.state))
+            self.assertEqual(result.rounds_played, g.rounds_played)
+            self.assertEqual([(player_id, move.code, move.__dict__) for player_id, move in result.moves],
+                [(player_id, move.code, move.__dict__) for player_id, move in g.moves])
+
+    def test_headless_tournaments_match_printed_ones(self):
+        headless = self._play(1, 8)
+        printed = Tournament(2, 5, 12, ['ANB', 'DB'], seed=8, headless=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            printed.play()
+        self.assertEqual((headless.winners, headless.stalemates, headless.total_rounds_played),
+            (printed.winners, printed.stalemates, printed.total_rounds_played))
+        with self.assertRaises(Exception):
+            HeadlessGame(2, 5, ['H', 'RB'])
+
+    def test_percentiles(self):
+        self.assertEqual(profiling.percentiles(list(range(1, 101)), (0.5, 0.9, 0.99, 1.0)), [50, 90, 99, 100])
+        self.assertEqual(profiling.percentiles([7], (0.5, 1.0)), [7, 7])
+
+    def test_workers_search_without_nested_pools(self):
+        # worker processes are forked with these patches, so a pool made by a worker's bot raises
+        with mock.patch.object(os, 'cpu_count', return_value=4), \
+                mock.patch.object(mcts, '_get_pool', side_effect=AssertionError("nested pool")):
+            tournament = Tournament(2, 5, 2, ['MB', 'ANB'], workers=2, seed=3)
+            with contextlib.redirect_stdout(io.StringIO()):
+                tournament.play()
+            self.assertEqual(HeadlessGame(2, 5, ['MB', 'RB']).player(1).workers, 4)
+        self.assertEqual(tournament.games_played, 2)
+
+    def test_rejects_humans_in_workers(self):
+        with self.assertRaises(Exception):
+            Tournament(2, 5, 2, ['H', 'RB'], workers=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
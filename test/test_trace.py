@@ -0,0 +1,61 @@
+import io
+import os
+import json
+import tempfile
+import contextlib
+import unittest
+
+from chopsticks.bots import AttackDefendBot
+from chopsticks.core import Game
+from chopsticks.state import State
+import chopsticks.trace as trace
+
+
+class TestTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.level = trace.level
+        self.sinks = trace.sinks
+
+    def tearDown(self):
+        trace.level = self.level
+        trace.sinks = self.sinks
+
+    def test_disabled_levels_write_nothing(self):
+        trace.configure(trace.INFO, [trace.StdoutSink()])
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            g = Game(2, 5, ['ADB', 'ADB'], seed=1)
+            AttackDefendBot(1, 4).get_next_move(g, State(2, 2, 5))
+        self.assertTrue(output.getvalue().startswith("Players:"))
+        self.assertNotIn("consider move", output.getvalue())
+
+    def test_ring_buffer_keeps_the_latest_search_messages(self):
+        buffer = trace.RingBufferSink(5)
+        trace.configure(trace.TRACE, [buffer])
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            g = Game(2, 5, ['ADB', 'ADB'], seed=1)
+            AttackDefendBot(1, 4).get_next_move(g, State(2, 2, 5))
+        self.assertEqual(output.getvalue(), "")
+        self.assertEqual(len(buffer.records), 5)
+        self.assertTrue(any('depth' in record for record in buffer.records))
+
+    def test_jsonl_sink(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.jsonl")
+            trace.configure(trace.DEBUG, [trace.JsonlSink(path)])
+            trace.emit(trace.DEBUG, "message", depth=2, state=State(2, 2, 5))
+            trace.configure(new_sinks=[])
+            with open(path) as file:
+                records = [json.loads(line) for line in file]
+        self.assertEqual(len(records), 1)
+        self.assertEqual((records[0]['message'], records[0]['depth'], records[0]['state']), ("message", 2, "[[1, 1], [1, 1]]"))
+
+    def test_stdout_sink_indents_by_depth(self):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            trace.StdoutSink().write({'message': "found", 'depth': 2})
+        self.assertEqual(output.getvalue(), "...... found\n")
+
+
+if __name__ == '__main__':
+    unittest.main()